@@ -0,0 +1,333 @@
+"""
+api.py
+======
+Serviço REST do otimizador, sem a interface Streamlit.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+- POST /jobs                → agenda uma rota (202 + id do job)
+- GET  /jobs/{id}           → status e progresso
+- GET  /jobs/{id}/resultado → resultado da otimização (409 enquanto processa)
+- GET  /jobs/{id}/trace     → spans do job no formato Chrome trace
+- GET  /metricas            → latência por endpoint, fila e single-flight
+- GET  /metrics             → métricas no formato de texto do Prometheus
+
+Os jobs passam por uma fila asyncio consumida por workers no mesmo event
+loop. Todas as coletas usam um único navegador (PoolNavegadores), e
+coletas idênticas (origem, destino, data, janela) em andamento são
+compartilhadas entre os jobs (single-flight) em vez de abrir outro crawl.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import Literal
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from crawler.browser_pool import PoolNavegadores
+from domain.models import resultado_para_dict
+from infra.metricas import TIPO_CONTEUDO, contador, exportar_texto, histograma, medidor
+from infra.profiling import perfilar
+from infra.singleflight import estatisticas_singleflight
+from infra.tracing import exportar_chrome, exportar_se_configurado, resumo_trace, span
+from services.job_service import CONCLUIDO, ERRO, EXECUTANDO, JOBS_FINALIZADOS, RETENCAO_JOBS_S, Job
+from services.optimization_service import OptimizationService
+from services.route_service import RouteService
+
+WORKERS_API = int(os.getenv("OTIMIZACAO_API_WORKERS", "4"))
+MAX_FILA_API = int(os.getenv("OTIMIZACAO_API_MAX_FILA", "1000"))
+
+# Amostras de latência guardadas por endpoint (janela deslizante)
+AMOSTRAS_LATENCIA = 1024
+
+REQUISICOES_API = contador("api_requisicoes_total", "Requisições à API", ("endpoint", "status"))
+DURACAO_API = histograma("api_requisicao_segundos", "Latência das requisições à API", ("endpoint",))
+FILA_API = medidor("api_fila_jobs", "Jobs aguardando na fila da API")
+
+
+class RotaRequisicao(BaseModel):
+    origem: str = Field(min_length=1)
+    destino: str = Field(min_length=1)
+    data_partida: date
+    perfil: Literal["Mais barato", "Equilibrado", "Mais rápido"] = "Equilibrado"
+    orcamento: float = Field(6000, gt=0)
+    tempo_max: float = Field(30, gt=0)
+    janela_dias: int = Field(0, ge=0, le=7)
+    # Perfila a otimização deste job (cProfile/tracemalloc, relatório em OTIMIZACAO_PROFILE_DIR)
+    perfilar: Literal["", "cpu", "mem", "cpu,mem"] = ""
+
+
+# =========================================================
+# MÉTRICAS DE LATÊNCIA
+# =========================================================
+class MetricasLatencia:
+
+    def __init__(self, amostras=AMOSTRAS_LATENCIA):
+        self._amostras = defaultdict(lambda: deque(maxlen=amostras))
+        self._total = defaultdict(int)
+
+    def registrar(self, endpoint, segundos):
+        self._amostras[endpoint].append(segundos)
+        self._total[endpoint] += 1
+
+    def resumo(self):
+        resumo = {}
+        for endpoint, amostras in self._amostras.items():
+            ms = np.fromiter(amostras, dtype=np.float64) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            resumo[endpoint] = {
+                "requisicoes": self._total[endpoint],
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(ms.max()), 2),
+            }
+        return resumo
+
+
+# =========================================================
+# FILA DE JOBS
+# =========================================================
+class FilaOtimizacao:
+
+    def __init__(self, n_workers=WORKERS_API, max_fila=MAX_FILA_API):
+        self.n_workers = n_workers
+        self.max_fila = max_fila
+        self.jobs: dict[str, Job] = {}
+        self._fila = None
+        self._workers = []
+        self._pool = None
+        self._pool_lock = None
+
+    async def iniciar(self):
+        self._fila = asyncio.Queue(maxsize=self.max_fila)
+        self._pool_lock = asyncio.Lock()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.n_workers)]
+
+    async def parar(self):
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._pool is not None:
+            await self._pool.__aexit__(None, None, None)
+            self._pool = None
+
+    def submeter(self, requisicao: RotaRequisicao) -> Job:
+        """Enfileira a rota; levanta asyncio.QueueFull se a fila estiver cheia."""
+        self._limpar_antigos()
+        job = Job(id=uuid.uuid4().hex, rota_idx=1, rota=requisicao.model_dump())
+        self._fila.put_nowait(job)
+        self.jobs[job.id] = job
+        return job
+
+    @property
+    def tamanho_fila(self):
+        return self._fila.qsize() if self._fila is not None else 0
+
+    def _limpar_antigos(self):
+        limite = time.time() - RETENCAO_JOBS_S
+        for job_id in [j.id for j in self.jobs.values() if j.finalizado and j.concluido_em < limite]:
+            del self.jobs[job_id]
+
+    async def _navegador(self):
+        # Abre o Chromium só na primeira coleta (a API sobe mesmo sem navegador)
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await PoolNavegadores().__aenter__()
+            return self._pool
+
+    async def _coletar(self, rota):
+        # Jobs com a mesma (origem, destino, data, janela) dividem um único crawl (single-flight)
+        return await RouteService.buscar_alternativas_async(
+            rota["origem"], rota["destino"], rota["data_partida"].isoformat(), rota["janela_dias"],
+            pool=await self._navegador()
+        )
+
+    async def _worker(self):
+        while True:
+            job = await self._fila.get()
+            try:
+                await self._executar(job)
+            finally:
+                self._fila.task_done()
+
+    async def _executar(self, job: Job):
+        with perfilar(job.rota["perfilar"]), \
+                span("job.rota", trace_id=job.trace_id, origem=job.rota["origem"], destino=job.rota["destino"]):
+            status = await self._processar(job)
+        exportar_se_configurado(job.trace_id)
+        JOBS_FINALIZADOS.inc(status=status)
+
+        job.progresso = 1.0
+        job.concluido_em = time.time()
+        job.status = status
+
+    async def _processar(self, job: Job) -> str:
+        rota = job.rota
+        try:
+            job.status, job.etapa, job.progresso = EXECUTANDO, "Coletando voos", 0.1
+            alternativas = await self._coletar(rota)
+            job.alternativas = alternativas
+            job.etapa, job.progresso = "Otimizando", 0.7
+
+            if not alternativas:
+                resultado = OptimizationService.resultado_sem_alternativas(
+                    job.rota_idx, rota["perfil"], rota["tempo_max"], rota["orcamento"]
+                )
+            else:
+                # NSGA-II é CPU: fora do event loop; coletas repetidas reaproveitam a fronteira
+                chave = RouteService.chave_coleta(
+                    rota["origem"], rota["destino"], rota["data_partida"].isoformat(), rota["janela_dias"]
+                )
+                resultado = await asyncio.to_thread(
+                    OptimizationService.otimizar_rota,
+                    chave, alternativas, rota["perfil"], rota["tempo_max"], rota["orcamento"], job.rota_idx
+                )
+
+            job.resultado = resultado
+            status, job.etapa = CONCLUIDO, "Concluído"
+        except Exception as e:
+            print(f"[ERRO] Job {job.id}: {e}")
+            job.erro = str(e)
+            status, job.etapa = ERRO, "Falhou"
+
+        return status
+
+
+# =========================================================
+# APLICAÇÃO
+# =========================================================
+fila = FilaOtimizacao()
+metricas = MetricasLatencia()
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    # Cotações renovadas em segundo plano: a normalização de preços dos jobs
+    # encontra o câmbio em cache em vez de consultar a fonte no meio da coleta
+    from services.cambio_service import obter_provedor_cambio
+
+    provedor = obter_provedor_cambio()
+    provedor.iniciar_atualizacao([("USD", "BRL"), ("EUR", "BRL")])
+    await fila.iniciar()
+    try:
+        yield
+    finally:
+        await fila.parar()
+        provedor.parar_atualizacao()
+
+
+app = FastAPI(title="Otimização de Rotas", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def medir_latencia(request: Request, call_next):
+    inicio = time.perf_counter()
+    resposta = await call_next(request)
+    rota = request.scope.get("route")
+    endpoint = f"{request.method} {rota.path if rota is not None else 'desconhecido'}"
+    duracao = time.perf_counter() - inicio
+    metricas.registrar(endpoint, duracao)
+    DURACAO_API.observar(duracao, endpoint=endpoint)
+    REQUISICOES_API.inc(endpoint=endpoint, status=resposta.status_code)
+    return resposta
+
+
+def _obter_job(job_id) -> Job:
+    job = fila.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+def _status(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "etapa": job.etapa,
+        "progresso": job.progresso,
+        "erro": job.erro,
+        "n_alternativas": len(job.alternativas) if job.alternativas is not None else None,
+        "criado_em": job.criado_em,
+        "concluido_em": job.concluido_em,
+    }
+
+
+@app.post("/jobs", status_code=202)
+async def criar_job(requisicao: RotaRequisicao):
+    try:
+        job = fila.submeter(requisicao)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Fila cheia, tente novamente mais tarde")
+    return {**_status(job), "url_status": f"/jobs/{job.id}"}
+
+
+@app.get("/jobs/{job_id}")
+async def status_job(job_id: str):
+    return _status(_obter_job(job_id))
+
+
+@app.get("/jobs/{job_id}/resultado")
+async def resultado_job(job_id: str, pareto: bool = True):
+    job = _obter_job(job_id)
+    if job.status == ERRO:
+        raise HTTPException(status_code=500, detail=job.erro)
+    if job.status != CONCLUIDO:
+        raise HTTPException(status_code=409, detail=f"Job ainda em processamento ({job.etapa})")
+    if job.resultado is None:
+        return {"id": job.id, "resultado": None}
+    return {"id": job.id, "resultado": resultado_para_dict(job.resultado, incluir_pareto=pareto)}
+
+
+@app.get("/jobs/{job_id}/trace")
+async def trace_job(job_id: str, formato: Literal["chrome", "resumo"] = "chrome"):
+    """Spans do job: Chrome trace (chrome://tracing, Perfetto) ou tempo por etapa."""
+    job = _obter_job(job_id)
+    if formato == "resumo":
+        return resumo_trace(job.trace_id)
+    return exportar_chrome(job.trace_id)
+
+
+@app.get("/historico/{origem}/{destino}")
+async def historico_rota(origem: str, destino: str, inicio: date | None = None,
+                         dias: int = Query(30, ge=1, le=366), max_idade_s: float | None = None):
+    """
+    Menor preço conhecido por data de partida em [inicio, inicio + dias)
+    (padrão: próximos 30 dias), da última coleta de cada dia — sem crawl.
+    """
+    from services.historico_tarifas import obter_historico
+
+    inicio = inicio or date.today()
+    fim = inicio + timedelta(days=dias - 1)
+    por_dia = await asyncio.to_thread(
+        obter_historico().mais_barato_por_dia,
+        origem, destino, inicio.isoformat(), fim.isoformat(), max_idade_s,
+    )
+    return {"origem": origem.strip().upper(), "destino": destino.strip().upper(), "dias": por_dia}
+
+
+@app.get("/metricas")
+async def obter_metricas():
+    por_status = defaultdict(int)
+    for job in list(fila.jobs.values()):
+        por_status[job.status] += 1
+    return {
+        "endpoints": metricas.resumo(),
+        "fila": fila.tamanho_fila,
+        "jobs": dict(por_status),
+        "singleflight": estatisticas_singleflight(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metricas_prometheus():
+    FILA_API.definir(fila.tamanho_fila)
+    return PlainTextResponse(exportar_texto(), media_type=TIPO_CONTEUDO)
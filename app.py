@@ -3,10 +3,15 @@ import streamlit as st
 from ui.layout import setup_page, inject_css
 from ui.sidebar import init_session_state, render_sidebar
 from ui.route_form import render_rotas
-from ui.results_view import render_resultado_rota
+from ui.results_view import render_resultado_rota, render_itinerarios
+from ui.jobs_view import submeter_rotas, sincronizar_jobs, rota_em_processamento
 
-from services.route_service import RouteService
-from services.optimization_service import OptimizationService
+from services.hotel_service import HotelService
+from services.cambio_service import obter_provedor_cambio
+from infra.metricas import iniciar_exposicao_configurada
+
+# GET /metrics local para o Prometheus, se OTIMIZACAO_METRICAS_PORTA estiver definida
+iniciar_exposicao_configurada()
 
 setup_page()
 inject_css()
@@ -16,51 +21,26 @@ render_sidebar()
 placeholders = render_rotas()
 
 # ================= PROCESSAMENTO =================
-if st.session_state.processando:
-
-    for idx, rota in enumerate(st.session_state.rotas):
-
-        progresso = (idx) / len(st.session_state.rotas)
-        st.session_state.progress_text.text(f"Processando rota {idx + 1} de {len(st.session_state.rotas)} ({int(progresso*100)}%)")
-
-        alternativas = RouteService.buscar_alternativas(
-            rota["origem"],
-            rota["destino"],
-            rota["data_partida"].strftime("%Y-%m-%d")
-        )
-
-        if not alternativas:
-            resultado_vazio = OptimizationService.resultado_sem_alternativas(
-                rota_idx=idx + 1,
-                perfil=rota["perfil"],
-                tempo_max=rota["tempo_max"],
-                orcamento=rota["orcamento"]
-            )
-            st.session_state.resultados.append(resultado_vazio)
-            progesso = (idx + 1) / len(st.session_state.rotas)
-            st.session_state.progress_text.text(f"Processando rota {idx + 1} de {len(st.session_state.rotas)} ({int(progesso*100)}%)")
-            continue
+# Cada rota vira um job no pool compartilhado; o painel da sidebar acompanha
+# o progresso e dispara um rerun quando algum job termina.
+if st.session_state.processando and not st.session_state.jobs:
 
-        resultado = OptimizationService.otimizar(
-            alternativas,
-            rota["perfil"],
-            rota["tempo_max"],
-            rota["orcamento"],
-            idx + 1
-        )
-
-        if resultado:
-            st.session_state.resultados.append(resultado)
-
-        progresso = (idx + 1) / len(st.session_state.rotas)
-        st.session_state.progress_bar.progress(progresso)
-        st.session_state.progress_text.text(f"Processando rota {idx + 1} de {len(st.session_state.rotas)} ({int(progresso*100)}%)")
+    # Hotéis de todos os destinos carregam em segundo plano durante a coleta dos voos
+    HotelService.pre_carregar(st.session_state.rotas)
+    obter_provedor_cambio().iniciar_atualizacao([("USD", "BRL")])
 
+    submeter_rotas(st.session_state.rotas)
+    st.rerun()
 
-    st.session_state.processando = False
+if st.session_state.jobs and sincronizar_jobs():
     st.rerun()
 
 # ================= APRESENTA OS RESULTADOS =================
 for i, placeholder in enumerate(placeholders):
     with placeholder.container():
-        render_resultado_rota(i + 1)
+        if rota_em_processamento(i + 1):
+            st.info("⏳ Processando esta rota...")
+        else:
+            render_resultado_rota(i + 1)
+
+render_itinerarios()
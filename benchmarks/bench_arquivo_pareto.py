@@ -0,0 +1,177 @@
+"""
+Verificação e benchmark do ArquivoPareto.
+
+1. Confere, em lotes aleatórios com empates, que a fronteira mantida em
+   inserções incrementais (com e sem limites de orçamento/tempo/conexões)
+   é a mesma do filtro de força bruta sobre todos os pontos; sai com
+   código 1 se alguma divergir.
+2. Mede acrescentar um lote novo ao arquivo contra refazer o
+   preprocessar (duplicados + dominância) sobre tudo o que já foi coletado.
+3. Faz a ida e volta salvar/carregar com chaves Alternativa.
+4. Dispara jobs simultâneos da mesma coleta em OptimizationService.otimizar_rota
+   (como a coleta compartilhada entrega o mesmo conjunto a todos): nenhum
+   pode ver a fronteira ainda vazia e devolver "sem alternativas".
+
+Uso:
+    python -m benchmarks.bench_arquivo_pareto [N]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+import numpy as np
+
+from benchmarks.bench_memoria_alternativas import gerar_registros
+from domain.models import AlternativaSet
+from optimization.arquivo_pareto import ArquivoPareto
+from optimization.prefiltro import mascara_nao_dominados, preprocessar
+from services import optimization_service
+from services.optimization_service import OptimizationService
+
+
+def fronteira_bruta(objetivos, orcamento=np.inf, tempo_max=np.inf, max_conexoes=np.inf):
+    """Conjunto de tuplas (preco, tempo, conexoes) não dominadas dentro dos limites."""
+    unicos = np.unique(objetivos, axis=0)
+    dentro = (unicos[:, 0] <= orcamento) & (unicos[:, 1] <= tempo_max) & (unicos[:, 2] <= max_conexoes)
+    unicos = unicos[dentro]
+    return set(map(tuple, unicos[mascara_nao_dominados(unicos)].tolist()))
+
+
+def fronteira_arquivo(arquivo, **limites):
+    objetivos, _ = arquivo.snapshot(**limites)
+    return set(map(tuple, objetivos.tolist()))
+
+
+def verificar(tentativas=300, seed=7):
+    """Retorna quantas tentativas divergiram da força bruta."""
+    rnd = random.Random(seed)
+    falhas = 0
+    for t in range(tentativas):
+        n = rnd.randint(1, 400)
+        # Valores inteiros pequenos forçam empates em preço e tempo
+        objetivos = np.column_stack([
+            [rnd.randint(100, 140) for _ in range(n)],
+            [rnd.randint(1, 40) for _ in range(n)],
+            [rnd.randint(0, 3) for _ in range(n)],
+        ]).astype(np.float64)
+
+        arquivo = ArquivoPareto()
+        for lote in np.array_split(objetivos, rnd.randint(1, 5)):
+            arquivo.inserir_lote(lote)
+
+        limites = {
+            "orcamento": float(rnd.randint(100, 150)),
+            "tempo_max": float(rnd.randint(1, 45)),
+            "max_conexoes": rnd.randint(0, 3),
+        }
+        casos = (
+            (fronteira_arquivo(arquivo), fronteira_bruta(objetivos)),
+            (fronteira_arquivo(arquivo, **limites), fronteira_bruta(objetivos, *limites.values())),
+        )
+        for obtido, esperado in casos:
+            if obtido != esperado:
+                falhas += 1
+                print(f"divergência na tentativa {t}: {sorted(obtido ^ esperado)[:5]}")
+                break
+    return falhas
+
+
+def medir(funcao, repeticoes=5):
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+
+
+def benchmark(n):
+    conjunto = AlternativaSet.de_registros(gerar_registros(n))
+    objetivos = conjunto.objetivos()
+    novos = objetivos[-max(1, n // 20):]
+
+    arquivo = ArquivoPareto()
+    arquivo.inserir_lote(objetivos[:-len(novos)])
+    base = arquivo.para_dict()
+
+    t_recalculo = medir(lambda: preprocessar(conjunto))
+    t_incremental = medir(lambda: ArquivoPareto.de_dict(base).inserir_lote(novos)) - medir(
+        lambda: ArquivoPareto.de_dict(base)
+    )
+    print(f"{n:>8} | {len(novos):>6} | {t_recalculo * 1e3:>14.2f} | {max(t_incremental, 0) * 1e3:>15.2f}")
+
+
+def ida_e_volta(n=2_000):
+    """salvar/carregar com chaves Alternativa preserva a fronteira e as linhas."""
+    arquivo = ArquivoPareto()
+    arquivo.inserir_alternativas(AlternativaSet.de_registros(gerar_registros(n)))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "fronteira.json")
+        arquivo.salvar(caminho)
+        carregado = ArquivoPareto.carregar(caminho)
+
+    antes = [a.para_dict() for a in arquivo.alternativas()]
+    depois = [a.para_dict() for a in carregado.alternativas()]
+    return antes == depois
+
+
+def jobs_simultaneos(threads=4, rodadas=5, n=300):
+    """Retorna quantos jobs simultâneos da mesma coleta voltaram sem alternativa escolhida."""
+    conjunto = AlternativaSet.de_registros(gerar_registros(n))
+    falhas = 0
+
+    # Alarga a janela entre publicar a fronteira e os demais jobs a encontrarem
+    fronteiras = optimization_service._FRONTEIRAS
+    definir = fronteiras.definir
+
+    def definir_devagar(chave, valor):
+        definir(chave, valor)
+        time.sleep(0.05)
+
+    fronteiras.definir = definir_devagar
+    try:
+        for rodada in range(rodadas):
+            falhas += _rodada_simultanea(conjunto, ("GRU", "LIS", f"2099-01-{rodada + 1:02d}", 0), threads)
+    finally:
+        del fronteiras.definir
+    return falhas
+
+
+def _rodada_simultanea(conjunto, chave, threads):
+    barreira = threading.Barrier(threads)
+    resultados = [None] * threads
+
+    def job(i):
+        barreira.wait()
+        resultados[i] = OptimizationService.otimizar_rota(chave, conjunto, "Equilibrado", 40, 10_000, i + 1)
+
+    execucoes = [threading.Thread(target=job, args=(i,)) for i in range(threads)]
+    for t in execucoes:
+        t.start()
+    for t in execucoes:
+        t.join()
+    return sum(r is None or r.alternativa_escolhida is None for r in resultados)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+
+    falhas = verificar()
+    print(f"fronteira incremental x força bruta: {'ok' if not falhas else f'{falhas} divergências'}")
+    ok_arquivo = ida_e_volta()
+    print(f"salvar/carregar com chaves Alternativa: {'ok' if ok_arquivo else 'divergiu'}")
+    sem_resultado = jobs_simultaneos()
+    print(f"jobs simultâneos da mesma coleta: {'ok' if not sem_resultado else f'{sem_resultado} sem alternativa'}")
+    if falhas or not ok_arquivo or sem_resultado:
+        sys.exit(1)
+
+    print()
+    print(f"{'total':>8} | {'novos':>6} | {'recalcular (ms)':>14} | {'incremental (ms)':>15}")
+    print("-" * 54)
+    for tamanho in (500, 2_000, n):
+        benchmark(tamanho)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Tempo de inicialização do app, agrupado por subsistema. Roda um processo
+novo com `python -X importtime`, importa o que o app.py importa e soma o
+tempo próprio de cada módulo no subsistema a que pertence (código do
+projeto por pacote; dependências pelas "pilhas" que o app adia).
+
+Com --primeira-renderizacao também mede, em outro processo frio, a
+primeira execução completa do app.py (AppTest), que é o que o usuário
+espera até a primeira tela.
+
+Uso:
+    python -m benchmarks.bench_inicializacao
+    python -m benchmarks.bench_inicializacao --adiados --primeira-renderizacao
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# O que o app.py importa ao subir
+MODULOS_APP = (
+    "streamlit",
+    "ui.layout", "ui.sidebar", "ui.route_form", "ui.results_view", "ui.jobs_view",
+    "services.hotel_service", "services.cambio_service",
+)
+
+# Carregados só no primeiro uso (otimização, crawl, hotéis, Parquet, tabelas).
+# plotly fica de fora: o próprio `import streamlit` já o carrega na subida
+MODULOS_ADIADOS = (
+    "optimization.nsga2_solver", "optimization.itinerario",
+    "crawler.crawler_rome2rio", "crawler.hotels_serpapi", "crawler.cambio_serpapi",
+    "services.persistencia_service", "pandas",
+)
+
+PROJETO = ("ui", "services", "crawler", "optimization", "domain", "infra")
+
+# Pacote de topo → pilha de dependências
+PILHAS = {
+    "streamlit": "streamlit", "tornado": "streamlit", "starlette": "streamlit", "altair": "streamlit",
+    "plotly": "plotly", "_plotly_utils": "plotly", "narwhals": "plotly",
+    "pandas": "pandas", "pytz": "pandas", "dateutil": "pandas",
+    "pyarrow": "pyarrow",
+    "pymoo": "pymoo", "scipy": "pymoo", "autograd": "pymoo", "moocore": "pymoo",
+    "playwright": "playwright", "greenlet": "playwright", "pyee": "playwright",
+    "requests": "requests", "urllib3": "requests", "charset_normalizer": "requests",
+    "idna": "requests", "certifi": "requests", "dotenv": "requests",
+    "networkx": "networkx",
+    "numpy": "numpy",
+}
+
+_RE_LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def subsistema(modulo):
+    topo = modulo.split(".")[0]
+    if topo in PROJETO:
+        return f"projeto/{topo}"
+    return PILHAS.get(topo, "outros (stdlib e demais)")
+
+
+def medir_importacoes(modulos):
+    """[(modulo, proprio_us, acumulado_us, nivel)] de um processo novo."""
+    codigo = "; ".join(f"import {m}" for m in modulos)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    linhas = []
+    for linha in proc.stderr.splitlines():
+        m = _RE_LINHA.match(linha)
+        if m:
+            proprio, acumulado, recuo, modulo = m.groups()
+            linhas.append((modulo, int(proprio), int(acumulado), len(recuo) // 2))
+    return linhas
+
+
+def medir_primeira_renderizacao():
+    codigo = (
+        "import time; t = time.perf_counter()\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"AppTest.from_file({str(RAIZ / 'app.py')!r}, default_timeout=120).run()\n"
+        "print(time.perf_counter() - t)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def relatorio(titulo, linhas, top=10):
+    por_subsistema = defaultdict(lambda: [0, 0])
+    for modulo, proprio, _, _ in linhas:
+        soma = por_subsistema[subsistema(modulo)]
+        soma[0] += proprio
+        soma[1] += 1
+    total = sum(s[0] for s in por_subsistema.values())
+
+    print(f"\n{titulo}: {total / 1e3:,.1f} ms em {len(linhas)} módulos")
+    print(f"{'subsistema':<26} | {'ms':>8} | {'%':>5} | {'módulos':>7}")
+    print("-" * 56)
+    for nome, (proprio, n) in sorted(por_subsistema.items(), key=lambda kv: -kv[1][0]):
+        print(f"{nome:<26} | {proprio / 1e3:>8,.1f} | {100 * proprio / max(total, 1):>5.1f} | {n:>7}")
+
+    # Módulos do projeto: o acumulado mostra quem puxa as dependências pesadas
+    print(f"\n{'módulo do projeto (acumulado)':<40} | {'ms':>8}")
+    print("-" * 52)
+    projeto = [l for l in linhas if l[0].split(".")[0] in PROJETO]
+    for modulo, _, acumulado, _ in sorted(projeto, key=lambda l: -l[2])[:top]:
+        print(f"{modulo:<40} | {acumulado / 1e3:>8,.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adiados", action="store_true", help="mede também o que só carrega no primeiro uso")
+    parser.add_argument("--primeira-renderizacao", action="store_true", help="mede a primeira execução do app.py")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    relatorio("Inicialização do app", medir_importacoes(MODULOS_APP), args.top)
+
+    if args.adiados:
+        # No mesmo processo das importações do app: só o custo adicional do primeiro uso
+        linhas = medir_importacoes(MODULOS_APP + MODULOS_ADIADOS)
+        iniciais = {l[0] for l in medir_importacoes(MODULOS_APP)}
+        relatorio("Adiado para o primeiro uso", [l for l in linhas if l[0] not in iniciais], args.top)
+
+        # Um import local não adia nada se uma dependência do app já carregou o módulo
+        ja_carregados = [m for m in MODULOS_ADIADOS if m in iniciais]
+        if ja_carregados:
+            print(f"\n[AVISO] Já carregados na subida (não adiados): {', '.join(ja_carregados)}")
+
+    if args.primeira_renderizacao:
+        print(f"\nPrimeira renderização do app.py (processo frio): {medir_primeira_renderizacao():.2f} s")
+
+
+if __name__ == "__main__":
+    main()
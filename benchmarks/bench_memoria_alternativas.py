@@ -0,0 +1,93 @@
+"""
+Benchmark de memória: bytes por alternativa.
+
+Compara o modelo antigo (um dataclass com __dict__ por alternativa e um
+roteiro de dicts próprio) com o AlternativaSet colunar (roteiro em CSR
+com uma tabela de textos por conjunto).
+
+Uso:
+    python -m benchmarks.bench_memoria_alternativas [N]
+"""
+
+import gc
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import List
+
+from domain.models import AlternativaSet
+
+
+@dataclass
+class AlternativaLegado:
+    tempo: float
+    preco: float
+    conexoes: int
+    saida: str
+    chegada: str
+    tempo_total: str
+    roteiro: List[dict]
+    preco_str: str
+
+
+AEROPORTOS = ["GRU", "GIG", "LIS", "MAD", "CDG", "JFK", "MIA", "SCL", "EZE", "FRA"]
+CIAS = ["LATAM", "Azul", "GOL", "TAP", "Iberia", "Air France", "American"]
+
+
+def gerar_registros(n, seed=1):
+    """Registros no mesmo formato devolvido pelo crawler (textos novos a cada item)."""
+    rnd = random.Random(seed)
+    registros = []
+    for _ in range(n):
+        conexoes = rnd.randint(0, 2)
+        h, m = rnd.randint(5, 30), rnd.randint(0, 59)
+        roteiro = []
+        for ordem in range(conexoes + 1):
+            o, d = rnd.sample(AEROPORTOS, 2)
+            # "".join força um objeto str novo, como acontece no inner_text()
+            texto = "".join([rnd.choice(CIAS), "\n", o, " → ", d, "\n", f"{rnd.randint(1, 12)}h"])
+            roteiro.append({"etapa": texto, "ordem": ordem})
+        preco = rnd.randint(800, 9000)
+        registros.append({
+            "tempo": h + m / 60,
+            "preco": float(preco),
+            "conexoes": conexoes,
+            "saida": "".join([f"{rnd.randint(0, 23):02d}", ":", f"{rnd.choice((0, 15, 30, 45)):02d}"]),
+            "chegada": "".join([f"{rnd.randint(0, 23):02d}", ":", f"{rnd.choice((0, 15, 30, 45)):02d}"]),
+            "tempo_total": "".join([str(h), "h ", str(m), "min"]),
+            "roteiro": roteiro,
+            "preco_str": "".join(["R$ ", f"{preco:,}".replace(",", ".")]),
+        })
+    return registros
+
+
+def medir(construir, n):
+    """Memória que continua viva depois de montar o modelo (inclui textos e roteiros que ele retém)."""
+    gc.collect()
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    registros = gerar_registros(n)
+    objeto = construir(registros)
+    del registros
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] - antes
+    tracemalloc.stop()
+    del objeto
+    return total / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    legado = medir(lambda regs: [AlternativaLegado(**r) for r in regs], n)
+    colunar = medir(AlternativaSet.de_registros, n)
+
+    print(f"N = {n}")
+    print(f"Antes  (dataclass + roteiro de dicts): {legado:8.1f} bytes/alternativa")
+    print(f"Depois (AlternativaSet + roteiro interno): {colunar:8.1f} bytes/alternativa")
+    print(f"Redução: {100 * (1 - colunar / legado):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark dos parsers de tempo e preço: versão escalar (uma chamada por
+texto + np.array) contra a versão em lote (parse_tempos / parse_precos).
+
+Antes de medir, confere que o lote (que acima de algumas centenas de
+valores distintos usa o pyarrow) dá o mesmo resultado que o escalar em
+textos aleatórios com separadores variados, espaços e unidades repetidas;
+sai com código 1 se algum divergir.
+
+Uso:
+    python -m benchmarks.bench_parsers
+"""
+
+import random
+import sys
+import timeit
+
+import numpy as np
+
+from domain.parsers import parse_preco, parse_precos, parse_tempo, parse_tempos
+
+
+def gerar_colunas(n, seed=1):
+    rnd = random.Random(seed)
+    tempos = [f"{rnd.randint(1, 40)}h {rnd.randint(0, 59)}min" for _ in range(n)]
+    precos = [
+        rnd.choice(("R$ {:,}", "US$ {:,}.99", "€ {:,}")).format(rnd.randint(300, 15000)).replace(",", ".")
+        for _ in range(n)
+    ]
+    return tempos, precos
+
+
+def gerar_variados(n, seed=3):
+    """Textos com os casos difíceis: espaço/nbsp como milhar, grupos fora de 3 dígitos, unidades repetidas."""
+    rnd = random.Random(seed)
+
+    def grupo():
+        return str(rnd.randint(0, 999)).zfill(rnd.choice((1, 2, 3, 3, 3, 4)))
+
+    precos = ["R$ 12 50", "12 5", "1\xa0234,56", "€ 1.234.567,8", "12 345 678", "", "sem preço"]
+    for _ in range(n):
+        separadores = [rnd.choice((".", ",", " ", "\xa0")) for _ in range(rnd.randint(0, 3))]
+        numero = str(rnd.randint(1, 99)) + "".join(sep + grupo() for sep in separadores)
+        precos.append(rnd.choice(("R$ ", "US$ ", "€ ", "$", "C$ ", "")) + numero + rnd.choice(("", " €", " por pessoa")))
+
+    tempos = ["1h 10min 2h", "1d 2h 5min", "10min 5min", "3 h 2 min 1 h", ""]
+    for _ in range(n):
+        texto = f"{rnd.randint(0, 30)}h {rnd.randint(0, 59)}min"
+        tempos.append(texto + (f" {rnd.randint(1, 5)}h" if rnd.random() < 0.2 else ""))
+    return tempos, precos
+
+
+def verificar_equivalencia(n=5_000) -> int:
+    """Quantos textos o lote e o escalar convertem de forma diferente."""
+    tempos, precos = gerar_variados(n)
+    divergentes = 0
+    for nome, textos, escalar, lote in (
+        ("tempo", tempos, parse_tempo, parse_tempos),
+        ("preço", precos, parse_preco, parse_precos),
+    ):
+        esperado = np.array([escalar(t) for t in textos])
+        obtido = lote(textos)
+        diferentes = np.flatnonzero(~np.isclose(obtido, esperado, equal_nan=True))
+        for i in diferentes[:5]:
+            print(f"{nome}: {textos[i]!r} → lote {obtido[i]}, escalar {esperado[i]}")
+        divergentes += len(diferentes)
+    return divergentes
+
+
+def medir(funcao, repeticoes=5):
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes))
+
+
+def main():
+    divergentes = verificar_equivalencia()
+    print(f"lote x escalar: {'ok' if not divergentes else f'{divergentes} divergências'}")
+    if divergentes:
+        sys.exit(1)
+    print()
+
+    print(f"{'lote':>8} | {'coluna':<6} | {'escalar (itens/s)':>18} | {'lote (itens/s)':>15} | {'ganho':>6}")
+    print("-" * 66)
+    for n in (100, 1_000, 10_000, 100_000):
+        tempos, precos = gerar_colunas(n)
+        casos = (
+            ("tempo", lambda: np.array([parse_tempo(t) for t in tempos]), lambda: parse_tempos(tempos)),
+            ("preço", lambda: np.array([parse_preco(p) for p in precos]), lambda: parse_precos(precos)),
+        )
+        for nome, escalar, lote in casos:
+            t_escalar, t_lote = medir(escalar), medir(lote)
+            print(f"{n:>8} | {nome:<6} | {n / t_escalar:>18,.0f} | {n / t_lote:>15,.0f} | {t_escalar / t_lote:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from infra.metricas import contador, medidor
+
+# Páginas abertas ao mesmo tempo no navegador compartilhado
+MAX_PAGINAS_SIMULTANEAS = int(os.getenv("OTIMIZACAO_MAX_PAGINAS_NAVEGADOR", "4"))
+
+NAVEGADORES_INICIADOS = contador("crawler_navegadores_iniciados_total", "Chromium iniciados pelos pools")
+PAGINAS_ABERTAS = medidor("crawler_paginas_abertas", "Páginas abertas agora nos navegadores compartilhados")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+ARGS_CHROMIUM = [
+    "--disable-blink-features=AutomationControlled",
+    "--no-sandbox",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-dev-shm-usage",
+    "--window-size=1920,1080"
+]
+
+
+class PoolNavegadores:
+    """
+    Um único Chromium compartilhado por todas as buscas de uma coleta.
+
+    Cada página ganha um contexto próprio (cookies/estado isolados), que é
+    fechado ao sair de `pagina()`. Um semáforo limita quantas páginas ficam
+    abertas ao mesmo tempo, então várias datas e páginas de detalhe podem
+    ser disparadas com asyncio.gather sem estourar memória/CPU.
+
+        async with PoolNavegadores() as pool:
+            async with pool.pagina() as page:
+                await page.goto(url)
+    """
+
+    def __init__(self, max_paginas: int = MAX_PAGINAS_SIMULTANEAS):
+        self.max_paginas = max_paginas
+        self._semaforo = asyncio.Semaphore(max_paginas)
+        self._playwright = None
+        self._browser = None
+
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True, args=ARGS_CHROMIUM)
+        NAVEGADORES_INICIADOS.inc()
+        return self
+
+    async def __aexit__(self, *exc):
+        try:
+            await self._browser.close()
+        finally:
+            await self._playwright.stop()
+
+    @asynccontextmanager
+    async def pagina(self, largura=1920, altura=1080):
+        async with self._semaforo:
+            context = await self._browser.new_context(
+                viewport={"width": largura, "height": altura},
+                user_agent=USER_AGENT,
+                java_script_enabled=True
+            )
+            PAGINAS_ABERTAS.inc()
+            try:
+                yield await context.new_page()
+            finally:
+                PAGINAS_ABERTAS.dec()
+                await context.close()
@@ -1,27 +1,29 @@
 import os
-import requests
 from dotenv import load_dotenv
 
-load_dotenv()
+from crawler.serpapi import requisitar_serpapi
 
-SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+load_dotenv()
 
 def get_cambio_usd_brl_serpapi(api_key: str | None = None) -> float:
+    return get_cambio_serpapi("USD", "BRL", api_key=api_key)
+
+
+def get_cambio_serpapi(moeda_origem: str, moeda_destino: str, api_key: str | None = None) -> float:
     api_key = api_key or os.getenv("SERPAPI_API_KEY")
     if not api_key:
         raise ValueError("SERPAPI_API_KEY não encontrada")
 
+    par = f"{moeda_origem.upper()}-{moeda_destino.upper()}"
     params = {
         "engine": "google_finance",
-        "q": "USD-BRL",
+        "q": par,
         "api_key": api_key,
     }
 
-    r = requests.get(SERPAPI_ENDPOINT, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    data = requisitar_serpapi(params)
 
     try:
         return float(data["summary"]["price"])
     except (KeyError, TypeError, ValueError):
-        raise RuntimeError("Não foi possível extrair o câmbio USD/BRL")
+        raise RuntimeError(f"Não foi possível extrair o câmbio {par}")
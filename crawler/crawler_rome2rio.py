@@ -1,141 +1,179 @@
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+from playwright.async_api import TimeoutError as PlaywrightTimeout
 import asyncio
 from playwright.async_api import Page
+from crawler.browser_pool import PoolNavegadores
+from infra.metricas import contador, histograma
+from infra.tracing import rastrear, span
+
+DURACAO_PAGINA = histograma(
+    "crawler_pagina_segundos", "Tempo de uma página do Rome2Rio (carga, rolagem e extração)", ("tipo",)
+)
+CARDS_VOO = contador("crawler_cards_voo_total", "Cards de voo direto encontrados nas buscas")
+VOOS_EXTRAIDOS = contador("crawler_voos_extraidos_total", "Horários extraídos das páginas de detalhe")
+ERROS_CRAWLER = contador("crawler_erros_total", "Falhas tratadas (engolidas) no crawler, por etapa", ("etapa",))
+
+@rastrear("crawler.buscar_rotas")
+async def buscar_rotas(origem: str, destino: str, data_partida: str, pool: PoolNavegadores = None):
+    if pool is None:
+        async with PoolNavegadores() as pool:
+            return await buscar_rotas(origem, destino, data_partida, pool)
 
-async def buscar_rotas(origem: str, destino: str, data_partida: str):
     url = f"https://www.rome2rio.com/map/{origem}/{destino}?departureDate={data_partida}#r/Fly-{origem}-to-{destino}/s/2"
 
-    routes = []
+    cards_voo = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-
-        context = await browser.new_context(
-            viewport={"width": 1280, "height": 900},
-            user_agent=(
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            )
-        )
-
-        page = await context.new_page()
-        await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-
-        # ⏳ Espera o React hidratar cards principais
-        try:
-            await page.wait_for_selector(
-                'div[data-testid^="trip-search-result"]',
-                timeout=15000
-            )
-        except PlaywrightTimeout:
-            print("Nenhum resultado carregado.")
-            await browser.close()
-            return routes
-
-        # Executa o Clica nos "Show more" se existirem
-        while True:
-            buttons = page.locator("button")
-            count = await buttons.count()
-            found = False
-            for i in range(count):
-                btn = buttons.nth(i)
-                if not await btn.is_visible():
-                    continue
-                text = (await btn.inner_text()).lower()
-                if "show" in text and "more" in text:
-                    await btn.click()
-                    await page.wait_for_timeout(1500)
-                    found = True
-                    break
-            if not found:
-                break
-
-        # Executa o Scroll suave para lazy-load
-        previous_count = 0
-        while True:
-            cards = page.locator('div[data-testid^="trip-search-result"] a[href*="#r/"]')
-            current_count = await cards.count()
-            if current_count == previous_count:
-                break
-            previous_count = current_count
-            await page.evaluate("window.scrollBy(0, window.innerHeight)")
-            await page.wait_for_timeout(500)
-
-        # Realiza a Extração dos dados
-        count = await cards.count()
-        for i in range(count):
-            card = cards.nth(i)
-
-            # Ícones de transporte
-            icons = card.locator("svg")
-            icon_count = await icons.count()
-
-            transport_types = []
-            for j in range(icon_count):
-                svg = icons.nth(j)
-                class_attr = await svg.get_attribute("class")
-                if class_attr:
-                    if "plane" in class_attr:
-                        transport_types.append("plane")
-                    elif "bus" in class_attr:
-                        transport_types.append("bus")
-                    elif "train" in class_attr:
-                        transport_types.append("train")
-                    elif "car" in class_attr:
-                        transport_types.append("car")
-
-            # Filtro: carrega somente as opções relacionadas a voo
-            if not (len(transport_types) == 1 and transport_types[0] == "plane"):
-                continue  # ignora rota multimodal
-
-            link = await card.get_attribute("href")
-            title = await card.locator("h1").inner_text()
-            duration = await card.locator("time").inner_text()
-            price = await card.locator("span").inner_text()
-
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--no-sandbox",
-                    "--disable-gpu",
-                    "--disable-software-rasterizer",
-                    "--disable-dev-shm-usage",
-                    "--window-size=1920,1080"
-                ]
-            )
-
-            context = await browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                user_agent=(
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/120.0.0.0 Safari/537.36"
-                ),
-                java_script_enabled=True
-            )
-
-            page = await context.new_page()
-            await page.goto(f"https://www.rome2rio.com{link}", wait_until="domcontentloaded", timeout=60000)
-
-            detalhes = await extract_route_detail_from_link(page=page)
-
-            routes.append({
-                "titulo": title.strip(),
-                "duracao": duration.strip(),
-                "Preço entre": price,
-                "modal": "Voo",
-                "link": f"https://www.rome2rio.com{link}",
-                "detalhes": detalhes
-            })
-
-        await browser.close()
-    return routes
+    async with pool.pagina(1280, 900) as page:
+        with DURACAO_PAGINA.medir(tipo="busca"):
+            with span("crawler.carregar_pagina", origem=origem, destino=destino, data=data_partida):
+                await page.goto(url, wait_until="domcontentloaded", timeout=60000)
 
+                # ⏳ Espera o React hidratar cards principais
+                try:
+                    await page.wait_for_selector(
+                        'div[data-testid^="trip-search-result"]',
+                        timeout=15000
+                    )
+                except PlaywrightTimeout:
+                    ERROS_CRAWLER.inc(etapa="sem_resultados")
+                    print("Nenhum resultado carregado.")
+                    return []
+
+            # Executa o Clica nos "Show more" se existirem
+            with span("crawler.mostrar_mais"):
+                while True:
+                    buttons = page.locator("button")
+                    count = await buttons.count()
+                    found = False
+                    for i in range(count):
+                        btn = buttons.nth(i)
+                        if not await btn.is_visible():
+                            continue
+                        text = (await btn.inner_text()).lower()
+                        if "show" in text and "more" in text:
+                            await btn.click()
+                            await page.wait_for_timeout(1500)
+                            found = True
+                            break
+                    if not found:
+                        break
+
+            # Executa o Scroll suave para lazy-load
+            with span("crawler.rolagem"):
+                previous_count = 0
+                while True:
+                    cards = page.locator('div[data-testid^="trip-search-result"] a[href*="#r/"]')
+                    current_count = await cards.count()
+                    if current_count == previous_count:
+                        break
+                    previous_count = current_count
+                    await page.evaluate("window.scrollBy(0, window.innerHeight)")
+                    await page.wait_for_timeout(500)
+
+            # Realiza a Extração dos dados
+            with span("crawler.extrair_cards") as s_cards:
+                count = await cards.count()
+                for i in range(count):
+                    card = cards.nth(i)
+
+                    # Ícones de transporte
+                    icons = card.locator("svg")
+                    icon_count = await icons.count()
+
+                    transport_types = []
+                    for j in range(icon_count):
+                        svg = icons.nth(j)
+                        class_attr = await svg.get_attribute("class")
+                        if class_attr:
+                            if "plane" in class_attr:
+                                transport_types.append("plane")
+                            elif "bus" in class_attr:
+                                transport_types.append("bus")
+                            elif "train" in class_attr:
+                                transport_types.append("train")
+                            elif "car" in class_attr:
+                                transport_types.append("car")
+
+                    # Filtro: carrega somente as opções relacionadas a voo
+                    if not (len(transport_types) == 1 and transport_types[0] == "plane"):
+                        continue  # ignora rota multimodal
+
+                    link = await card.get_attribute("href")
+                    title = await card.locator("h1").inner_text()
+                    duration = await card.locator("time").inner_text()
+                    price = await card.locator("span").inner_text()
+                    cards_voo.append((link, title, duration, price))
+
+                s_cards.definir(cards=count, voos=len(cards_voo))
+                CARDS_VOO.inc(len(cards_voo))
+
+    # Páginas de detalhe em paralelo, no mesmo navegador (limitadas pelo pool);
+    # uma página que falhar descarta só o próprio card
+    detalhes = await asyncio.gather(*(
+        _detalhes_do_link(pool, f"https://www.rome2rio.com{link}")
+        for link, _, _, _ in cards_voo
+    ), return_exceptions=True)
+
+    rotas = []
+    for (link, title, duration, price), d in zip(cards_voo, detalhes):
+        if isinstance(d, BaseException):
+            if not isinstance(d, Exception):
+                raise d
+            ERROS_CRAWLER.inc(etapa="detalhe")
+            print(f"[ERRO] Falha no detalhe {link}: {d}")
+            continue
+        rotas.append({
+            "titulo": title.strip(),
+            "duracao": duration.strip(),
+            "Preço entre": price,
+            "modal": "Voo",
+            "link": f"https://www.rome2rio.com{link}",
+            "detalhes": d
+        })
+
+    # Todos os detalhes falharam: é falha da busca, não "sem voos"
+    if cards_voo and not rotas:
+        raise RuntimeError(f"Todas as {len(cards_voo)} páginas de detalhe falharam")
+    return rotas
+
+@rastrear("crawler.detalhe")
+async def _detalhes_do_link(pool: PoolNavegadores, url: str):
+    async with pool.pagina() as page:
+        with DURACAO_PAGINA.medir(tipo="detalhe"):
+            with span("crawler.carregar_detalhe"):
+                await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            return await extract_route_detail_from_link(page=page)
+
+async def buscar_rotas_janela(origem: str, destino: str, datas, pool: PoolNavegadores = None):
+    """
+    Busca várias datas de partida ao mesmo tempo com um único navegador.
+    Retorna {data: rotas}; uma data que falhar volta vazia sem derrubar as
+    demais. Se todas falharem, levanta a exceção: a coleta falhou e não pode
+    ser confundida com uma rota sem voos.
+    """
+    if pool is None:
+        async with PoolNavegadores() as pool:
+            return await buscar_rotas_janela(origem, destino, datas, pool)
+
+    resultados = await asyncio.gather(
+        *(buscar_rotas(origem, destino, data, pool) for data in datas),
+        return_exceptions=True
+    )
+
+    falhas = [r for r in resultados if isinstance(r, Exception)]
+    if falhas and len(falhas) == len(resultados):
+        ERROS_CRAWLER.inc(len(falhas), etapa="data")
+        raise RuntimeError(f"Falha na busca de todas as {len(falhas)} datas: {falhas[0]}") from falhas[0]
+
+    rotas_por_data = {}
+    for data, rotas in zip(datas, resultados):
+        if isinstance(rotas, Exception):
+            ERROS_CRAWLER.inc(etapa="data")
+            print(f"[ERRO] Falha na busca de {data}: {rotas}")
+            rotas = []
+        rotas_por_data[data] = rotas
+    return rotas_por_data
+
+@rastrear("crawler.extrair_detalhe")
 async def extract_route_detail_from_link(page: Page):
         """
         Coleta todos os schedules e roteiro de um card já aberto.
@@ -147,6 +185,7 @@ async def extract_route_detail_from_link(page: Page):
             
             schedules_locator = page.locator('li[data-testid="scheduleCell"]')
         except Exception as e:
+            ERROS_CRAWLER.inc(etapa="sem_voos")
             print(f"[ERRO] Nenhum voo encontrado: {e}")
             return resultados
 
@@ -217,7 +256,7 @@ async def extract_route_detail_from_link(page: Page):
                         if match:
                             connections = int(match.group(1))
                 except Exception:
-                    pass
+                    ERROS_CRAWLER.inc(etapa="duracao_conexoes")
 
 
                 if await details_button.count():
@@ -248,7 +287,9 @@ async def extract_route_detail_from_link(page: Page):
                     })
 
             except Exception as e:
+                ERROS_CRAWLER.inc(etapa="voo")
                 print(f"[ERRO] Falha no voo {i}: {e}")
                 continue
 
+        VOOS_EXTRAIDOS.inc(len(resultados))
         return resultados
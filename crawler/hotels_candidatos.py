@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+hotels_candidatos.py
+====================
+Lista completa de hotéis candidatos de uma busca, em formato colunar.
+
+Uma busca (destino, datas, hóspedes) é feita uma única vez na SerpApi; as
+mudanças de faixa de estrelas e o re-ranking do top-10 rodam localmente
+sobre estas colunas, sem nova chamada à API.
+
+Colunas (mesmo índice):
+- nomes / tokens: nome do hotel e property_token
+- overall (float32), reviews (int32), preco_noite (float64)
+- estrelas (int8): 0 quando desconhecida
+- estrelas_consultadas (bool): fallback via property_token já tentado
+
+As páginas da SerpApi (next_page_token) são anexadas conforme chegam;
+`proximo_token` guarda onde a paginação parou para retomá-la depois.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from typing import Any, Callable
+
+import numpy as np
+
+SEM_ESTRELA = 0
+
+
+class CandidatosHoteis:
+
+    __slots__ = (
+        "nomes", "tokens", "overall", "reviews", "preco_noite",
+        "estrelas", "estrelas_consultadas", "_ordem",
+        "paginas", "proximo_token", "overall_min_ultima_pagina", "lock",
+    )
+
+    def __init__(self, nomes, tokens, overall, reviews, preco_noite, estrelas):
+        self.nomes = list(nomes)
+        self.tokens = list(tokens)
+        self.overall = np.asarray(overall, dtype=np.float32)
+        self.reviews = np.asarray(reviews, dtype=np.int32)
+        self.preco_noite = np.asarray(preco_noite, dtype=np.float64)
+        self.estrelas = np.asarray(estrelas, dtype=np.int8)
+        self.estrelas_consultadas = np.zeros(len(self.nomes), dtype=bool)
+        self._ordem = None
+
+        self.paginas = 0
+        self.proximo_token: str | None = None
+        self.overall_min_ultima_pagina = float("inf")
+        # paginação e resolução de estrelas alteram as colunas no lugar
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.nomes)
+
+    @classmethod
+    def de_registros(cls, registros: list[dict[str, Any]]) -> "CandidatosHoteis":
+        """Monta as colunas a partir de dicts {name, stars, price_night, overall, reviews, property_token}."""
+        return cls(
+            nomes=[r["name"] for r in registros],
+            tokens=[r.get("property_token") for r in registros],
+            overall=[r["overall"] for r in registros],
+            reviews=[r["reviews"] for r in registros],
+            preco_noite=[r["price_night"] for r in registros],
+            estrelas=[r["stars"] or SEM_ESTRELA for r in registros],
+        )
+
+    @classmethod
+    def vazio(cls) -> "CandidatosHoteis":
+        return cls.de_registros([])
+
+    def anexar_pagina(self, registros: list[dict[str, Any]], proximo_token: str | None) -> range:
+        """Anexa uma página de resultados às colunas; retorna os índices novos."""
+        nova = CandidatosHoteis.de_registros(registros)
+        inicio = len(self)
+
+        self.nomes.extend(nova.nomes)
+        self.tokens.extend(nova.tokens)
+        self.overall = np.concatenate((self.overall, nova.overall))
+        self.reviews = np.concatenate((self.reviews, nova.reviews))
+        self.preco_noite = np.concatenate((self.preco_noite, nova.preco_noite))
+        self.estrelas = np.concatenate((self.estrelas, nova.estrelas))
+        self.estrelas_consultadas = np.concatenate((self.estrelas_consultadas, nova.estrelas_consultadas))
+        self._ordem = None
+
+        self.paginas += 1
+        self.proximo_token = proximo_token
+        # A busca é ordenada por avaliação (sort_by=8): nenhuma página seguinte
+        # deve trazer overall acima do menor overall desta.
+        self.overall_min_ultima_pagina = float(nova.overall.min()) if len(nova) else float("-inf")
+
+        return range(inicio, len(self))
+
+    def tem_mais_paginas(self) -> bool:
+        return self.paginas == 0 or self.proximo_token is not None
+
+    def chave_ranking(self, i: int) -> tuple[float, int, float]:
+        """Maior é melhor: overall, reviews e (preço negativo)."""
+        return float(self.overall[i]), int(self.reviews[i]), -float(self.preco_noite[i])
+
+    def heap_top(self, k: int, min_estrelas: int, max_estrelas: int, indices=None) -> list:
+        """
+        Min-heap limitado aos k melhores candidatos dentro da faixa de estrelas.
+        heap[0] é o k-ésimo colocado (o pior do top-k).
+        """
+        heap: list = []
+        self.empurrar_heap(heap, k, min_estrelas, max_estrelas, range(len(self)) if indices is None else indices)
+        return heap
+
+    def empurrar_heap(self, heap: list, k: int, min_estrelas: int, max_estrelas: int, indices) -> None:
+        mascara = self.mascara_estrelas(min_estrelas, max_estrelas)
+        for i in indices:
+            if not mascara[i]:
+                continue
+            item = (self.chave_ranking(i), i)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def top_definido(self, heap: list, k: int) -> bool:
+        """
+        True quando nenhuma página restante pode superar o k-ésimo atual:
+        o heap está cheio e o k-ésimo tem overall estritamente maior que o
+        menor overall da última página (empates ainda podem ganhar por reviews).
+        """
+        if not self.tem_mais_paginas():
+            return True
+        return len(heap) >= k and heap[0][0][0] > self.overall_min_ultima_pagina
+
+    def ordem_ranking(self) -> np.ndarray:
+        """
+        Índices ordenados pelos critérios de "melhores avaliados":
+        overall desc, reviews desc, preço asc (o total é preço * diárias,
+        então a ordem não depende da estadia).
+        """
+        if self._ordem is None:
+            self._ordem = np.lexsort((self.preco_noite, -self.reviews, -self.overall))
+        return self._ordem
+
+    def mascara_estrelas(self, min_estrelas: int, max_estrelas: int) -> np.ndarray:
+        """Hotéis sem estrela conhecida são mantidos (filtro flexível)."""
+        e = self.estrelas
+        return (e == SEM_ESTRELA) | ((e >= int(min_estrelas)) & (e <= int(max_estrelas)))
+
+    def selecionar_top(
+        self,
+        k: int,
+        min_estrelas: int,
+        max_estrelas: int,
+        resolver_estrelas: Callable[[list[str]], list[int | None]] | None = None,
+    ) -> np.ndarray:
+        """
+        Retorna os índices do top-k dentro da faixa de estrelas.
+
+        Se `resolver_estrelas` for informado, as estrelas desconhecidas dos
+        selecionados são consultadas em lote (uma única vez por hotel) e a
+        seleção é refeita até estabilizar.
+        """
+        ordem = self.ordem_ranking()
+
+        while True:
+            sel = ordem[self.mascara_estrelas(min_estrelas, max_estrelas)[ordem]][:k]
+
+            if resolver_estrelas is None:
+                return sel
+
+            pendentes = [
+                i for i in sel
+                if self.estrelas[i] == SEM_ESTRELA
+                and not self.estrelas_consultadas[i]
+                and self.tokens[i]
+            ]
+            if not pendentes:
+                return sel
+
+            self.estrelas_consultadas[pendentes] = True
+            resolvidas = resolver_estrelas([self.tokens[i] for i in pendentes])
+            for i, estrela in zip(pendentes, resolvidas):
+                # se falhar (None), mantém desconhecida
+                self.estrelas[i] = estrela or SEM_ESTRELA
+
+    def estrelas_ou_none(self, indices) -> list[int | None]:
+        return [int(self.estrelas[i]) if self.estrelas[i] != SEM_ESTRELA else None for i in indices]
@@ -15,6 +15,13 @@ Bônus:
 - tenta resolver estrelas via regex em campos textuais
 - opcional: fallback via chamada de detalhes usando property_token
 
+Cache:
+- a lista completa de candidatos fica em memória (colunar) por busca; trocar a
+  faixa de estrelas apenas re-filtra/re-ordena localmente
+- buscas ficam em cache por (destino, check-in, check-out, adultos, moeda, hl, gl)
+  com TTL curto; estrelas via property_token ficam com TTL longo
+- memória (LRU) + disco (SQLite); ver `estatisticas_cache_hoteis()`
+
 Requisitos:
 - requests
 - variável de ambiente SERPAPI_API_KEY
@@ -24,12 +31,33 @@ from __future__ import annotations
 
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any
 
-import requests
+from crawler.hotels_candidatos import CandidatosHoteis
+from crawler.serpapi import ERROS_HOTEIS, requisitar_serpapi
+from infra.cache_ttl import CacheTTL, caminho_cache
+from infra.profiling import perfilado
+
+TTL_BUSCA_S = int(os.getenv("OTIMIZACAO_TTL_BUSCA_HOTEIS_S", 30 * 60))
+TTL_ESTRELAS_S = int(os.getenv("OTIMIZACAO_TTL_ESTRELAS_S", 30 * 24 * 3600))
+MAX_PAGINAS = int(os.getenv("OTIMIZACAO_MAX_PAGINAS_HOTEIS", 5))
+
+# Consultas paralelas de estrelas e pré-busca de páginas
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="serpapi")
 
-SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+_CACHE_BUSCA = CacheTTL(
+    "hoteis_busca", ttl_s=TTL_BUSCA_S, max_itens=128,
+    arquivo=caminho_cache("serpapi.sqlite"),
+)
+
+# Só em memória: guarda objetos CandidatosHoteis (colunas NumPy)
+_CACHE_CANDIDATOS = CacheTTL("hoteis_candidatos", ttl_s=TTL_BUSCA_S, max_itens=64)
+_CACHE_ESTRELAS = CacheTTL(
+    "hoteis_estrelas", ttl_s=TTL_ESTRELAS_S, max_itens=4096,
+    arquivo=caminho_cache("serpapi.sqlite"),
+)
 
 
 # -----------------------------
@@ -143,20 +171,26 @@ def _parse_star_rating(hotel: dict) -> int | None:
 def _fetch_star_from_property_token(property_token: str, api_key: str) -> int | None:
     """
     Busca detalhes do hotel via property_token para tentar obter estrelas.
-    (Isso faz uma chamada extra na SerpApi por hotel — usar com parcimônia.)
+    (Isso faz uma chamada extra na SerpApi por hotel — o resultado fica em
+    cache por property_token com TTL longo, já que estrelas quase não mudam.)
     """
     if not property_token:
         return None
 
+    return _CACHE_ESTRELAS.obter_ou_calcular(
+        property_token,
+        lambda: _consultar_estrelas(property_token, api_key),
+    )
+
+
+def _consultar_estrelas(property_token: str, api_key: str) -> int | None:
     params = {
         "engine": "google_hotels",
         "property_token": property_token,
         "api_key": api_key,
     }
 
-    r = requests.get(SERPAPI_ENDPOINT, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    data = requisitar_serpapi(params)
 
     # Dependendo da resposta, os detalhes podem aparecer em chaves diferentes.
     # Tentamos algumas prováveis.
@@ -172,6 +206,7 @@ def _fetch_star_from_property_token(property_token: str, api_key: str) -> int |
 # -----------------------------
 # Função principal
 # -----------------------------
+@perfilado("hoteis.get_top10")
 def get_top10_best_rated_total_stars_names(
     destino: str,
     data_entrada: str,
@@ -184,6 +219,8 @@ def get_top10_best_rated_total_stars_names(
     gl: str = "us",
     api_key: str | None = None,
     fetch_missing_stars: bool = True,   # <- ativa fallback via property_token
+    max_paginas: int = MAX_PAGINAS,
+    prefetch_paginas: bool = False,
 ) -> tuple[list[float], list[int | None], list[str]]:
     """
     Retorna 3 vetores alinhados (mesmo índice):
@@ -200,6 +237,11 @@ def get_top10_best_rated_total_stars_names(
       - Se estrelas vierem (int), aplica [min, max]
       - Se vier None, mantém o hotel (flexível)
         (se você quiser EXCLUIR None, eu te digo onde mudar)
+
+    Paginação:
+      - lê páginas seguintes (next_page_token) só enquanto o top-10 pode mudar,
+        até `max_paginas`; `prefetch_paginas` sobrepõe a busca da próxima página
+        ao processamento da atual (pode gastar uma chamada a mais)
     """
     api_key = api_key or os.getenv("SERPAPI_API_KEY")
     if not api_key:
@@ -227,106 +269,155 @@ def get_top10_best_rated_total_stars_names(
         "api_key": api_key,
     }
 
-    r = requests.get(SERPAPI_ENDPOINT, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    chave_busca = (
+        destino.strip(), dt_in.isoformat(), dt_out.isoformat(),
+        int(num_hospedes), currency, hl, gl,
+    )
+
+    # Candidatos colunares por chave de busca: mudar a faixa de estrelas
+    # reaproveita a lista em memória; só datas/hóspedes voltam à API.
+    candidatos = _CACHE_CANDIDATOS.obter_ou_calcular(chave_busca, CandidatosHoteis.vazio)
+
+    resolver = None
+    if fetch_missing_stars:
+        # Fallback: tentar buscar estrelas via property_token para os que ficaram None
+        resolver = lambda tokens: _resolver_estrelas(tokens, api_key)
+
+    with candidatos.lock:
+        while True:
+            _paginar_ate_top_definido(
+                candidatos, chave_busca, params, 10, min_estrelas, max_estrelas,
+                max_paginas=max_paginas, prefetch=prefetch_paginas,
+            )
+            top_final = candidatos.selecionar_top(10, min_estrelas, max_estrelas, resolver)
+
+            # Estrelas resolvidas podem tirar hotéis da faixa: busca mais páginas
+            if len(top_final) >= 10 or not _pode_paginar(candidatos, max_paginas):
+                break
+
+        totais_usd = (candidatos.preco_noite[top_final] * int(dias_estadia)).tolist()
+        estrelas_out = candidatos.estrelas_ou_none(top_final)
+        nomes_out = [candidatos.nomes[i] for i in top_final]
+
+    return totais_usd, estrelas_out, nomes_out
+
+
+# -----------------------------
+# Paginação (next_page_token)
+# -----------------------------
+def _pode_paginar(candidatos: CandidatosHoteis, max_paginas: int) -> bool:
+    return candidatos.tem_mais_paginas() and candidatos.paginas < max_paginas
+
+
+def _buscar_pagina(chave_busca: tuple, params: dict, page_token: str | None) -> tuple[list[dict], str | None]:
+    """Uma página da busca (em cache); retorna (registros, próximo token)."""
+    if page_token is None:
+        chave, params_pagina = chave_busca, params
+    else:
+        chave, params_pagina = chave_busca + (page_token,), {**params, "next_page_token": page_token}
+
+    data = _CACHE_BUSCA.obter_ou_calcular(chave, lambda: requisitar_serpapi(params_pagina))
 
     properties = data.get("properties") or data.get("hotels") or []
     if not isinstance(properties, list):
         properties = []
 
-    candidatos: list[dict[str, Any]] = []
+    registros = [r for r in map(_extrair_candidato, properties) if r is not None]
+    proximo = (data.get("serpapi_pagination") or {}).get("next_page_token")
+    return registros, proximo
+
+
+def _paginar_ate_top_definido(
+    candidatos: CandidatosHoteis,
+    chave_busca: tuple,
+    params: dict,
+    k: int,
+    min_estrelas: int,
+    max_estrelas: int,
+    max_paginas: int = MAX_PAGINAS,
+    prefetch: bool = False,
+) -> None:
+    """
+    Consome páginas enquanto o top-k ainda pode mudar.
 
-    for h in properties:
-        if not isinstance(h, dict):
-            continue
+    Mantém um heap limitado com os k melhores dentro da faixa de estrelas e
+    para assim que nenhuma página restante pode superar o k-ésimo colocado
+    (a busca vem ordenada por avaliação). Com `prefetch`, a página seguinte
+    é pedida em paralelo enquanto a atual é processada — os tokens são
+    encadeados, então não há como buscar páginas mais adiante antes disso.
+    """
+    heap = candidatos.heap_top(k, min_estrelas, max_estrelas)
+    token_prefetch, futura = None, None
 
-        nome = (h.get("name") or h.get("title") or "").strip()
-        if not nome:
-            continue
+    while _pode_paginar(candidatos, max_paginas) and not candidatos.top_definido(heap, k):
+        token = candidatos.proximo_token
+        if futura is not None and token_prefetch == token:
+            registros, proximo = futura.result()
+        else:
+            registros, proximo = _buscar_pagina(chave_busca, params, token)
+        token_prefetch, futura = None, None
 
-        estrelas = _parse_star_rating(h)
+        if prefetch and proximo and candidatos.paginas + 1 < max_paginas:
+            token_prefetch = proximo
+            futura = _EXECUTOR.submit(_buscar_pagina, chave_busca, params, proximo)
 
-        # rating e reviews
-        overall = h.get("overall_rating") or h.get("rating") or 0
-        reviews = h.get("reviews") or h.get("reviews_count") or 0
+        novos = candidatos.anexar_pagina(registros, proximo)
+        candidatos.empurrar_heap(heap, k, min_estrelas, max_estrelas, novos)
 
-        try:
-            overall_f = float(overall)
-        except Exception:
-            overall_f = 0.0
 
+def _resolver_estrelas(tokens: list[str], api_key: str) -> list[int | None]:
+    """Consulta as estrelas de vários hotéis em paralelo (None em caso de falha)."""
+    def _uma(token):
         try:
-            reviews_i = int(reviews)
+            return _fetch_star_from_property_token(token, api_key)
         except Exception:
-            reviews_i = 0
+            ERROS_HOTEIS.inc(etapa="estrelas")
+            return None
 
-        price_night = _extract_price_per_night(h)
-        if price_night is None:
-            continue
+    return list(_EXECUTOR.map(_uma, tokens))
 
-        total = float(price_night) * int(dias_estadia)
 
-        candidatos.append({
-            "name": nome,
-            "stars": estrelas,
-            "total": total,
-            "overall": overall_f,
-            "reviews": reviews_i,
-            "property_token": h.get("property_token") or h.get("propertyToken") or None,
-            "raw": h,
-        })
+def _extrair_candidato(h: Any) -> dict[str, Any] | None:
+    if not isinstance(h, dict):
+        return None
 
-    # Ordena pelos critérios definidos
-    candidatos.sort(key=lambda x: (-x["overall"], -x["reviews"], x["total"]))
-    top10 = candidatos[:10]
+    nome = (h.get("name") or h.get("title") or "").strip()
+    if not nome:
+        return None
 
-    # Fallback: tentar buscar estrelas via property_token para os que ficaram None
-    if fetch_missing_stars:
-        for item in top10:
-            if item["stars"] is None and item.get("property_token"):
-                try:
-                    item["stars"] = _fetch_star_from_property_token(item["property_token"], api_key)
-                except Exception:
-                    # se falhar, mantém None
-                    pass
-
-    # Agora aplica filtro de estrelas (somente quando existe estrela)
-    filtrados = []
-    for item in top10:
-        s = item["stars"]
-        if s is not None:
-            if s < int(min_estrelas) or s > int(max_estrelas):
-                continue
-        filtrados.append(item)
-
-    # Se após filtrar ficou menos de 10, tenta completar com próximos da lista
-    if len(filtrados) < 10:
-        for item in candidatos[10:]:
-            if len(filtrados) >= 10:
-                break
-            s = item["stars"]
-            if s is not None:
-                if s < int(min_estrelas) or s > int(max_estrelas):
-                    continue
-            filtrados.append(item)
-
-        # e tenta preencher estrelas via token também nos novos
-        if fetch_missing_stars:
-            for item in filtrados:
-                if item["stars"] is None and item.get("property_token"):
-                    try:
-                        item["stars"] = _fetch_star_from_property_token(item["property_token"], api_key)
-                    except Exception:
-                        pass
-
-    top_final = filtrados[:10]
-
-    totais_usd = [float(x["total"]) for x in top_final]
-    estrelas_out = [x["stars"] for x in top_final]
-    nomes_out = [x["name"] for x in top_final]
+    estrelas = _parse_star_rating(h)
 
-    return totais_usd, estrelas_out, nomes_out
+    # rating e reviews
+    overall = h.get("overall_rating") or h.get("rating") or 0
+    reviews = h.get("reviews") or h.get("reviews_count") or 0
+
+    try:
+        overall_f = float(overall)
+    except Exception:
+        overall_f = 0.0
+
+    try:
+        reviews_i = int(reviews)
+    except Exception:
+        reviews_i = 0
+
+    price_night = _extract_price_per_night(h)
+    if price_night is None:
+        return None
+
+    return {
+        "name": nome,
+        "stars": estrelas,
+        "price_night": float(price_night),
+        "overall": overall_f,
+        "reviews": reviews_i,
+        "property_token": h.get("property_token") or h.get("propertyToken") or None,
+    }
+
+
+def estatisticas_cache_hoteis() -> list[dict[str, Any]]:
+    """Taxa de acerto dos caches de busca e de estrelas."""
+    return [_CACHE_BUSCA.estatisticas(), _CACHE_ESTRELAS.estatisticas()]
 
 
 # ---------------------------------------------------------
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+serpapi.py
+==========
+Requisição à SerpApi compartilhada pelos crawlers de hotéis e de câmbio,
+com as métricas declaradas uma única vez:
+
+- serpapi_chamadas_total{engine, resultado}
+- serpapi_requisicao_segundos{engine}
+- hoteis_erros_total{etapa} (falhas tratadas na busca de hotéis, da
+  SerpApi ao HotelService)
+
+Leve de importar: o `requests` só carrega na primeira requisição.
+"""
+
+from infra.metricas import contador, histograma
+
+SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+
+CHAMADAS_SERPAPI = contador("serpapi_chamadas_total", "Requisições à SerpApi", ("engine", "resultado"))
+DURACAO_SERPAPI = histograma("serpapi_requisicao_segundos", "Duração das requisições à SerpApi", ("engine",))
+ERROS_HOTEIS = contador("hoteis_erros_total", "Falhas tratadas na busca de hotéis, por etapa", ("etapa",))
+
+
+def requisitar_serpapi(params: dict) -> dict:
+    """GET no endpoint da SerpApi; devolve o JSON e conta chamada e duração por engine."""
+    import requests
+
+    engine = params.get("engine", "")
+    try:
+        with DURACAO_SERPAPI.medir(engine=engine):
+            r = requests.get(SERPAPI_ENDPOINT, params=params, timeout=30)
+            r.raise_for_status()
+    except requests.RequestException:
+        CHAMADAS_SERPAPI.inc(engine=engine, resultado="erro")
+        raise
+    CHAMADAS_SERPAPI.inc(engine=engine, resultado="ok")
+    return r.json()
@@ -1,38 +1,361 @@
+import hashlib
+import sys
 from dataclasses import dataclass
 from typing import List, Optional
 
-@dataclass
+import numpy as np
+
+from domain.parsers import MOEDAS
+
+
+def _coluna(valores, dtype):
+    """Array contíguo e somente leitura (as views entregues ao solver/gráfico não copiam)."""
+    arr = np.ascontiguousarray(np.asarray(valores, dtype=dtype))
+    arr.flags.writeable = False
+    return arr
+
+
+def _coluna_objetos(valores):
+    valores = list(valores)
+    arr = np.empty(len(valores), dtype=object)
+    # Strings repetidas ("10:30", "R$ 1.234") passam a apontar para o mesmo objeto
+    for i, v in enumerate(valores):
+        arr[i] = sys.intern(v) if type(v) is str else v
+    arr.flags.writeable = False
+    return arr
+
+
+def _codificar_roteiros(roteiros):
+    """Lista de roteiros (listas de {"etapa", "ordem"}) → (ids int32, offsets int64, textos)."""
+    ids, offsets, por_texto = [], [0], {}
+    for roteiro in roteiros:
+        for etapa in sorted(roteiro or [], key=lambda e: e.get("ordem", 0)):
+            ids.append(por_texto.setdefault(etapa.get("etapa", ""), len(por_texto)))
+        offsets.append(len(ids))
+    return ids, offsets, list(por_texto)
+
+
+def _unicos(textos):
+    """Textos distintos (na ordem em que aparecem) e o índice de cada entrada neles."""
+    por_texto = {}
+    inversa = np.fromiter((por_texto.setdefault(t, len(por_texto)) for t in textos), dtype=np.int32, count=len(textos))
+    return list(por_texto), inversa
+
+
+def _somente_leitura(cls):
+    """Impede reatribuição de atributos depois do __init__ (modelos imutáveis)."""
+    def __setattr__(self, nome, valor):
+        raise AttributeError(f"{cls.__name__} é imutável")
+
+    def __delattr__(self, nome):
+        raise AttributeError(f"{cls.__name__} é imutável")
+
+    cls.__setattr__ = __setattr__
+    cls.__delattr__ = __delattr__
+    return cls
+
+
+@_somente_leitura
+class AlternativaSet:
+    """
+    Conjunto imutável de alternativas de voo em formato colunar.
+
+    Colunas numéricas contíguas (tempo/preco em float64, conexoes em int32)
+    são usadas diretamente pelo solver e pelo gráfico, sem conversões.
+    Os textos (saída, chegada, tempo_total, preco_str) ficam em arrays
+    auxiliares de objetos, alinhados pelo mesmo índice. `preco` está sempre
+    em BRL; `moeda` (uint8, índice em MOEDAS) guarda a moeda original e
+    `data_partida` (texto ISO) a data buscada de cada voo. Os roteiros ficam
+    em formato CSR: `roteiro_ids` (índices em `roteiro_textos`, os textos de
+    etapa distintos do conjunto) e `roteiro_offsets`, onde as etapas da
+    alternativa i são roteiro_ids[roteiro_offsets[i]:roteiro_offsets[i + 1]].
+    A tabela de textos é do conjunto (subconjuntos a compartilham), então
+    ela é liberada junto com ele em processos de longa duração.
+    """
+
+    __slots__ = (
+        "tempo", "preco", "conexoes",
+        "saida", "chegada", "tempo_total", "preco_str", "moeda", "data_partida",
+        "roteiro_ids", "roteiro_offsets", "roteiro_textos", "_assinatura",
+    )
+
+    # Colunas com uma entrada por alternativa
+    _COLUNAS = (
+        "tempo", "preco", "conexoes", "saida", "chegada", "tempo_total", "preco_str", "moeda", "data_partida",
+    )
+
+    def __init__(self, tempo, preco, conexoes, saida, chegada, tempo_total, preco_str,
+                 roteiro=None, roteiro_ids=None, roteiro_offsets=None, roteiro_textos=None,
+                 moeda=None, data_partida=None):
+        definir = object.__setattr__
+        definir(self, "tempo", _coluna(tempo, np.float64))
+        definir(self, "preco", _coluna(preco, np.float64))
+        definir(self, "conexoes", _coluna(conexoes, np.int32))
+        definir(self, "saida", _coluna_objetos(saida))
+        definir(self, "chegada", _coluna_objetos(chegada))
+        definir(self, "tempo_total", _coluna_objetos(tempo_total))
+        definir(self, "preco_str", _coluna_objetos(preco_str))
+        definir(self, "moeda", _coluna(np.zeros(len(self.tempo)) if moeda is None else moeda, np.uint8))
+        definir(self, "data_partida", _coluna_objetos(
+            [None] * len(self.tempo) if data_partida is None else data_partida
+        ))
+
+        if roteiro_offsets is None:
+            roteiro_ids, roteiro_offsets, roteiro_textos = _codificar_roteiros(
+                roteiro if roteiro is not None else [[] for _ in range(len(self.tempo))]
+            )
+        definir(self, "roteiro_ids", _coluna(roteiro_ids, np.int32))
+        definir(self, "roteiro_offsets", _coluna(roteiro_offsets, np.int64))
+        # Já é um array do conjunto de origem (subconjuntos): reaproveita sem copiar
+        if not (isinstance(roteiro_textos, np.ndarray) and not roteiro_textos.flags.writeable):
+            roteiro_textos = _coluna_objetos(roteiro_textos if roteiro_textos is not None else [])
+        definir(self, "roteiro_textos", roteiro_textos)
+        definir(self, "_assinatura", None)
+
+    @classmethod
+    def vazio(cls):
+        return cls([], [], [], [], [], [], [], roteiro=[])
+
+    @classmethod
+    def de_registros(cls, registros):
+        """Monta o conjunto a partir de dicts com os campos de Alternativa."""
+        return cls(
+            tempo=[r["tempo"] for r in registros],
+            preco=[r["preco"] for r in registros],
+            conexoes=[r["conexoes"] for r in registros],
+            saida=[r["saida"] for r in registros],
+            chegada=[r["chegada"] for r in registros],
+            tempo_total=[r["tempo_total"] for r in registros],
+            preco_str=[r["preco_str"] for r in registros],
+            roteiro=[r["roteiro"] for r in registros],
+            data_partida=[r.get("data_partida") for r in registros],
+            # para_dict grava o código da moeda ("USD"); registros sem ela são BRL
+            moeda=[MOEDAS.index(r.get("moeda") or MOEDAS[0]) for r in registros],
+        )
+
+    @classmethod
+    def concatenar(cls, conjuntos):
+        conjuntos = [c for c in conjuntos if len(c)]
+        if not conjuntos:
+            return cls.vazio()
+
+        colunas = {
+            campo: np.concatenate([getattr(c, campo) for c in conjuntos])
+            for campo in cls._COLUNAS
+        }
+
+        # Desloca os offsets de cada conjunto pelo total de etapas anteriores
+        # e os ids pelo total de textos anteriores
+        offsets = [np.zeros(1, dtype=np.int64)]
+        ids, base, base_textos = [], 0, 0
+        for c in conjuntos:
+            offsets.append(c.roteiro_offsets[1:] + base)
+            ids.append(c.roteiro_ids + base_textos)
+            base += int(c.roteiro_offsets[-1])
+            base_textos += len(c.roteiro_textos)
+
+        # Uma etapa presente em vários conjuntos fica uma vez só na tabela unida
+        textos, inversa = _unicos(np.concatenate([c.roteiro_textos for c in conjuntos]))
+
+        return cls(
+            **colunas,
+            roteiro_ids=inversa[np.concatenate(ids)],
+            roteiro_offsets=np.concatenate(offsets),
+            roteiro_textos=textos,
+        )
+
+    def __reduce__(self):
+        # __setattr__ bloqueado: reconstrói pelo __init__. Leva só os textos
+        # usados (um subconjunto compartilha a tabela inteira do original)
+        unicos, inversa = np.unique(self.roteiro_ids, return_inverse=True)
+        colunas = {campo: getattr(self, campo) for campo in self._COLUNAS}
+        return _restaurar_alternativas, (
+            colunas, self.roteiro_textos[unicos].tolist(), inversa.astype(np.int32), self.roteiro_offsets
+        )
+
+    def assinatura(self) -> str:
+        """
+        Hash de todo o conteúdo (objetivos, moeda, datas, horários, textos e
+        roteiros): duas coletas com a mesma assinatura têm exatamente as
+        mesmas alternativas. Calculada uma vez por conjunto (é imutável).
+        """
+        if self._assinatura is not None:
+            return self._assinatura
+
+        h = hashlib.blake2b(digest_size=16)
+        for coluna in (self.tempo, self.preco, self.conexoes, self.moeda, self.roteiro_offsets):
+            h.update(coluna.tobytes())
+        textos_roteiro = self.roteiro_textos[self.roteiro_ids]
+        for textos in (self.data_partida, self.saida, self.chegada, self.tempo_total, self.preco_str, textos_roteiro):
+            h.update("\x1f".join(map(str, textos)).encode("utf-8"))
+            h.update(b"\x1e")
+        object.__setattr__(self, "_assinatura", h.hexdigest())
+        return self._assinatura
+
+    def __len__(self):
+        return len(self.tempo)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Alternativa(self, i)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            i = int(item)
+            if i < 0:
+                i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError(item)
+            return Alternativa(self, i)
+        return self.selecionar(item)
+
+    def selecionar(self, indices):
+        """Subconjunto pelos índices/máscara/fatia informados."""
+        idx = np.arange(len(self))[indices]
+        colunas = {campo: getattr(self, campo)[idx] for campo in self._COLUNAS}
+
+        # Reúne as etapas das alternativas selecionadas sem laço em Python
+        inicios = self.roteiro_offsets[:-1][idx]
+        tamanhos = self.roteiro_offsets[1:][idx] - inicios
+        offsets = np.concatenate(([0], np.cumsum(tamanhos)))
+        posicoes = np.arange(offsets[-1]) - np.repeat(offsets[:-1], tamanhos) + np.repeat(inicios, tamanhos)
+
+        return AlternativaSet(
+            **colunas,
+            roteiro_ids=self.roteiro_ids[posicoes],
+            roteiro_offsets=offsets,
+            roteiro_textos=self.roteiro_textos,
+        )
+
+    def roteiro_de(self, i):
+        """Roteiro da alternativa i no formato original [{"etapa", "ordem"}]."""
+        ids = self.roteiro_ids[self.roteiro_offsets[i]:self.roteiro_offsets[i + 1]]
+        return [{"etapa": self.roteiro_textos[id_], "ordem": ordem} for ordem, id_ in enumerate(ids)]
+
+    def objetivos(self):
+        """Matriz (n, 3) [preco, tempo, conexoes] em float64 (cópia)."""
+        return np.column_stack((self.preco, self.tempo, self.conexoes.astype(np.float64)))
+
+
+def _restaurar_alternativas(colunas, textos, ids, offsets):
+    return AlternativaSet(**colunas, roteiro_ids=ids, roteiro_offsets=offsets, roteiro_textos=textos)
+
+
+@_somente_leitura
 class Alternativa:
-    tempo: float
-    preco: float
-    conexoes: int
-    saida: str
-    chegada: str
-    tempo_total: str
-    roteiro: List[dict]
-    preco_str: str
+    """
+    Visão leve e imutável de uma linha de AlternativaSet.
 
+    Não guarda dados próprios: os atributos são lidos das colunas do
+    conjunto, então milhares de alternativas não custam milhares de dicts.
+    """
 
-@dataclass
-class ResultadoOtimizacao:
-    rota_idx: int
-    perfil: str
-    alternativa_escolhida: Alternativa
-    alternativas: List[Alternativa]
-    pareto: list
-    pareto_idx: list
-    tempo_max: float
-    orcamento: float
+    __slots__ = ("_conjunto", "indice")
+
+    def __init__(self, conjunto, indice):
+        object.__setattr__(self, "_conjunto", conjunto)
+        object.__setattr__(self, "indice", indice)
+
+    def __reduce__(self):
+        # __setattr__ bloqueado: o pickle/copy padrão não consegue restaurar os slots
+        return Alternativa, (self._conjunto, self.indice)
 
+    def __eq__(self, outra):
+        if not isinstance(outra, Alternativa):
+            return NotImplemented
+        return self._conjunto is outra._conjunto and self.indice == outra.indice
 
-@dataclass
+    def __hash__(self):
+        return hash((id(self._conjunto), self.indice))
+
+    @property
+    def tempo(self) -> float:
+        return float(self._conjunto.tempo[self.indice])
+
+    @property
+    def preco(self) -> float:
+        return float(self._conjunto.preco[self.indice])
+
+    @property
+    def conexoes(self) -> int:
+        return int(self._conjunto.conexoes[self.indice])
+
+    @property
+    def saida(self) -> str:
+        return self._conjunto.saida[self.indice]
+
+    @property
+    def chegada(self) -> str:
+        return self._conjunto.chegada[self.indice]
+
+    @property
+    def tempo_total(self) -> str:
+        return self._conjunto.tempo_total[self.indice]
+
+    @property
+    def roteiro(self) -> List[dict]:
+        return self._conjunto.roteiro_de(self.indice)
+
+    @property
+    def preco_str(self) -> str:
+        return self._conjunto.preco_str[self.indice]
+
+    @property
+    def data_partida(self) -> Optional[str]:
+        return self._conjunto.data_partida[self.indice]
+
+    @property
+    def moeda(self) -> str:
+        """Moeda original do preço (preco já está convertido para BRL)."""
+        return MOEDAS[self._conjunto.moeda[self.indice]]
+
+    def para_dict(self) -> dict:
+        """Campos da alternativa em tipos nativos (JSON)."""
+        return {
+            "tempo": self.tempo,
+            "preco": self.preco,
+            "conexoes": self.conexoes,
+            "saida": self.saida,
+            "chegada": self.chegada,
+            "tempo_total": self.tempo_total,
+            "preco_str": self.preco_str,
+            "moeda": self.moeda,
+            "data_partida": self.data_partida,
+            "roteiro": self.roteiro,
+        }
+
+    def __repr__(self):
+        return (
+            f"Alternativa(tempo={self.tempo!r}, preco={self.preco!r}, "
+            f"conexoes={self.conexoes!r}, saida={self.saida!r}, chegada={self.chegada!r})"
+        )
+
+
+@dataclass(frozen=True, slots=True)
 class ResultadoOtimizacao:
     rota_idx: int
     perfil: str
-    alternativa_escolhida: Optional[object]
-    alternativas: List[object]
-    pareto: Optional[list]
+    alternativa_escolhida: Optional[Alternativa]
+    alternativas: AlternativaSet
+    pareto: Optional[np.ndarray]
     pareto_idx: Optional[list]
     tempo_max: float
     orcamento: float
-    mensagem: Optional[str] = None   # 👈 NOVO
\ No newline at end of file
+    mensagem: Optional[str] = None
+
+
+def resultado_para_dict(resultado: ResultadoOtimizacao, incluir_pareto=True) -> dict:
+    """ResultadoOtimizacao em tipos nativos (JSON), para a API e o modo em lote."""
+    escolhida = resultado.alternativa_escolhida
+    dados = {
+        "rota_idx": resultado.rota_idx,
+        "perfil": resultado.perfil,
+        "tempo_max": resultado.tempo_max,
+        "orcamento": resultado.orcamento,
+        "mensagem": resultado.mensagem,
+        "n_alternativas": len(resultado.alternativas),
+        "alternativa_escolhida": escolhida.para_dict() if escolhida is not None else None,
+    }
+    if incluir_pareto:
+        dados["pareto"] = [resultado.alternativas[i].para_dict() for i in resultado.pareto_idx or []]
+    return dados
@@ -1,15 +1,64 @@
+import re
+
+import numpy as np
+
+# Kernels de regex vetorizados (C++/RE2), carregados no primeiro lote grande
+# (pyarrow.compute custa ~0,1 s de import); sem pyarrow usa o caminho em Python
+pa = pc = None
+_ARROW_TENTADO = False
+
+# "1d 2h 5min", "25h 6min", "2h30min", "45min"
+_PADRAO_UNIDADE = {"min": r"min", "h": r"h", "d": r"d\b"}
+_RE_TEMPO = re.compile(r"(\d+)\s*(" + "|".join(_PADRAO_UNIDADE.values()) + ")", re.IGNORECASE)
+_HORAS_POR_UNIDADE = {"min": 1 / 60, "h": 1.0, "d": 24.0}
+
+# Símbolo (antes ou depois do número) e o primeiro número do texto. Outros
+# dólares ("C$", "A$", "MX$", "NZ$"...) entram explicitamente: sem isso o "$"
+# solto casaria e o preço seria convertido pela cotação do dólar americano
+_RE_PRECO = re.compile(
+    r"(?P<moeda>R\$|US\$|[A-Z]{1,3}\$|€|\$)?\s*(?P<numero>\d+(?:[.,  ]\d+)*)\s*(?P<moeda_depois>€)?"
+)
+_RE_SEPARADORES = re.compile(r"[.,  ]")
+# Espaço comum ou não separável: sempre separador de milhar ("12 500" → 12500)
+_RE_ESPACOS = re.compile(r"[\xa0 ]")
+
+# Códigos categóricos de moeda (uint8); o índice é o código. "XXX" (ISO 4217:
+# sem moeda) marca símbolos reconhecidos mas sem câmbio: o preço vira NaN
+MOEDAS = ("BRL", "USD", "EUR", "XXX")
+_CODIGO_SIMBOLO = {"R$": 0, "US$": 1, "$": 1, "€": 2}
+MOEDA_PADRAO = 0  # sem símbolo: o Rome2Rio está configurado em R$
+MOEDA_NAO_SUPORTADA = 3
+
+
 def parse_tempo(tempo_str: str) -> float:
     if not tempo_str:
         return 0.0
-    h, m = 0, 0
-    if "h" in tempo_str:
-        partes = tempo_str.split("h")
-        h = int(partes[0])
-        if "min" in partes[1]:
-            m = int(partes[1].replace("min", "").strip())
-    elif "min" in tempo_str:
-        m = int(tempo_str.replace("min", "").strip())
-    return h + m / 60
+    return sum(
+        int(valor) * _HORAS_POR_UNIDADE[unidade.lower()]
+        for valor, unidade in _RE_TEMPO.findall(tempo_str)
+    )
+
+
+# "10:30", "7:05 PM", "06:10 +1" (chegada no dia seguinte)
+_RE_HORARIO = re.compile(r"(\d{1,2}):(\d{2})\s*([ap])?\.?\s*m?\.?", re.IGNORECASE)
+_RE_DIAS_EXTRA = re.compile(r"\+\s*(\d+)")
+
+
+def parse_horario(horario_str: str) -> float:
+    """Minutos desde 00:00 do dia da partida (com o "+N" de dias); NaN se não reconhecer."""
+    if not horario_str:
+        return float("nan")
+    m = _RE_HORARIO.search(horario_str)
+    if m is None:
+        return float("nan")
+    hora, minuto, periodo = int(m.group(1)), int(m.group(2)), (m.group(3) or "").lower()
+    if periodo == "p" and hora < 12:
+        hora += 12
+    elif periodo == "a" and hora == 12:
+        hora = 0
+    extra = _RE_DIAS_EXTRA.search(horario_str, m.end())
+    dias = int(extra.group(1)) if extra else 0
+    return float(dias * 1440 + hora * 60 + minuto)
 
 
 def format_tempo_horas(tempo_h: float) -> str:
@@ -18,20 +67,167 @@ def format_tempo_horas(tempo_h: float) -> str:
     return f"{h}h {m} min"
 
 
+def _numero_preco(numero: str) -> float:
+    """
+    Normaliza separadores de milhar/decimal:
+    - "1.234,56" / "1,234.56" → o último separador é o decimal
+    - "1.234" / "1,234"      → um único separador seguido de 3 dígitos é milhar
+    - "99,90" / "99.9"       → caso contrário é decimal
+    - "12 500" / "1 234,56"  → espaços são sempre milhar (removidos antes)
+    """
+    numero = _RE_ESPACOS.sub("", numero)
+    partes = _RE_SEPARADORES.split(numero)
+    if len(partes) == 1:
+        return float(numero)
+
+    tipos_separador = set(_RE_SEPARADORES.findall(numero))
+    if len(tipos_separador) > 1 or (len(partes) == 2 and len(partes[-1]) != 3):
+        return float("".join(partes[:-1]) + "." + partes[-1])
+    return float("".join(partes))
+
+
 def parse_preco(preco_str: str) -> float:
     if not preco_str:
         return 0.0
-    preco_str = preco_str.replace("R$", "").replace(".", "").replace(",", "").strip()
+    m = _RE_PRECO.search(preco_str)
+    if m is None:
+        return 0.0
     try:
-        return float(preco_str)
+        return _numero_preco(m.group("numero"))
     except ValueError:
         return 0.0
 
 
+# Abaixo disso o custo fixo do pyarrow não compensa
+_MIN_VALORES_ARROW = 256
+
+
+def detectar_moeda(preco_str: str) -> int:
+    """Código (índice em MOEDAS) da moeda de um texto de preço."""
+    if not preco_str:
+        return MOEDA_PADRAO
+    m = _RE_PRECO.search(preco_str)
+    if m is None:
+        return MOEDA_PADRAO
+    simbolo = m.group("moeda") or m.group("moeda_depois")
+    if simbolo is None:
+        return MOEDA_PADRAO
+    return _CODIGO_SIMBOLO.get(simbolo, MOEDA_NAO_SUPORTADA)
+
+
+def _carregar_arrow() -> bool:
+    global pa, pc, _ARROW_TENTADO
+    if not _ARROW_TENTADO:
+        _ARROW_TENTADO = True
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+        except ImportError:
+            pa = pc = None
+    return pc is not None
+
+
+def _aplicar_unicos(valores, parser, parser_arrow=None, dtype=np.float64) -> np.ndarray:
+    """
+    Converte cada texto distinto uma única vez e espalha o resultado.
+    Colunas do crawler repetem muito ("R$ 1.234", "10h 5min"), então o
+    custo cai para o número de valores distintos; esses são convertidos
+    pelos kernels do pyarrow quando disponível.
+    """
+    codigos: dict = {}
+    inverso = np.fromiter(
+        (codigos.setdefault(v, len(codigos)) for v in valores),
+        dtype=np.intp,
+    )
+    if parser_arrow is not None and len(codigos) >= _MIN_VALORES_ARROW and _carregar_arrow():
+        unicos = parser_arrow(codigos.keys())
+    else:
+        unicos = np.fromiter(map(parser, codigos), dtype=dtype, count=len(codigos))
+    return unicos[inverso]
+
+
+def parse_tempos(tempos) -> np.ndarray:
+    """Versão em lote de parse_tempo: coluna de textos → array float64 (horas)."""
+    return _aplicar_unicos(tempos, parse_tempo, _parse_tempos_arrow)
+
+
+def parse_precos(precos) -> np.ndarray:
+    """
+    Versão em lote de parse_preco: coluna de textos (R$, US$, $, €, com
+    separadores brasileiros ou americanos) → array float64.
+    """
+    return _aplicar_unicos(precos, parse_preco, _parse_precos_arrow)
+
+
+def parse_horarios(horarios) -> np.ndarray:
+    """Versão em lote de parse_horario: coluna de textos → minutos (float64, NaN se inválido)."""
+    return _aplicar_unicos(horarios, parse_horario)
+
+
+def detectar_moedas(precos) -> np.ndarray:
+    """Versão em lote de detectar_moeda: coluna de textos → códigos uint8."""
+    return _aplicar_unicos(precos, detectar_moeda, dtype=np.uint8)
+
+
+# -----------------------------
+# Caminho vetorizado (pyarrow.compute)
+# -----------------------------
+def _texto_arrow(valores):
+    return pa.array(list(valores), type=pa.string())
+
+
+def _para_float(arr) -> np.ndarray:
+    return pc.fill_null(pc.cast(arr, pa.float64(), safe=False), 0.0).to_numpy(zero_copy_only=False)
+
+
+def _parse_tempos_arrow(tempos) -> np.ndarray:
+    arr = pc.fill_null(_texto_arrow(tempos), "")
+    total = np.zeros(len(arr), dtype=np.float64)
+    repetidas = np.zeros(len(arr), dtype=bool)
+    for unidade, horas in _HORAS_POR_UNIDADE.items():
+        padrao = rf"(?i)(?P<v>\d+)\s*{_PADRAO_UNIDADE[unidade]}"
+        partes = pc.extract_regex(arr, padrao)
+        total += _para_float(pc.struct_field(partes, "v")) * horas
+        repetidas |= pc.count_substring_regex(arr, padrao).to_numpy(zero_copy_only=False) > 1
+
+    # extract_regex só pega a primeira ocorrência de cada unidade; parse_tempo
+    # soma todas ("1h 10min 2h"). Esses textos (raros) vão pelo caminho em Python
+    if repetidas.any():
+        textos = arr.to_pylist()
+        for i in np.flatnonzero(repetidas):
+            total[i] = parse_tempo(textos[i])
+    return total
+
+
+def _parse_precos_arrow(precos) -> np.ndarray:
+    arr = _texto_arrow(precos)
+    numero = pc.struct_field(
+        pc.extract_regex(arr, rf"(?P<n>\d+(?:{_RE_SEPARADORES.pattern}\d+)*)"), "n"
+    )
+    # Espaços são sempre separador de milhar (mesma regra de _numero_preco)
+    numero = pc.replace_substring_regex(numero, _RE_ESPACOS.pattern, "")
+
+    # Mesma regra de _numero_preco: dois tipos de separador, ou um único
+    # separador que não é seguido de exatamente 3 dígitos → decimal
+    decimal = pc.or_(
+        pc.and_(pc.match_substring(numero, "."), pc.match_substring(numero, ",")),
+        pc.match_substring_regex(numero, r"^\d+[.,](\d{1,2}|\d{4,})$"),
+    )
+    partes = pc.extract_regex(numero, r"^(?P<inteiro>[\d.,]*?)[.,](?P<fracao>\d+)$")
+    com_decimal = pc.binary_join_element_wise(
+        pc.replace_substring_regex(pc.struct_field(partes, "inteiro"), r"[.,]", ""),
+        pc.struct_field(partes, "fracao"),
+        ".",
+    )
+    sem_decimal = pc.replace_substring_regex(numero, r"[.,]", "")
+
+    return _para_float(pc.if_else(pc.fill_null(decimal, False), com_decimal, sem_decimal))
+
+
 def format_preco(preco: float) -> str:
     return f"R$ {preco:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 def format_estrelas(x):
     if x is None or x != x:
         return "—"
-    return str(int(x))
\ No newline at end of file
+    return str(int(x))
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+cache_ttl.py
+============
+Cache com expiração (TTL) em dois níveis:
+
+- memória: LRU em processo (OrderedDict), sem custo de serialização;
+- disco:   SQLite, sobrevive a reinícios do Streamlit.
+
+Os valores gravados em disco precisam ser serializáveis em JSON
+(as respostas da SerpApi já são). Caches sem `arquivo` ficam só em memória
+e aceitam qualquer objeto Python.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from infra.singleflight import SingleFlight
+
+CACHE_DIR = os.getenv("OTIMIZACAO_CACHE_DIR", ".cache")
+
+_AUSENTE = object()
+
+# Todos os caches criados no processo (para expor estatísticas)
+_CACHES: list["CacheTTL"] = []
+
+
+def caminho_cache(nome_arquivo: str) -> str:
+    """Caminho de um arquivo dentro do diretório de cache do projeto."""
+    return os.path.join(CACHE_DIR, nome_arquivo)
+
+
+def _serializar_chave(chave: Hashable) -> str:
+    return json.dumps(chave, ensure_ascii=False, default=str)
+
+
+class CacheTTL:
+    """
+    Cache chave → valor com TTL, LRU em memória e (opcional) SQLite em disco.
+
+    Parâmetros:
+    - nome (str): namespace do cache (várias instâncias podem dividir o mesmo arquivo)
+    - ttl_s (float): tempo de vida de cada entrada, em segundos
+    - max_itens (int): capacidade do nível em memória
+    - arquivo (str | None): caminho do SQLite; None mantém o cache só em memória
+    """
+
+    def __init__(self, nome: str, ttl_s: float, max_itens: int = 512, arquivo: str | None = None):
+        self.nome = nome
+        self.ttl_s = float(ttl_s)
+        self.max_itens = int(max_itens)
+        self.arquivo = arquivo
+
+        self._memoria: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._voos = SingleFlight(f"cache:{nome}")
+
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+
+        _CACHES.append(self)
+
+    # -----------------------------
+    # Disco (SQLite)
+    # -----------------------------
+    def _conexao(self) -> sqlite3.Connection | None:
+        if self.arquivo is None:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.arquivo) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.arquivo, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " chave TEXT NOT NULL,"
+                " expira_em REAL NOT NULL,"
+                " valor TEXT NOT NULL,"
+                " PRIMARY KEY (namespace, chave))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _ler_disco(self, chave: Hashable) -> tuple[float, Any] | None:
+        try:
+            conn = self._conexao()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT expira_em, valor FROM cache WHERE namespace = ? AND chave = ?",
+                (self.nome, _serializar_chave(chave)),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _gravar_disco(self, chave: Hashable, expira_em: float, valor: Any) -> None:
+        try:
+            conn = self._conexao()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, chave, expira_em, valor) VALUES (?, ?, ?, ?)",
+                (self.nome, _serializar_chave(chave), expira_em, json.dumps(valor, ensure_ascii=False)),
+            )
+            conn.commit()
+        except (sqlite3.Error, TypeError, ValueError):
+            # Falha no disco não deve derrubar a consulta: fica só em memória
+            pass
+
+    # -----------------------------
+    # Memória (LRU)
+    # -----------------------------
+    def _gravar_memoria(self, chave: Hashable, expira_em: float, valor: Any) -> None:
+        self._memoria[chave] = (expira_em, valor)
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_itens:
+            self._memoria.popitem(last=False)
+
+    # -----------------------------
+    # API pública
+    # -----------------------------
+    def _buscar(self, chave: Hashable) -> tuple[Any, str | None]:
+        """(valor, nível) sem contar estatística; nível None se ausente ou expirado. Chamar com o lock."""
+        agora = time.time()
+
+        item = self._memoria.get(chave)
+        if item is not None:
+            if item[0] > agora:
+                self._memoria.move_to_end(chave)
+                return item[1], "memoria"
+            del self._memoria[chave]
+
+        item = self._ler_disco(chave)
+        if item is not None and item[0] > agora:
+            self._gravar_memoria(chave, item[0], item[1])
+            return item[1], "disco"
+
+        return None, None
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        """Retorna o valor em cache (memória, depois disco) ou `padrao`."""
+        with self._lock:
+            valor, nivel = self._buscar(chave)
+            if nivel == "memoria":
+                self.acertos_memoria += 1
+            elif nivel == "disco":
+                self.acertos_disco += 1
+            else:
+                self.falhas += 1
+                return padrao
+            return valor
+
+    def expira_em(self, chave: Hashable) -> float | None:
+        """Instante (epoch) em que a entrada expira; None se ausente ou já expirada. Não conta estatística."""
+        with self._lock:
+            item = self._memoria.get(chave) or self._ler_disco(chave)
+        if item is None or item[0] <= time.time():
+            return None
+        return item[0]
+
+    def definir(self, chave: Hashable, valor: Any) -> None:
+        expira_em = time.time() + self.ttl_s
+        with self._lock:
+            self._gravar_memoria(chave, expira_em, valor)
+            self._gravar_disco(chave, expira_em, valor)
+
+    def obter_ou_calcular(self, chave: Hashable, fabrica: Callable[[], Any]) -> Any:
+        """
+        Retorna o valor em cache ou executa `fabrica()` e guarda o resultado.
+        Chamadas concorrentes para a mesma chave ausente executam a fábrica
+        uma única vez (single-flight). Exceções da fábrica não são armazenadas.
+        """
+        valor = self.obter(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        return self._voos.executar(chave, self._calcular, chave, fabrica)
+
+    def _calcular(self, chave: Hashable, fabrica: Callable[[], Any]) -> Any:
+        # Outro voo pode ter terminado entre a falha acima e a entrada aqui
+        with self._lock:
+            valor, nivel = self._buscar(chave)
+        if nivel is not None:
+            return valor
+        valor = fabrica()
+        self.definir(chave, valor)
+        return valor
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._memoria.clear()
+            try:
+                conn = self._conexao()
+                if conn is not None:
+                    conn.execute("DELETE FROM cache WHERE namespace = ?", (self.nome,))
+                    conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def estatisticas(self) -> dict[str, Any]:
+        consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+        acertos = self.acertos_memoria + self.acertos_disco
+        return {
+            "cache": self.nome,
+            "consultas": consultas,
+            "acertos_memoria": self.acertos_memoria,
+            "acertos_disco": self.acertos_disco,
+            "falhas": self.falhas,
+            "taxa_acerto": (acertos / consultas) if consultas else 0.0,
+            "itens_memoria": len(self._memoria),
+        }
+
+
+def estatisticas_caches() -> list[dict[str, Any]]:
+    """Estatísticas (hit rate) de todos os caches do processo."""
+    return [c.estatisticas() for c in _CACHES]
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+metricas.py
+===========
+Registro de métricas do processo no formato de exposição em texto do
+Prometheus (text/plain; version=0.0.4), sem dependência externa.
+
+- Contador, Medidor e Histograma, com rótulos
+- coletores: funções chamadas a cada exportação, para números que já
+  existem em outro lugar (caches, single-flight)
+- exposição: GET /metrics na API; no app, servidor HTTP local com
+  OTIMIZACAO_METRICAS_PORTA=9464 e/ou arquivo com
+  OTIMIZACAO_METRICAS_ARQUIVO=metricas.prom (textfile collector do
+  node_exporter), regravado ao fim de cada job
+
+As métricas são declaradas no import de cada módulo; declarar de novo o
+mesmo nome devolve a métrica existente.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable
+
+PORTA = int(os.getenv("OTIMIZACAO_METRICAS_PORTA", "0"))
+ARQUIVO = os.getenv("OTIMIZACAO_METRICAS_ARQUIVO", "")
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Iterable[str], valores: Iterable[str]) -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_valor(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor))
+
+
+# -----------------------------
+# Tipos de métrica
+# -----------------------------
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple[str, ...] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._valores: dict[tuple, Any] = {}
+
+    def _chave(self, rotulos: dict) -> tuple:
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"{self.nome}: rótulos esperados {self.rotulos}, recebidos {tuple(rotulos)}")
+        return tuple(str(rotulos[r]) for r in self.rotulos)
+
+    def valor(self, **rotulos) -> float:
+        with self._lock:
+            return self._valores.get(self._chave(rotulos), 0.0)
+
+    def linhas(self) -> list[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_valor(v)}"
+            for chave, v in itens
+        ]
+
+
+class Contador(_Metrica):
+    """Só cresce (reinicia com o processo)."""
+    tipo = "counter"
+
+    def inc(self, valor: float = 1.0, **rotulos):
+        if valor < 0:
+            raise ValueError("contador não pode diminuir")
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+
+class Medidor(_Metrica):
+    """Valor instantâneo (páginas abertas, tamanho de fila)."""
+    tipo = "gauge"
+
+    def definir(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = float(valor)
+
+    def inc(self, valor: float = 1.0, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def dec(self, valor: float = 1.0, **rotulos):
+        self.inc(-valor, **rotulos)
+
+
+class Histograma(_Metrica):
+    """Contagem por faixa (cumulativa na exportação), soma e total de observações."""
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        posicao = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            estado = self._valores.get(chave)
+            if estado is None:
+                estado = self._valores[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            estado[0][posicao] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    @contextmanager
+    def medir(self, **rotulos):
+        """Observa a duração (s) do bloco, inclusive quando ele levanta exceção."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def valor(self, **rotulos) -> float:
+        """Número de observações."""
+        with self._lock:
+            estado = self._valores.get(self._chave(rotulos))
+            return estado[2] if estado else 0
+
+    def linhas(self) -> list[str]:
+        with self._lock:
+            itens = sorted((chave, ([*c], s, n)) for chave, (c, s, n) in self._valores.items())
+
+        linhas = []
+        nomes_le = (*self.rotulos, "le")
+        for chave, (contagens, soma, n) in itens:
+            acumulado = 0
+            for limite, contagem in zip((*self.buckets, math.inf), contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(nomes_le, (*chave, _formatar_valor(limite)))
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_valor(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {n}")
+        return linhas
+
+
+# -----------------------------
+# Registro
+# -----------------------------
+# Coletor: () -> [(nome, tipo, ajuda, [({rótulo: valor}, número), ...]), ...]
+Coletor = Callable[[], list]
+
+
+class Registro:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metricas: dict[str, _Metrica] = {}
+        self._coletores: list[Coletor] = []
+
+    def _obter_ou_criar(self, classe, nome, ajuda, rotulos, **kwargs):
+        with self._lock:
+            existente = self._metricas.get(nome)
+            if existente is not None:
+                if not isinstance(existente, classe) or existente.rotulos != tuple(rotulos):
+                    raise ValueError(f"Métrica {nome} já registrada com outro tipo ou rótulos")
+                return existente
+            metrica = self._metricas[nome] = classe(nome, ajuda, tuple(rotulos), **kwargs)
+            return metrica
+
+    def contador(self, nome, ajuda, rotulos=()) -> Contador:
+        return self._obter_ou_criar(Contador, nome, ajuda, rotulos)
+
+    def medidor(self, nome, ajuda, rotulos=()) -> Medidor:
+        return self._obter_ou_criar(Medidor, nome, ajuda, rotulos)
+
+    def histograma(self, nome, ajuda, rotulos=(), buckets=BUCKETS_SEGUNDOS) -> Histograma:
+        return self._obter_ou_criar(Histograma, nome, ajuda, rotulos, buckets=buckets)
+
+    def registrar_coletor(self, coletor: Coletor):
+        with self._lock:
+            if coletor not in self._coletores:
+                self._coletores.append(coletor)
+
+    def exportar_texto(self) -> str:
+        with self._lock:
+            metricas = sorted(self._metricas.values(), key=lambda m: m.nome)
+            coletores = list(self._coletores)
+
+        blocos = []
+        for m in metricas:
+            linhas = m.linhas()
+            if linhas:
+                blocos.append([f"# HELP {m.nome} {m.ajuda}", f"# TYPE {m.nome} {m.tipo}", *linhas])
+
+        for coletor in coletores:
+            try:
+                familias = coletor()
+            except Exception as e:
+                print(f"[WARN] Coletor de métricas falhou: {e}")
+                continue
+            for nome, tipo, ajuda, amostras in familias:
+                linhas = [
+                    f"{nome}{_formatar_rotulos(r.keys(), map(str, r.values()))} {_formatar_valor(v)}"
+                    for r, v in amostras
+                ]
+                blocos.append([f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}", *linhas])
+
+        return "\n".join(linha for bloco in blocos for linha in bloco) + "\n"
+
+
+_REGISTRO = Registro()
+
+
+def registro() -> Registro:
+    return _REGISTRO
+
+
+def contador(nome, ajuda, rotulos=()) -> Contador:
+    return _REGISTRO.contador(nome, ajuda, rotulos)
+
+
+def medidor(nome, ajuda, rotulos=()) -> Medidor:
+    return _REGISTRO.medidor(nome, ajuda, rotulos)
+
+
+def histograma(nome, ajuda, rotulos=(), buckets=BUCKETS_SEGUNDOS) -> Histograma:
+    return _REGISTRO.histograma(nome, ajuda, rotulos, buckets)
+
+
+def registrar_coletor(coletor: Coletor):
+    _REGISTRO.registrar_coletor(coletor)
+
+
+def exportar_texto() -> str:
+    return _REGISTRO.exportar_texto()
+
+
+# -----------------------------
+# Coletores padrão
+# -----------------------------
+def _coletar_caches():
+    from infra.cache_ttl import estatisticas_caches
+
+    estatisticas = estatisticas_caches()
+    consultas = []
+    for e in estatisticas:
+        for resultado, chave in (("acerto_memoria", "acertos_memoria"), ("acerto_disco", "acertos_disco"),
+                                 ("falha", "falhas")):
+            consultas.append(({"cache": e["cache"], "resultado": resultado}, e[chave]))
+    return [
+        ("cache_consultas_total", "counter", "Consultas aos caches TTL por resultado", consultas),
+        ("cache_itens_memoria", "gauge", "Itens no nível em memória de cada cache",
+         [({"cache": e["cache"]}, e["itens_memoria"]) for e in estatisticas]),
+    ]
+
+
+def _coletar_singleflight():
+    from infra.singleflight import estatisticas_singleflight
+
+    estatisticas = estatisticas_singleflight()
+    return [
+        ("singleflight_execucoes_total", "counter", "Chamadas executadas de fato por grupo",
+         [({"grupo": e["grupo"]}, e["execucoes"]) for e in estatisticas]),
+        ("singleflight_compartilhadas_total", "counter", "Chamadas que esperaram uma execução em andamento",
+         [({"grupo": e["grupo"]}, e["compartilhadas"]) for e in estatisticas]),
+    ]
+
+
+registrar_coletor(_coletar_caches)
+registrar_coletor(_coletar_singleflight)
+
+
+# -----------------------------
+# Exposição
+# -----------------------------
+def gravar_arquivo(caminho: str):
+    """Grava a exposição inteira de forma atômica (o leitor nunca vê meio arquivo)."""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(exportar_texto())
+    os.replace(temporario, caminho)
+
+
+def gravar_arquivo_configurado():
+    """Regrava OTIMIZACAO_METRICAS_ARQUIVO, se configurado."""
+    if ARQUIVO:
+        try:
+            gravar_arquivo(ARQUIVO)
+        except OSError as e:
+            print(f"[WARN] Falha ao gravar métricas em {ARQUIVO}: {e}")
+
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = exportar_texto().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", TIPO_CONTEUDO)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+_servidor = None
+_servidor_lock = threading.Lock()
+_exposicao_tentada = False
+
+
+def iniciar_servidor(porta: int, host: str = "127.0.0.1"):
+    """Servidor HTTP local com GET /metrics numa thread daemon (uma vez por processo)."""
+    global _servidor
+    with _servidor_lock:
+        if _servidor is None:
+            _servidor = ThreadingHTTPServer((host, porta), _ManipuladorMetricas)
+            threading.Thread(target=_servidor.serve_forever, name="metricas", daemon=True).start()
+        return _servidor
+
+
+def iniciar_exposicao_configurada():
+    """Sobe o servidor de OTIMIZACAO_METRICAS_PORTA, se configurado; pode ser chamada a cada rerun."""
+    global _exposicao_tentada
+    if PORTA and not _exposicao_tentada:
+        _exposicao_tentada = True
+        try:
+            iniciar_servidor(PORTA)
+        except OSError as e:
+            print(f"[WARN] Servidor de métricas indisponível na porta {PORTA}: {e}")
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+profiling.py
+============
+Perfil sob demanda (cProfile e tracemalloc) das etapas mais caras: coleta,
+otimização e busca de hotéis.
+
+- OTIMIZACAO_PROFILE=cpu | mem | cpu,mem (ou 1) liga para o processo todo
+- perfilar("cpu,mem") liga só dentro do bloco (um job, uma rota do lote);
+  vale para as tarefas asyncio e threads de asyncio.to_thread criadas nele
+- @perfilado("nome") marca a função (síncrona ou async); desligado, o
+  custo é ler um ContextVar por chamada
+
+Cada execução perfilada grava em OTIMIZACAO_PROFILE_DIR (padrão: perfis/)
+um relatório .txt com os N maiores hotspots (tempo acumulado) e locais de
+alocação (diferença entre snapshots), além do .prof bruto para o
+snakeviz/pstats. O cProfile só enxerga a thread que chamou a função
+(threads de executor, como as de estrelas da SerpApi, ficam de fora); numa
+função async ele fica ligado durante todo o await, então outras tarefas do
+mesmo event loop que rodarem nesse intervalo também aparecem no relatório.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+PROFILE_DIR = os.getenv("OTIMIZACAO_PROFILE_DIR", "perfis")
+TOP_N = int(os.getenv("OTIMIZACAO_PROFILE_TOP", "30"))
+FRAMES_ALOCACAO = int(os.getenv("OTIMIZACAO_PROFILE_FRAMES", "1"))
+
+MODOS = frozenset({"cpu", "mem"})
+
+
+def interpretar_modos(valor) -> frozenset:
+    """"cpu,mem" / "1" / True → conjunto de modos; vazio desliga."""
+    if valor is True:
+        return MODOS
+    if not valor:
+        return frozenset()
+    partes = {p.strip().lower() for p in str(valor).split(",") if p.strip()}
+    if partes & {"1", "true", "sim", "all"}:
+        return MODOS
+    invalidos = partes - MODOS
+    if invalidos:
+        raise ValueError(f"Modos de profiling inválidos: {sorted(invalidos)} (use cpu, mem)")
+    return frozenset(partes)
+
+
+MODOS_AMBIENTE = interpretar_modos(os.getenv("OTIMIZACAO_PROFILE", ""))
+
+_modos_bloco: contextvars.ContextVar[frozenset] = contextvars.ContextVar("profiling_modos", default=frozenset())
+# Evita perfis aninhados (o cProfile não empilha na mesma thread)
+_em_perfil: contextvars.ContextVar[bool] = contextvars.ContextVar("profiling_ativo", default=False)
+
+
+# tracemalloc é do processo: fica ligado enquanto houver alguma execução
+# perfilando memória e só é desligado se foi ligado aqui
+_lock_memoria = threading.Lock()
+_usuarios_memoria = 0
+_entradas_memoria = 0   # total de execuções que já começaram a perfilar memória
+_tracemalloc_nosso = False
+
+
+def _entrar_memoria() -> Optional[int]:
+    """
+    Registra mais uma execução perfilando memória. Se ela é a única, zera o
+    pico do processo e retorna uma marca para `_sair_memoria`; com outra em
+    andamento retorna None (zerar apagaria o pico que a outra ainda vai ler).
+    """
+    global _usuarios_memoria, _entradas_memoria, _tracemalloc_nosso
+    with _lock_memoria:
+        if _usuarios_memoria == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(FRAMES_ALOCACAO)
+            _tracemalloc_nosso = True
+        _usuarios_memoria += 1
+        _entradas_memoria += 1
+        if _usuarios_memoria > 1:
+            return None
+        tracemalloc.reset_peak()
+        return _entradas_memoria
+
+
+def _sair_memoria(marca: Optional[int]) -> bool:
+    """Encerra a execução; True se nenhuma outra perfilou memória durante ela (pico exato)."""
+    global _usuarios_memoria, _tracemalloc_nosso
+    with _lock_memoria:
+        exclusiva = marca is not None and _entradas_memoria == marca
+        _usuarios_memoria -= 1
+        if _usuarios_memoria == 0 and _tracemalloc_nosso:
+            tracemalloc.stop()
+            _tracemalloc_nosso = False
+        return exclusiva
+
+
+@contextmanager
+def perfilar(modos="cpu,mem"):
+    """Liga o profiling das funções @perfilado chamadas dentro do bloco."""
+    token = _modos_bloco.set(interpretar_modos(modos))
+    try:
+        yield
+    finally:
+        _modos_bloco.reset(token)
+
+
+def perfilado(nome: Optional[str] = None):
+    """Decorator: perfila a função quando o profiling está ligado (ambiente ou bloco)."""
+
+    def decorador(fn):
+        rotulo = nome or f"{fn.__module__}.{fn.__qualname__}"
+
+        if inspect.iscoroutinefunction(fn):
+            # Perfila do início ao fim do await, não só a criação da corrotina
+            @functools.wraps(fn)
+            async def envoltorio_async(*args, **kwargs):
+                modos = MODOS_AMBIENTE or _modos_bloco.get()
+                if not modos or _em_perfil.get():
+                    return await fn(*args, **kwargs)
+                with _execucao_perfilada(rotulo, modos):
+                    return await fn(*args, **kwargs)
+
+            return envoltorio_async
+
+        @functools.wraps(fn)
+        def envoltorio(*args, **kwargs):
+            modos = MODOS_AMBIENTE or _modos_bloco.get()
+            if not modos or _em_perfil.get():
+                return fn(*args, **kwargs)
+            with _execucao_perfilada(rotulo, modos):
+                return fn(*args, **kwargs)
+
+        return envoltorio
+
+    return decorador
+
+
+# -----------------------------
+# Execução perfilada
+# -----------------------------
+@contextmanager
+def _execucao_perfilada(rotulo, modos):
+    token = _em_perfil.set(True)
+
+    perfil = None
+    if "cpu" in modos:
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outro profiler já está ativo nesta thread (ex.: depurador)
+            perfil = None
+
+    antes, base, marca = None, 0, None
+    if "mem" in modos:
+        marca = _entrar_memoria()
+        # O pico é relatado como acréscimo sobre a memória no início da chamada
+        base = tracemalloc.get_traced_memory()[0]
+        antes = tracemalloc.take_snapshot()
+
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        if perfil is not None:
+            perfil.disable()
+
+        alocacoes, pico, exclusiva = None, None, True
+        if antes is not None:
+            depois = tracemalloc.take_snapshot()
+            pico = max(tracemalloc.get_traced_memory()[1] - base, 0)
+            alocacoes = depois.compare_to(antes, "lineno")
+            exclusiva = _sair_memoria(marca)
+
+        _em_perfil.reset(token)
+        try:
+            caminho = _gravar_relatorio(rotulo, duracao, perfil, alocacoes, pico, exclusiva, erro)
+            print(f"[INFO] Perfil de {rotulo} em {caminho}")
+        except OSError as e:
+            print(f"[WARN] Falha ao gravar o perfil de {rotulo}: {e}")
+
+
+def _gravar_relatorio(rotulo, duracao, perfil, alocacoes, pico, exclusiva, erro) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(
+        PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{rotulo.replace('.', '_')}_{uuid.uuid4().hex[:6]}"
+    )
+
+    linhas = [
+        f"Função:  {rotulo}",
+        f"Duração: {duracao:.3f} s",
+    ]
+    if erro:
+        linhas.append(f"Erro:    {erro}")
+    if pico is not None:
+        linhas.append(f"Pico de memória rastreada: {pico / 2**20:.1f} MiB acima do início da chamada")
+        if not exclusiva:
+            # O pico é do processo: inclui o que outra execução alocou no mesmo intervalo
+            linhas.append("  (aproximado: outra execução perfilou memória ao mesmo tempo)")
+
+    if perfil is not None:
+        perfil.dump_stats(f"{base}.prof")
+        saida = io.StringIO()
+        pstats.Stats(perfil, stream=saida).strip_dirs().sort_stats("cumulative").print_stats(TOP_N)
+        linhas += ["", f"== Hotspots (top {TOP_N} por tempo acumulado; bruto em {base}.prof) ==", saida.getvalue()]
+
+    if alocacoes is not None:
+        linhas += ["", f"== Locais de alocação (top {TOP_N}, diferença durante a chamada) =="]
+        linhas += [str(estatistica) for estatistica in alocacoes[:TOP_N]]
+
+    caminho = f"{base}.txt"
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+    return caminho
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+singleflight.py
+===============
+Coalescência de chamadas concorrentes ("single-flight"): enquanto uma
+chamada para uma chave está em andamento, quem pedir a mesma chave espera
+por ela e recebe o mesmo resultado (ou a mesma exceção), em vez de
+repetir o trabalho — um crawl, uma página da SerpApi, uma cotação.
+
+- SingleFlight: threads (Streamlit, JobService, pools de executor)
+- SingleFlightAsync: corrotinas no mesmo event loop (API)
+
+Nada é guardado depois que a chamada termina; o cache continua sendo
+responsabilidade de quem chama (CacheTTL, histórico de tarifas).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable
+
+# Todos os grupos criados no processo (para expor estatísticas)
+_GRUPOS: list = []
+
+
+class SingleFlight:
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._lock = threading.Lock()
+        self._em_andamento: dict[Hashable, Future] = {}
+
+        self.execucoes = 0
+        self.compartilhadas = 0
+
+        _GRUPOS.append(self)
+
+    def executar(self, chave: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Executa `fn(*args, **kwargs)` uma única vez por chave em andamento."""
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = Future()
+                self._em_andamento[chave] = futuro
+                self.execucoes += 1
+            else:
+                self.compartilhadas += 1
+
+        if not dono:
+            return futuro.result()
+
+        try:
+            valor = fn(*args, **kwargs)
+            futuro.set_result(valor)
+            return valor
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+
+    def em_andamento(self) -> int:
+        with self._lock:
+            return len(self._em_andamento)
+
+    def estatisticas(self) -> dict[str, Any]:
+        return {
+            "grupo": self.nome,
+            "execucoes": self.execucoes,
+            "compartilhadas": self.compartilhadas,
+            "em_andamento": len(self._em_andamento),
+        }
+
+
+class SingleFlightAsync:
+    """
+    Versão para corrotinas. A tarefa compartilhada roda protegida por
+    asyncio.shield: cancelar um dos interessados não cancela os demais.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._em_andamento: dict[Hashable, asyncio.Task] = {}
+
+        self.execucoes = 0
+        self.compartilhadas = 0
+
+        _GRUPOS.append(self)
+
+    async def executar(self, chave: Hashable, fabrica: Callable[[], Awaitable[Any]]) -> Any:
+        """Aguarda `fabrica()` uma única vez por chave em andamento."""
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is not None:
+            self.compartilhadas += 1
+        else:
+            tarefa = asyncio.ensure_future(fabrica())
+            self._em_andamento[chave] = tarefa
+            self.execucoes += 1
+            tarefa.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+
+        return await asyncio.shield(tarefa)
+
+    def em_andamento(self) -> int:
+        return len(self._em_andamento)
+
+    def estatisticas(self) -> dict[str, Any]:
+        return {
+            "grupo": self.nome,
+            "execucoes": self.execucoes,
+            "compartilhadas": self.compartilhadas,
+            "em_andamento": len(self._em_andamento),
+        }
+
+
+def estatisticas_singleflight() -> list[dict[str, Any]]:
+    """Execuções e chamadas compartilhadas de todos os grupos do processo."""
+    return [g.estatisticas() for g in _GRUPOS]
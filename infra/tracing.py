@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+tracing.py
+==========
+Rastreamento leve do pipeline: coleta (página, rolagem, extração),
+parsing, otimização, hotéis e renderização.
+
+- span("nome", **atributos): context manager; o span atual fica num
+  ContextVar, então tarefas asyncio (gather, create_task, asyncio.run,
+  to_thread) herdam o pai sem nada explícito
+- @rastrear("nome"): o mesmo como decorator, para funções e corrotinas
+- spans fechados vão para um coletor em memória (limitado) e podem ser
+  exportados no formato Chrome trace (chrome://tracing, ui.perfetto.dev)
+- OTIMIZACAO_TRACE_DIR=dir grava {trace_id}.json de cada job ao terminar
+- OTIMIZACAO_TRACING=0 desliga tudo (span vira um no-op)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+HABILITADO = os.getenv("OTIMIZACAO_TRACING", "1") == "1"
+TRACE_DIR = os.getenv("OTIMIZACAO_TRACE_DIR", "")
+MAX_SPANS = int(os.getenv("OTIMIZACAO_TRACE_MAX_SPANS", "50000"))
+
+_IDS = itertools.count(1)
+
+
+def novo_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+@dataclass(slots=True)
+class Span:
+    nome: str
+    trace_id: str
+    span_id: int
+    pai_id: Optional[int]
+    inicio_ns: int
+    fim_ns: Optional[int] = None
+    atributos: dict = field(default_factory=dict)
+    # Linha do tempo no trace: a thread ou, dentro do event loop, a tarefa asyncio
+    faixa: int = 0
+    erro: Optional[str] = None
+
+    @property
+    def duracao_ms(self) -> float:
+        fim = self.fim_ns if self.fim_ns is not None else time.perf_counter_ns()
+        return (fim - self.inicio_ns) / 1e6
+
+    def definir(self, **atributos):
+        self.atributos.update(atributos)
+
+
+class _SpanNulo:
+    """Devolvido com o tracing desligado: mesma interface, nada é medido."""
+    trace_id = None
+    duracao_ms = 0.0
+
+    def definir(self, **atributos):
+        pass
+
+
+_SPAN_NULO = _SpanNulo()
+_span_atual: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span_atual", default=None)
+
+
+# -----------------------------
+# Coletor
+# -----------------------------
+class Coletor:
+    """Spans fechados do processo (os mais antigos saem quando enche)."""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def registrar(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, trace_id: Optional[str] = None) -> list[Span]:
+        with self._lock:
+            if trace_id is None:
+                return list(self._spans)
+            return [s for s in self._spans if s.trace_id == trace_id]
+
+    def limpar(self):
+        with self._lock:
+            self._spans.clear()
+
+
+_COLETOR = Coletor()
+
+
+def coletor() -> Coletor:
+    return _COLETOR
+
+
+# -----------------------------
+# Spans
+# -----------------------------
+def _faixa() -> int:
+    try:
+        tarefa = asyncio.current_task()
+    except RuntimeError:
+        tarefa = None
+    return id(tarefa) if tarefa is not None else threading.get_ident()
+
+
+@contextmanager
+def span(nome: str, trace_id: Optional[str] = None, **atributos) -> Iterator[Span]:
+    """
+    Mede o bloco como filho do span atual. `trace_id` só vale para um
+    span raiz (sem pai), para quem precisa conhecer o id antes de rodar.
+    """
+    if not HABILITADO:
+        yield _SPAN_NULO
+        return
+
+    pai = _span_atual.get()
+    s = Span(
+        nome=nome,
+        trace_id=pai.trace_id if pai is not None else (trace_id or novo_trace_id()),
+        span_id=next(_IDS),
+        pai_id=pai.span_id if pai is not None else None,
+        inicio_ns=time.perf_counter_ns(),
+        atributos=atributos,
+        faixa=_faixa(),
+    )
+    token = _span_atual.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.fim_ns = time.perf_counter_ns()
+        _span_atual.reset(token)
+        _COLETOR.registrar(s)
+
+
+def rastrear(nome: Optional[str] = None, **atributos):
+    """Decorator: cada chamada da função (ou corrotina) vira um span."""
+
+    def decorador(fn):
+        rotulo = nome or f"{fn.__module__}.{fn.__qualname__}"
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def envoltorio_async(*args, **kwargs):
+                with span(rotulo, **atributos):
+                    return await fn(*args, **kwargs)
+            return envoltorio_async
+
+        @functools.wraps(fn)
+        def envoltorio(*args, **kwargs):
+            with span(rotulo, **atributos):
+                return fn(*args, **kwargs)
+        return envoltorio
+
+    return decorador
+
+
+def span_atual() -> Optional[Span]:
+    return _span_atual.get()
+
+
+# -----------------------------
+# Consulta e exportação
+# -----------------------------
+def resumo_trace(trace_id: str) -> dict[str, Any]:
+    """
+    Tempo por etapa de um trace: chamadas, soma e maior duração por nome
+    de span, na ordem em que cada etapa começou. Etapas concorrentes
+    (várias páginas ao mesmo tempo) somam mais que o tempo de parede.
+    """
+    spans = _COLETOR.spans(trace_id)
+    if not spans:
+        return {"trace_id": trace_id, "total_ms": 0.0, "etapas": []}
+
+    por_nome = defaultdict(lambda: {"chamadas": 0, "soma_ms": 0.0, "max_ms": 0.0, "inicio": None, "erros": 0})
+    for s in spans:
+        etapa = por_nome[s.nome]
+        etapa["chamadas"] += 1
+        etapa["soma_ms"] += s.duracao_ms
+        etapa["max_ms"] = max(etapa["max_ms"], s.duracao_ms)
+        etapa["erros"] += s.erro is not None
+        if etapa["inicio"] is None or s.inicio_ns < etapa["inicio"]:
+            etapa["inicio"] = s.inicio_ns
+
+    raizes = [s for s in spans if s.pai_id is None]
+    inicio = min(s.inicio_ns for s in spans)
+    fim = max(s.fim_ns for s in spans)
+
+    etapas = [
+        {"etapa": n, **{k: v for k, v in e.items() if k != "inicio"}}
+        for n, e in sorted(por_nome.items(), key=lambda kv: kv[1]["inicio"])
+    ]
+    return {
+        "trace_id": trace_id,
+        "raiz": raizes[0].nome if raizes else None,
+        "total_ms": (fim - inicio) / 1e6,
+        "etapas": etapas,
+    }
+
+
+def exportar_chrome(trace_ids=None, caminho: Optional[str] = None) -> dict:
+    """
+    Spans no formato Chrome trace (eventos "X" em µs). Sem `trace_ids`,
+    exporta tudo o que está no coletor; com `caminho`, grava o JSON.
+    """
+    if isinstance(trace_ids, str):
+        trace_ids = [trace_ids]
+    spans = _COLETOR.spans() if trace_ids is None else [s for t in trace_ids for s in _COLETOR.spans(t)]
+
+    pid = os.getpid()
+    eventos = [
+        {
+            "name": s.nome,
+            "cat": s.nome.split(".")[0],
+            "ph": "X",
+            "ts": s.inicio_ns / 1000,
+            "dur": (s.fim_ns - s.inicio_ns) / 1000,
+            "pid": pid,
+            "tid": s.faixa,
+            "args": {
+                **{k: str(v) for k, v in s.atributos.items()},
+                "trace_id": s.trace_id,
+                **({"erro": s.erro} if s.erro else {}),
+            },
+        }
+        for s in spans
+    ]
+    trace = {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    if caminho:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(trace, f)
+    return trace
+
+
+def exportar_se_configurado(trace_id: Optional[str]):
+    """Grava {OTIMIZACAO_TRACE_DIR}/{trace_id}.json, se o diretório estiver configurado."""
+    if TRACE_DIR and trace_id:
+        try:
+            exportar_chrome(trace_id, os.path.join(TRACE_DIR, f"{trace_id}.json"))
+        except OSError as e:
+            print(f"[WARN] Falha ao gravar o trace {trace_id}: {e}")
@@ -0,0 +1,520 @@
+"""
+lote.py
+=======
+Otimização em lote, sem interface, para execuções agendadas (ex.: noturnas).
+
+    python lote.py rotas.csv --saida resultados.jsonl
+    python lote.py rotas.jsonl --saida resultados.parquet --processos 4 --coletas 4
+
+Cada linha da entrada (CSV com cabeçalho ou JSONL) é uma rota:
+origem, destino, data (ISO), perfil, orcamento, tempo_max e, opcionalmente,
+janela_dias. Perfil, orçamento e tempo máximo têm os mesmos padrões da API.
+
+- Coleta: um único Chromium (PoolNavegadores) para o lote todo; linhas com a
+  mesma (origem, destino, data, janela) dividem um único crawl, e
+  --reuso-historico reaproveita coletas recentes do histórico de tarifas.
+- Otimização: NSGA-II num pool de processos, enquanto as próximas coletas
+  seguem no event loop.
+- Saída: cada rota é gravada assim que termina (JSONL, uma linha por rota,
+  ou Parquet, em partes dentro do diretório de saída). A própria saída é o
+  checkpoint: rodar de novo o mesmo comando pula as rotas já gravadas
+  (--repetir-erros refaz as que falharam ou voltaram sem alternativas; vale
+  o último registro de cada id).
+
+O progresso (rotas/min e tempo restante) sai a cada --intervalo segundos.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+
+from domain.models import resultado_para_dict
+from infra.metricas import contador, gravar_arquivo_configurado, histograma
+
+PERFIS = ("Mais barato", "Equilibrado", "Mais rápido")
+
+# Mesmos padrões do POST /jobs da API
+PADROES = {"perfil": "Equilibrado", "orcamento": 6000.0, "tempo_max": 30.0, "janela_dias": 0}
+
+# Registros por arquivo de parte na saída Parquet
+LINHAS_POR_PARTE = int(os.getenv("OTIMIZACAO_LOTE_LINHAS_PARTE", "500"))
+
+ROTAS_LOTE = contador("lote_rotas_total", "Rotas processadas pelo modo em lote, por status", ("status",))
+DURACAO_ROTA_LOTE = histograma("lote_rota_segundos", "Tempo de uma rota no lote (coleta compartilhada + otimização)")
+
+OK = "ok"
+SEM_ALTERNATIVAS = "sem_alternativas"
+ERRO = "erro"
+
+# Refeitos com --repetir-erros: uma coleta vazia pode ser bloqueio ou página
+# que não carregou, não necessariamente rota sem voos
+REPETIVEIS = frozenset({ERRO, SEM_ALTERNATIVAS})
+
+
+@dataclass(frozen=True)
+class LinhaLote:
+    linha: int
+    origem: str
+    destino: str
+    data: str
+    perfil: str
+    orcamento: float
+    tempo_max: float
+    janela_dias: int
+
+    @property
+    def id(self) -> str:
+        """Identifica a rota pelos parâmetros: linhas repetidas viram uma só."""
+        chave = json.dumps(
+            [self.origem.upper(), self.destino.upper(), self.data, self.perfil,
+             self.orcamento, self.tempo_max, self.janela_dias],
+            ensure_ascii=False
+        )
+        return hashlib.blake2b(chave.encode("utf-8"), digest_size=8).hexdigest()
+
+    def parametros(self) -> dict:
+        return {
+            "id": self.id, "linha": self.linha, "origem": self.origem, "destino": self.destino,
+            "data": self.data, "perfil": self.perfil, "orcamento": self.orcamento,
+            "tempo_max": self.tempo_max, "janela_dias": self.janela_dias,
+        }
+
+
+# =========================================================
+# ENTRADA
+# =========================================================
+def _numero(valor, tipo):
+    if isinstance(valor, str):
+        valor = valor.strip()
+        # "6000,50" (planilhas em pt-BR)
+        if "," in valor and "." not in valor:
+            valor = valor.replace(",", ".")
+    return tipo(valor)
+
+
+def _perfil(valor):
+    for perfil in PERFIS:
+        if perfil.casefold() == str(valor).strip().casefold():
+            return perfil
+    raise ValueError(f"perfil inválido {valor!r} (use {', '.join(PERFIS)})")
+
+
+def _interpretar_linha(numero, bruto) -> LinhaLote:
+    campos = {str(k).strip().lower(): v for k, v in bruto.items() if k is not None and v not in (None, "")}
+    data = campos.get("data", campos.get("data_partida"))
+    if not campos.get("origem") or not campos.get("destino") or not data:
+        raise ValueError("origem, destino e data são obrigatórios")
+
+    linha = LinhaLote(
+        linha=numero,
+        origem=str(campos["origem"]).strip(),
+        destino=str(campos["destino"]).strip(),
+        data=date.fromisoformat(str(data).strip()).isoformat(),
+        perfil=_perfil(campos.get("perfil", PADROES["perfil"])),
+        orcamento=_numero(campos.get("orcamento", PADROES["orcamento"]), float),
+        tempo_max=_numero(campos.get("tempo_max", PADROES["tempo_max"]), float),
+        janela_dias=_numero(campos.get("janela_dias", PADROES["janela_dias"]), int),
+    )
+    if linha.orcamento <= 0 or linha.tempo_max <= 0:
+        raise ValueError("orcamento e tempo_max devem ser positivos")
+    if not 0 <= linha.janela_dias <= 7:
+        raise ValueError("janela_dias deve estar entre 0 e 7")
+    return linha
+
+
+def _registros_entrada(caminho):
+    """(número da linha no arquivo, dict) de um CSV com cabeçalho ou de um JSONL."""
+    if caminho.lower().endswith((".jsonl", ".ndjson")):
+        with open(caminho, encoding="utf-8") as f:
+            for numero, texto in enumerate(f, start=1):
+                if texto.strip():
+                    yield numero, json.loads(texto)
+        return
+
+    with open(caminho, encoding="utf-8-sig", newline="") as f:
+        # Aceita vírgula, ponto e vírgula (Excel em pt-BR) ou tab
+        try:
+            dialeto = csv.Sniffer().sniff(f.readline(), delimiters=",;\t")
+        except csv.Error:
+            dialeto = csv.excel
+        f.seek(0)
+        for numero, registro in enumerate(csv.DictReader(f, dialect=dialeto), start=2):
+            yield numero, registro
+
+
+def ler_entrada(caminho):
+    """Linhas válidas (sem repetições) e quantas foram descartadas."""
+    linhas, vistos, invalidas = [], set(), 0
+    for numero, bruto in _registros_entrada(caminho):
+        try:
+            linha = _interpretar_linha(numero, bruto)
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"[WARN] Linha {numero} ignorada: {e}")
+            invalidas += 1
+            continue
+        if linha.id not in vistos:
+            vistos.add(linha.id)
+            linhas.append(linha)
+    return linhas, invalidas
+
+
+# =========================================================
+# SAÍDA (também é o checkpoint)
+# =========================================================
+class SaidaJSONL:
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = None
+
+    def concluidos(self, repetir_erros=False) -> set:
+        if not os.path.exists(self.caminho):
+            return set()
+
+        # Interrupção no meio de uma gravação deixa a última linha pela metade
+        with open(self.caminho, "rb+") as f:
+            conteudo = f.read()
+            if conteudo and not conteudo.endswith(b"\n"):
+                f.truncate(conteudo.rfind(b"\n") + 1)
+                conteudo = conteudo[:conteudo.rfind(b"\n") + 1]
+
+        status = {}
+        for texto in conteudo.decode("utf-8").splitlines():
+            if texto.strip():
+                registro = json.loads(texto)
+                status[registro["id"]] = registro["status"]
+        return {i for i, s in status.items() if not (repetir_erros and s in REPETIVEIS)}
+
+    def escrever(self, registro):
+        if self._arquivo is None:
+            pasta = os.path.dirname(self.caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+
+    def fechar(self):
+        if self._arquivo is not None:
+            os.fsync(self._arquivo.fileno())
+            self._arquivo.close()
+            self._arquivo = None
+
+
+class SaidaParquet:
+    """
+    Diretório com arquivos parte-*.parquet (lido como um único dataset pelo
+    pyarrow/pandas/DuckDB). Cada parte é gravada de uma vez (arquivo
+    temporário + rename), então uma interrupção perde no máximo o buffer.
+    """
+
+    def __init__(self, caminho, linhas_por_parte=LINHAS_POR_PARTE):
+        self.caminho = caminho
+        self.linhas_por_parte = linhas_por_parte
+        self._buffer = []
+        self._execucao = time.strftime("%Y%m%dT%H%M%S")
+        self._partes = 0
+
+    @staticmethod
+    def _esquema():
+        import pyarrow as pa
+
+        alternativa = pa.struct([
+            ("tempo", pa.float64()), ("preco", pa.float64()), ("conexoes", pa.int32()),
+            ("saida", pa.string()), ("chegada", pa.string()), ("tempo_total", pa.string()),
+            ("preco_str", pa.string()), ("moeda", pa.string()), ("data_partida", pa.string()),
+            ("roteiro", pa.list_(pa.struct([("etapa", pa.string()), ("ordem", pa.int32())]))),
+        ])
+        return pa.schema([
+            ("id", pa.string()), ("linha", pa.int64()),
+            ("origem", pa.string()), ("destino", pa.string()), ("data", pa.string()),
+            ("perfil", pa.string()), ("orcamento", pa.float64()), ("tempo_max", pa.float64()),
+            ("janela_dias", pa.int32()),
+            ("status", pa.string()), ("erro", pa.string()), ("mensagem", pa.string()),
+            ("n_alternativas", pa.int32()),
+            ("alternativa_escolhida", alternativa), ("pareto", pa.list_(alternativa)),
+            ("coleta_s", pa.float64()), ("otimizacao_s", pa.float64()), ("concluido_em", pa.string()),
+        ])
+
+    def concluidos(self, repetir_erros=False) -> set:
+        if not os.path.isdir(self.caminho):
+            return set()
+        import pyarrow.parquet as pq
+
+        status = {}
+        for nome in sorted(os.listdir(self.caminho)):
+            if nome.startswith("parte-") and nome.endswith(".parquet"):
+                tabela = pq.read_table(os.path.join(self.caminho, nome), columns=["id", "status"])
+                status.update(zip(tabela.column("id").to_pylist(), tabela.column("status").to_pylist()))
+        return {i for i, s in status.items() if not (repetir_erros and s in REPETIVEIS)}
+
+    def escrever(self, registro):
+        self._buffer.append(registro)
+        if len(self._buffer) >= self.linhas_por_parte:
+            self._gravar_parte()
+
+    def _gravar_parte(self):
+        if not self._buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(self.caminho, exist_ok=True)
+        self._partes += 1
+        caminho = os.path.join(self.caminho, f"parte-{self._execucao}-{self._partes:05d}.parquet")
+        pq.write_table(pa.Table.from_pylist(self._buffer, schema=self._esquema()), caminho + ".tmp")
+        os.replace(caminho + ".tmp", caminho)
+        self._buffer = []
+
+    def fechar(self):
+        self._gravar_parte()
+
+
+def abrir_saida(caminho, formato=None):
+    formato = formato or ("parquet" if caminho.rstrip("/").lower().endswith(".parquet") else "jsonl")
+    return SaidaParquet(caminho) if formato == "parquet" else SaidaJSONL(caminho)
+
+
+# =========================================================
+# OTIMIZAÇÃO (processos do pool)
+# =========================================================
+def _otimizar_em_processo(alternativas, perfil, tempo_max, orcamento, rota_idx, incluir_pareto):
+    """Roda no processo filho; devolve só o dict (o AlternativaSet não volta)."""
+    from services.optimization_service import OptimizationService
+
+    inicio = time.perf_counter()
+    resultado = OptimizationService.otimizar(alternativas, perfil, tempo_max, orcamento, rota_idx)
+    if resultado is None:
+        resultado = OptimizationService.resultado_sem_alternativas(rota_idx, perfil, tempo_max, orcamento)
+    return resultado_para_dict(resultado, incluir_pareto), time.perf_counter() - inicio
+
+
+def _aquecer_processo():
+    # pymoo/scipy carregam uma vez por processo, antes da primeira rota
+    import optimization.nsga2_solver  # noqa: F401
+
+
+# =========================================================
+# EXECUÇÃO
+# =========================================================
+class ExecucaoLote:
+
+    def __init__(self, linhas, saida, processos, coletas, reuso_historico_s, incluir_pareto, intervalo_s):
+        self.linhas = linhas
+        self.saida = saida
+        self.processos = processos
+        self.coletas = coletas
+        self.reuso_historico_s = reuso_historico_s
+        self.incluir_pareto = incluir_pareto
+        self.intervalo_s = intervalo_s
+
+        self.por_status = defaultdict(int)
+        self.crawls = 0
+        self.inicio = None
+        self._executor = None
+        self._pool = None
+        # Limita otimizações pendentes: a coleta espera quando a CPU não acompanha
+        self._vagas = asyncio.Semaphore(processos * 2)
+        self._pendentes = set()
+
+    @property
+    def processadas(self):
+        return sum(self.por_status.values())
+
+    async def executar(self):
+        # Playwright e RouteService só carregam se houver o que processar
+        from crawler.browser_pool import PoolNavegadores
+
+        self.inicio = time.perf_counter()
+        grupos = defaultdict(list)
+        for linha in self.linhas:
+            grupos[(linha.origem.upper(), linha.destino.upper(), linha.data, linha.janela_dias)].append(linha)
+
+        fila = asyncio.Queue()
+        for grupo in grupos.values():
+            fila.put_nowait(grupo)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processos,
+            # fork com as threads do Playwright/asyncio no processo pai não é seguro
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_aquecer_processo
+        )
+        progresso = asyncio.create_task(self._reportar())
+        try:
+            async with PoolNavegadores() as self._pool:
+                coletores = [asyncio.create_task(self._coletor(fila)) for _ in range(self.coletas)]
+                await asyncio.gather(*coletores)
+                await asyncio.gather(*self._pendentes)
+        finally:
+            progresso.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.saida.fechar()
+
+    async def _coletor(self, fila):
+        while not fila.empty():
+            await self._processar_grupo(fila.get_nowait())
+
+    async def _processar_grupo(self, grupo):
+        from services.optimization_service import OptimizationService
+        from services.route_service import RouteService
+
+        primeira = grupo[0]
+        inicio = time.perf_counter()
+        try:
+            alternativas = await RouteService.buscar_alternativas_async(
+                primeira.origem, primeira.destino, primeira.data, primeira.janela_dias,
+                max_idade_historico_s=self.reuso_historico_s, pool=self._pool
+            )
+        except Exception as e:
+            print(f"[ERRO] Coleta {primeira.origem} → {primeira.destino} ({primeira.data}): {e}")
+            for linha in grupo:
+                self._registrar(linha, ERRO, erro=f"coleta: {e}", coleta_s=time.perf_counter() - inicio)
+            return
+        self.crawls += 1
+        coleta_s = time.perf_counter() - inicio
+
+        for linha in grupo:
+            if not alternativas:
+                resultado = OptimizationService.resultado_sem_alternativas(
+                    linha.linha, linha.perfil, linha.tempo_max, linha.orcamento
+                )
+                self._registrar(linha, SEM_ALTERNATIVAS, resultado_para_dict(resultado, False), coleta_s=coleta_s)
+                continue
+            await self._vagas.acquire()
+            tarefa = asyncio.create_task(self._otimizar(linha, alternativas, coleta_s))
+            self._pendentes.add(tarefa)
+            tarefa.add_done_callback(self._pendentes.discard)
+
+    async def _otimizar(self, linha, alternativas, coleta_s):
+        try:
+            resultado, otimizacao_s = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _otimizar_em_processo,
+                alternativas, linha.perfil, linha.tempo_max, linha.orcamento, linha.linha, self.incluir_pareto
+            )
+        except Exception as e:
+            print(f"[ERRO] Otimização da linha {linha.linha}: {e}")
+            self._registrar(linha, ERRO, erro=f"otimização: {e}", coleta_s=coleta_s)
+        else:
+            status = OK if resultado["alternativa_escolhida"] is not None else SEM_ALTERNATIVAS
+            self._registrar(linha, status, resultado=resultado, coleta_s=coleta_s, otimizacao_s=otimizacao_s)
+        finally:
+            self._vagas.release()
+
+    def _registrar(self, linha, status, resultado=None, erro=None, coleta_s=None, otimizacao_s=None):
+        resultado = resultado or {}
+        registro = {
+            **linha.parametros(),
+            "status": status,
+            "erro": erro,
+            "mensagem": resultado.get("mensagem"),
+            "n_alternativas": resultado.get("n_alternativas"),
+            "alternativa_escolhida": resultado.get("alternativa_escolhida"),
+            "pareto": resultado.get("pareto") if self.incluir_pareto else None,
+            "coleta_s": coleta_s,
+            "otimizacao_s": otimizacao_s,
+            "concluido_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.saida.escrever(registro)
+        self.por_status[status] += 1
+        ROTAS_LOTE.inc(status=status)
+        DURACAO_ROTA_LOTE.observar((coleta_s or 0.0) + (otimizacao_s or 0.0))
+
+    def rotas_por_minuto(self):
+        decorrido = time.perf_counter() - self.inicio if self.inicio is not None else 0.0
+        return self.processadas / decorrido * 60 if decorrido > 0 else 0.0
+
+    async def _reportar(self):
+        while True:
+            await asyncio.sleep(self.intervalo_s)
+            print(f"[INFO] {self.linha_progresso()}", flush=True)
+
+    def linha_progresso(self):
+        total, feitas = len(self.linhas), self.processadas
+        taxa = self.rotas_por_minuto()
+        restante = f"{(total - feitas) / taxa:.1f} min" if taxa > 0 else "?"
+        return (
+            f"{feitas}/{total} rotas ({feitas / max(total, 1):.0%}) · {taxa:.1f} rotas/min · "
+            f"{self.crawls} coletas · {self.por_status[ERRO]} erros · restante ~{restante}"
+        )
+
+
+# =========================================================
+# CLI
+# =========================================================
+def _argumentos(argv=None):
+    from services.route_service import REUSO_HISTORICO_S
+
+    parser = argparse.ArgumentParser(description="Otimiza em lote as rotas de um CSV/JSONL.")
+    parser.add_argument("entrada", help="CSV com cabeçalho ou JSONL (origem, destino, data, perfil, orcamento, tempo_max)")
+    parser.add_argument("--saida", required=True, help="arquivo .jsonl ou diretório .parquet (também é o checkpoint)")
+    parser.add_argument("--formato", choices=("jsonl", "parquet"), help="padrão: pela extensão da saída")
+    parser.add_argument("--processos", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="processos de otimização (padrão: núcleos - 1)")
+    parser.add_argument("--coletas", type=int, default=4, help="coletas simultâneas no navegador compartilhado")
+    parser.add_argument("--reuso-historico", type=float, default=REUSO_HISTORICO_S, metavar="SEGUNDOS",
+                        help="reaproveita coletas do histórico de tarifas com até essa idade (0 = sempre coleta)")
+    parser.add_argument("--pareto", action="store_true", help="grava também a fronteira de Pareto de cada rota")
+    parser.add_argument("--repetir-erros", action="store_true", help="na retomada, refaz as rotas que falharam ou voltaram sem alternativas")
+    parser.add_argument("--intervalo", type=float, default=30, help="segundos entre as linhas de progresso")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+
+    linhas, invalidas = ler_entrada(args.entrada)
+    saida = abrir_saida(args.saida, args.formato)
+    concluidos = saida.concluidos(args.repetir_erros)
+    pendentes = [l for l in linhas if l.id not in concluidos]
+
+    print(
+        f"[INFO] {len(linhas)} rotas na entrada ({invalidas} linhas inválidas); "
+        f"{len(linhas) - len(pendentes)} já na saída, {len(pendentes)} a processar"
+    )
+    if not pendentes:
+        return 0
+
+    execucao = ExecucaoLote(
+        pendentes, saida, args.processos, args.coletas, args.reuso_historico, args.pareto, args.intervalo
+    )
+
+    async def rodar():
+        tarefa = asyncio.current_task()
+        # SIGTERM (cron/systemd) encerra como Ctrl+C: grava o que já terminou
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, tarefa.cancel)
+        except NotImplementedError:
+            pass  # Windows
+        await execucao.executar()
+
+    try:
+        asyncio.run(rodar())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print(f"[WARN] Interrompido: {execucao.linha_progresso()}. Rode de novo para continuar.")
+        return 130
+    finally:
+        gravar_arquivo_configurado()
+
+    decorrido = time.perf_counter() - execucao.inicio
+    print(
+        f"[INFO] Lote concluído em {decorrido / 60:.1f} min: {execucao.rotas_por_minuto():.1f} rotas/min · "
+        + " · ".join(f"{s}: {n}" for s, n in sorted(execucao.por_status.items()))
+        + f" · {execucao.crawls} coletas"
+    )
+    return 1 if execucao.por_status[ERRO] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
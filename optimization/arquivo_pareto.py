@@ -0,0 +1,207 @@
+"""
+Arquivo de Pareto incremental em (preço, tempo, conexões), todos minimizados.
+
+Conexões assumem poucos valores inteiros (0, 1, 2...), então o arquivo
+guarda uma "escada" 2D por nível de conexões: listas ordenadas por preço
+crescente com tempo estritamente decrescente. Numa escada assim:
+
+- o menor tempo entre os pontos com preço <= p é o do último ponto com
+  preço <= p (um bisect), então checar se p é dominado custa
+  O(níveis · log n);
+- os pontos que p domina num nível formam uma faixa contígua (preço >= p
+  e tempo >= p), removida com dois bisects e um `del` de fatia.
+
+Assim cada inserção evita recalcular a fronteira inteira (np.unique +
+NSGA-II) quando chegam alternativas novas (crawl em andamento, outras
+datas, cache renovado).
+"""
+
+import bisect
+import json
+import threading
+
+import numpy as np
+
+from domain.models import Alternativa, AlternativaSet
+
+
+class _Escada:
+    """Pontos mutuamente não dominados de um nível de conexões."""
+
+    __slots__ = ("precos", "tempos_neg", "chaves")
+
+    def __init__(self):
+        self.precos = []        # crescente
+        self.tempos_neg = []    # -tempo, crescente (tempo decrescente)
+        self.chaves = []
+
+    def __len__(self):
+        return len(self.precos)
+
+    def menor_tempo_ate(self, preco):
+        """Menor tempo entre os pontos com preço <= `preco` (inf se nenhum)."""
+        i = bisect.bisect_right(self.precos, preco)
+        return -self.tempos_neg[i - 1] if i else float("inf")
+
+    def faixa_dominada(self, preco, tempo):
+        """Fatia [i, j) dos pontos com preço >= `preco` e tempo >= `tempo`."""
+        i = bisect.bisect_left(self.precos, preco)
+        j = bisect.bisect_right(self.tempos_neg, -tempo, lo=i)
+        return i, j
+
+
+class ArquivoPareto:
+
+    def __init__(self):
+        self._niveis = {}       # conexoes -> _Escada
+        self._lock = threading.RLock()
+        self.versao = 0         # incrementa a cada mudança na fronteira
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(e) for e in self._niveis.values())
+
+    # -----------------------------
+    # Inserção
+    # -----------------------------
+    def dominado(self, preco, tempo, conexoes) -> bool:
+        """True se algum ponto do arquivo domina (ou é igual a) o ponto dado."""
+        with self._lock:
+            return any(
+                escada.menor_tempo_ate(preco) <= tempo
+                for c, escada in self._niveis.items() if c <= conexoes
+            )
+
+    def inserir(self, preco, tempo, conexoes, chave=None) -> bool:
+        """
+        Insere o ponto se não for dominado, removendo os que ele domina.
+        Retorna True se o ponto entrou na fronteira. Pontos com objetivos
+        idênticos a um já arquivado são descartados (fica o primeiro).
+        """
+        preco, tempo, conexoes = float(preco), float(tempo), int(conexoes)
+        with self._lock:
+            if self.dominado(preco, tempo, conexoes):
+                return False
+
+            for c, escada in self._niveis.items():
+                if c >= conexoes:
+                    i, j = escada.faixa_dominada(preco, tempo)
+                    if i < j:
+                        del escada.precos[i:j], escada.tempos_neg[i:j], escada.chaves[i:j]
+
+            escada = self._niveis.get(conexoes)
+            if escada is None:
+                escada = self._niveis[conexoes] = _Escada()
+            i = bisect.bisect_left(escada.precos, preco)
+            escada.precos.insert(i, preco)
+            escada.tempos_neg.insert(i, -tempo)
+            escada.chaves.insert(i, chave)
+
+            self.versao += 1
+            return True
+
+    def inserir_lote(self, objetivos, chaves=None) -> int:
+        """
+        Insere uma matriz (n, 3) [preco, tempo, conexoes]; retorna quantos
+        pontos entraram. A ordem lexicográfica faz quase nenhum ponto
+        inserido ser removido logo depois.
+        """
+        objetivos = np.asarray(objetivos, dtype=np.float64).reshape(-1, 3)
+        chaves = list(range(len(objetivos))) if chaves is None else list(chaves)
+        ordem = np.lexsort((objetivos[:, 1], objetivos[:, 0], objetivos[:, 2]))
+
+        with self._lock:
+            return sum(
+                self.inserir(*objetivos[i], chave=chaves[i]) for i in ordem.tolist()
+            )
+
+    def inserir_alternativas(self, alternativas: AlternativaSet) -> int:
+        """Insere todas as linhas do conjunto; as chaves são as próprias Alternativa."""
+        return self.inserir_lote(alternativas.objetivos(), list(alternativas))
+
+    # -----------------------------
+    # Consultas
+    # -----------------------------
+    def fronteira(self, orcamento=None, tempo_max=None, max_conexoes=None):
+        """
+        Pontos da fronteira dentro dos limites: lista de
+        (preco, tempo, conexoes, chave), ordenada por conexões e preço.
+        """
+        orcamento = float("inf") if orcamento is None else orcamento
+        tempo_max = float("inf") if tempo_max is None else tempo_max
+
+        pontos = []
+        with self._lock:
+            for c in sorted(self._niveis):
+                if max_conexoes is not None and c > max_conexoes:
+                    break
+                escada = self._niveis[c]
+                # Preço <= orçamento é um prefixo; tempo <= tempo_max um sufixo
+                fim = bisect.bisect_right(escada.precos, orcamento)
+                inicio = bisect.bisect_left(escada.tempos_neg, -tempo_max, hi=fim)
+                pontos.extend(
+                    (escada.precos[i], -escada.tempos_neg[i], c, escada.chaves[i])
+                    for i in range(inicio, fim)
+                )
+        return pontos
+
+    def snapshot(self, **limites):
+        """(objetivos (n, 3) float64, chaves) da fronteira — cópia independente do arquivo."""
+        pontos = self.fronteira(**limites)
+        objetivos = np.array([p[:3] for p in pontos], dtype=np.float64).reshape(-1, 3)
+        return objetivos, [p[3] for p in pontos]
+
+    def alternativas(self, **limites) -> AlternativaSet:
+        """Fronteira como AlternativaSet (chaves precisam ser Alternativa)."""
+        _, chaves = self.snapshot(**limites)
+        if not chaves:
+            return AlternativaSet.vazio()
+
+        # Agrupa pelas linhas de cada conjunto de origem para um único selecionar por conjunto
+        por_conjunto = {}
+        for a in chaves:
+            por_conjunto.setdefault(id(a._conjunto), (a._conjunto, []))[1].append(a.indice)
+        return AlternativaSet.concatenar([
+            conjunto.selecionar(np.array(indices, dtype=np.intp))
+            for conjunto, indices in por_conjunto.values()
+        ])
+
+    # -----------------------------
+    # Serialização
+    # -----------------------------
+    def para_dict(self, serializar_chave=None):
+        """
+        Fronteira em tipos nativos (JSON). Sem `serializar_chave`, chaves
+        Alternativa viram o dict de Alternativa.para_dict e as demais são
+        gravadas como estão (precisam ser serializáveis em JSON).
+        """
+        objetivos, chaves = self.snapshot()
+        dados = {"objetivos": objetivos.tolist()}
+        if serializar_chave is None and chaves and all(isinstance(c, Alternativa) for c in chaves):
+            dados["tipo_chaves"] = "alternativa"
+            serializar_chave = Alternativa.para_dict
+        serializar_chave = serializar_chave or (lambda c: c)
+        dados["chaves"] = [serializar_chave(c) for c in chaves]
+        return dados
+
+    @classmethod
+    def de_dict(cls, dados, desserializar_chave=None):
+        if desserializar_chave is None and dados.get("tipo_chaves") == "alternativa":
+            # Um único AlternativaSet para todas as chaves (alternativas() agrupa por conjunto)
+            chaves = list(AlternativaSet.de_registros(dados["chaves"]))
+        else:
+            desserializar_chave = desserializar_chave or (lambda c: c)
+            chaves = [desserializar_chave(c) for c in dados["chaves"]]
+
+        arquivo = cls()
+        arquivo.inserir_lote(dados["objetivos"], chaves)
+        return arquivo
+
+    def salvar(self, caminho, serializar_chave=None):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.para_dict(serializar_chave), f, ensure_ascii=False)
+
+    @classmethod
+    def carregar(cls, caminho, desserializar_chave=None):
+        with open(caminho, encoding="utf-8") as f:
+            return cls.de_dict(json.load(f), desserializar_chave)
@@ -0,0 +1,169 @@
+"""
+Itinerários com vários trechos (A→B, B→C, ...) sobre um grafo expandido
+no tempo (networkx).
+
+- Cada voo é uma aresta até um nó de chegada próprio.
+- Em cada escala há uma cadeia de espera: nós ordenados por horário
+  (horários de embarque possíveis e de partida dos voos seguintes) ligados
+  em sequência. Uma chegada entra na cadeia no horário chegada + conexão
+  mínima, então só alcança voos que partem depois disso.
+- O grafo é acíclico (o tempo só avança), então os k melhores caminhos
+  saem de uma única passada em ordem topológica guardando os k menores
+  custos de cada nó — O(arestas · k log k), sem os desvios do algoritmo
+  de Yen.
+
+Custo = soma dos preços + valor_hora · (horas de voo + horas de espera).
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+from domain.models import Alternativa, AlternativaSet
+from domain.parsers import parse_horarios
+from optimization.prefiltro import indices_unicos
+
+# Mesmo valor da hora do perfil "Equilibrado" do solver (R$/hora)
+VALOR_HORA_PADRAO = 300.0
+CONEXAO_MINIMA_H = 2.0
+
+_ORIGEM = ("origem",)
+_DESTINO = ("destino",)
+
+
+@dataclass(frozen=True, slots=True)
+class Itinerario:
+    trechos: Tuple[Alternativa, ...]
+    preco: float
+    tempo: float        # horas de voo + horas de espera
+    espera: float       # horas paradas nas escalas entre trechos
+    custo: float
+
+
+def horarios_absolutos(alternativas: AlternativaSet, data_padrao: Optional[str] = None):
+    """
+    (partidas, chegadas) em minutos desde 1970-01-01, no horário local de
+    cada aeroporto. A data vem da coluna data_partida (ou `data_padrao`);
+    sem horário de chegada legível, usa partida + duração do voo.
+    """
+    datas = [d or data_padrao for d in alternativas.data_partida]
+    dias = np.array(datas, dtype="datetime64[D]")
+    base = np.where(np.isnat(dias), np.nan, dias.astype("datetime64[m]").astype(np.int64).astype(np.float64))
+
+    partidas = base + parse_horarios(alternativas.saida)
+    chegadas = base + parse_horarios(alternativas.chegada)
+
+    sem_chegada = np.isnan(chegadas)
+    chegadas[sem_chegada] = partidas[sem_chegada] + alternativas.tempo[sem_chegada] * 60
+    return partidas, chegadas
+
+
+def montar_grafo(trechos: Sequence[AlternativaSet], horarios,
+                 conexao_minima_h=CONEXAO_MINIMA_H, valor_hora=VALOR_HORA_PADRAO) -> nx.DiGraph:
+    """
+    Grafo expandido no tempo. `horarios` é a lista de (partidas, chegadas)
+    de cada trecho (horarios_absolutos). As arestas têm `peso` e, nas de
+    voo, `voo` = (trecho, índice).
+    """
+    G = nx.DiGraph()
+    ultimo = len(trechos) - 1
+    prontos = validos_anteriores = None
+
+    for t, (alternativas, (partidas, chegadas)) in enumerate(zip(trechos, horarios)):
+        validos = np.flatnonzero(~np.isnan(partidas))
+
+        if t == 0:
+            # Primeiro trecho: qualquer voo pode abrir o itinerário
+            embarques = {int(j): _ORIGEM for j in validos}
+        else:
+            cadeia = np.unique(np.concatenate([prontos[validos_anteriores], partidas[validos]]))
+
+            # Cadeia de espera da escala
+            for a, b in zip(cadeia[:-1], cadeia[1:]):
+                G.add_edge(("escala", t, a), ("escala", t, b), peso=valor_hora * (b - a) / 60, voo=None)
+
+            for j in validos_anteriores:
+                G.add_edge(("chegada", t - 1, int(j)), ("escala", t, prontos[j]),
+                           peso=valor_hora * conexao_minima_h, voo=None)
+            embarques = {int(j): ("escala", t, partidas[j]) for j in validos}
+
+        for j, embarque in embarques.items():
+            chegada = ("chegada", t, j)
+            peso = float(alternativas.preco[j]) + valor_hora * float(alternativas.tempo[j])
+            G.add_edge(embarque, chegada, peso=peso, voo=(t, j))
+            if t == ultimo:
+                G.add_edge(chegada, _DESTINO, peso=0.0, voo=None)
+
+        prontos = chegadas + conexao_minima_h * 60
+        validos_anteriores = validos
+
+    return G
+
+
+def k_melhores_caminhos(G: nx.DiGraph, k: int):
+    """
+    Os k caminhos de menor peso origem→destino num DAG: cada nó guarda
+    até k rótulos (custo, predecessor, rótulo do predecessor).
+    """
+    if _DESTINO not in G:
+        return []
+
+    rotulos = {_ORIGEM: [(0.0, None, None)]}
+    for v in nx.topological_sort(G):
+        if v == _ORIGEM:
+            continue
+        candidatos = (
+            (custo + dados["peso"], u, r)
+            for u, dados in G.pred[v].items()
+            for r, (custo, _, _) in enumerate(rotulos.get(u, ()))
+        )
+        melhores = heapq.nsmallest(k, candidatos, key=lambda c: c[0])
+        if melhores:
+            rotulos[v] = melhores
+
+    caminhos = []
+    for custo, u, r in rotulos.get(_DESTINO, []):
+        caminho = [_DESTINO]
+        while u is not None:
+            caminho.append(u)
+            _, u, r = rotulos[u][r]
+        caminhos.append((custo, caminho[::-1]))
+    return caminhos
+
+
+def k_melhores_itinerarios(trechos: Sequence[AlternativaSet], k=5, datas=None,
+                           conexao_minima_h=CONEXAO_MINIMA_H, valor_hora=VALOR_HORA_PADRAO):
+    """
+    Os k itinerários de menor custo que encadeiam um voo de cada trecho
+    respeitando a conexão mínima entre chegada e próxima partida.
+    `datas` (ISO, uma por trecho) completa alternativas sem data_partida.
+    """
+    if not trechos or any(len(a) == 0 for a in trechos):
+        return []
+
+    # O Rome2Rio repete o mesmo horário em vários cards: sem isso cada cópia
+    # vira um nó paralelo e os k melhores saem como o mesmo itinerário k vezes
+    trechos = [a.selecionar(indices_unicos(a)) for a in trechos]
+
+    datas = datas or [None] * len(trechos)
+    horarios = [horarios_absolutos(a, d) for a, d in zip(trechos, datas)]
+    G = montar_grafo(trechos, horarios, conexao_minima_h, valor_hora)
+
+    itinerarios = []
+    for custo, caminho in k_melhores_caminhos(G, k):
+        voos = [G.edges[u, v]["voo"] for u, v in zip(caminho[:-1], caminho[1:])]
+        indices = [j for _, j in sorted(v for v in voos if v is not None)]
+        escolhidos = tuple(trechos[t][j] for t, j in enumerate(indices))
+
+        # Espera = próxima partida - chegada anterior, no relógio local da escala
+        espera = sum(
+            horarios[t + 1][0][indices[t + 1]] - horarios[t][1][indices[t]]
+            for t in range(len(indices) - 1)
+        ) / 60
+        preco = sum(a.preco for a in escolhidos)
+        tempo = sum(a.tempo for a in escolhidos) + espera
+        itinerarios.append(Itinerario(escolhidos, preco, float(tempo), float(espera), float(custo)))
+    return itinerarios
@@ -1,9 +1,21 @@
+from types import SimpleNamespace
+
 import numpy as np
 from pymoo.core.problem import Problem
 from pymoo.algorithms.moo.nsga2 import NSGA2
 from pymoo.optimize import minimize
 from pymoo.termination import get_termination
 
+from infra.metricas import contador, histograma
+from infra.tracing import rastrear
+
+DURACAO_NSGA2 = histograma("nsga2_segundos", "Tempo de uma execução do NSGA-II")
+GERACOES_NSGA2 = contador("nsga2_geracoes_total", "Gerações evoluídas pelo NSGA-II")
+ALTERNATIVAS_NSGA2 = histograma(
+    "nsga2_alternativas", "Alternativas recebidas pelo NSGA-II (após o pré-filtro)",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+)
+
 class RotaProblem(Problem):
     """
     Classe que define o problema de otimização para escolher o melhor voo 
@@ -23,16 +35,17 @@ class RotaProblem(Problem):
         Inicializa o problema com os dados das rotas e perfil do usuário.
 
         Parâmetros:
-        - tempos (list[float]): tempo total de cada rota
-        - precos (list[float]): preço de cada rota
-        - conexoes (list[int]): número de conexões de cada rota
+        - tempos (array[float]): tempo total de cada rota
+        - precos (array[float]): preço de cada rota
+        - conexoes (array[int]): número de conexões de cada rota
         - tempo_ideal (float): tempo máximo desejado pelo usuário
         - orcamento (float): valor máximo desejado pelo usuário
         - perfil_cfg (dict): configuração do perfil com pesos
         """
-        self.tempos = np.array(tempos, dtype=float)
-        self.precos = np.array(precos, dtype=float)
-        self.conexoes = np.array(conexoes, dtype=int)
+        # asarray: as colunas do AlternativaSet já chegam em float64/int32 (sem cópia)
+        self.tempos = np.asarray(tempos, dtype=float)
+        self.precos = np.asarray(precos, dtype=float)
+        self.conexoes = np.asarray(conexoes)
 
         self.tempo_ideal = tempo_ideal
         self.orcamento = orcamento
@@ -134,13 +147,14 @@ class RotaProblem(Problem):
         out["F"] = np.array(scores).reshape(-1, 1)
 
 
+@rastrear("otimizacao.nsga2")
 def executar_nsga2(rotas, tempo_ideal, orcamento, perfil):
     """
     Executa o algoritmo NSGA2 para encontrar a melhor rota
     entre as alternativas fornecidas.
 
     Parâmetros:
-    - rotas (list[dict]): lista de rotas, cada uma com tempo, preco e conexoes
+    - rotas (AlternativaSet): alternativas com as colunas tempo, preco e conexoes
     - tempo_ideal (float): tempo máximo desejado
     - orcamento (float): valor máximo desejado
     - perfil (str): perfil do usuário ("Mais barato", "Mais rápido", "Equilibrado")
@@ -149,10 +163,10 @@ def executar_nsga2(rotas, tempo_ideal, orcamento, perfil):
     - res: objeto retornado pelo PyMOO contendo o melhor indivíduo e o Pareto
     """
 
-    # Extrai listas de tempos, preços e conexões das rotas
-    tempos = [r["tempo"] for r in rotas]
-    precos = [r["preco"] for r in rotas]
-    conexoes = [r["conexoes"] for r in rotas]
+    # Colunas do AlternativaSet (views, sem cópia)
+    tempos = rotas.tempo
+    precos = rotas.preco
+    conexoes = rotas.conexoes
 
     # Configuração dos perfis
     PERFIS = {
@@ -189,6 +203,12 @@ def executar_nsga2(rotas, tempo_ideal, orcamento, perfil):
         perfil_cfg=perfil_cfg
     )
 
+    # Com uma única alternativa (comum após o pré-filtro de dominância)
+    # não há o que evoluir: avalia direto no mesmo formato do PyMOO
+    if len(rotas) == 1:
+        X = np.zeros((1, 1), dtype=int)
+        return SimpleNamespace(X=X, F=problem.evaluate(X))
+
     # Configuração do algoritmo NSGA2
     algorithm = NSGA2(
         pop_size=min(80, len(rotas)),  # tamanho da população
@@ -196,12 +216,16 @@ def executar_nsga2(rotas, tempo_ideal, orcamento, perfil):
     )
 
     # Executa a otimização
-    res = minimize(
-        problem,
-        algorithm,
-        termination=get_termination("n_gen", 60),  # número de gerações
-        seed=1,
-        verbose=False
-    )
+    ALTERNATIVAS_NSGA2.observar(len(rotas))
+    with DURACAO_NSGA2.medir():
+        res = minimize(
+            problem,
+            algorithm,
+            termination=get_termination("n_gen", 60),  # número de gerações
+            seed=1,
+            verbose=False
+        )
+    # Ao terminar, n_gen do PyMOO já aponta para a geração seguinte
+    GERACOES_NSGA2.inc(max(res.algorithm.n_gen - 1, 0))
 
     return res
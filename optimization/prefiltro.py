@@ -0,0 +1,63 @@
+import numpy as np
+
+# Limite de comparações por bloco (bloco x n x 3 booleanos) no filtro de dominância
+_MAX_COMPARACOES_BLOCO = 1 << 22
+
+
+def indices_unicos(alternativas):
+    """
+    Índices da primeira ocorrência de cada voo distinto, por hash de
+    (data, saída, chegada, preço, conexões). O Rome2Rio repete o mesmo
+    horário em vários cards da mesma busca.
+    """
+    vistos = {}
+    chaves = zip(
+        alternativas.data_partida,
+        alternativas.saida,
+        alternativas.chegada,
+        alternativas.preco.tolist(),
+        alternativas.conexoes.tolist(),
+    )
+    for i, chave in enumerate(chaves):
+        vistos.setdefault(chave, i)
+    return np.fromiter(vistos.values(), dtype=np.intp, count=len(vistos))
+
+
+def mascara_nao_dominados(objetivos):
+    """
+    Filtro skyline vetorizado (minimização em todas as colunas).
+
+    Retorna uma máscara booleana com os pontos que nenhum outro domina
+    estritamente (<= em tudo e < em pelo menos um objetivo). Pontos com
+    objetivos idênticos não se dominam e são mantidos.
+    """
+    objetivos = np.asarray(objetivos, dtype=np.float64)
+    n = len(objetivos)
+    dominado = np.zeros(n, dtype=bool)
+    if n < 2:
+        return ~dominado
+
+    bloco = max(1, _MAX_COMPARACOES_BLOCO // (n * objetivos.shape[1]))
+    for inicio in range(0, n, bloco):
+        p = objetivos[inicio:inicio + bloco, None, :]      # (b, 1, k)
+        menor_igual = (objetivos[None, :, :] <= p).all(axis=2)   # (b, n): q <= p
+        menor = (objetivos[None, :, :] < p).any(axis=2)          # (b, n): q < p em algum
+        dominado[inicio:inicio + bloco] = (menor_igual & menor).any(axis=1)
+
+    return ~dominado
+
+
+def preprocessar(alternativas):
+    """
+    Remove voos duplicados e alternativas estritamente dominadas em
+    (preço, tempo, conexões) antes do solver.
+
+    O score de todos os perfis cresce com preço, tempo e conexões, então
+    uma alternativa dominada nunca tem score menor que a que a domina:
+    a solução escolhida não muda, só o número de pontos.
+    """
+    if len(alternativas) == 0:
+        return alternativas
+
+    unicas = alternativas.selecionar(indices_unicos(alternativas))
+    return unicas.selecionar(mascara_nao_dominados(unicas.objetivos()))
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+cambio_service.py
+=================
+Provedor de câmbio compartilhado pelo processo.
+
+- cache em memória + disco (SQLite) com idade máxima configurável
+- single-flight: chamadas concorrentes para o mesmo par dividem uma requisição
+- thread opcional de atualização em segundo plano
+- conversão vetorizada de arrays NumPy de preços
+- fonte em arquivo local (JSON) para uso offline/testes:
+  OTIMIZACAO_CAMBIO_ARQUIVO=cambio.json  →  {"USD-BRL": 5.4, "EUR-BRL": 5.9}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from infra.cache_ttl import CacheTTL, caminho_cache
+from infra.singleflight import SingleFlight
+
+MOEDA_BASE = "BRL"
+MAX_IDADE_S = float(os.getenv("OTIMIZACAO_CAMBIO_MAX_IDADE_S", 6 * 3600))
+
+
+# -----------------------------
+# Fontes de cotação
+# -----------------------------
+class FonteSerpApi:
+    def cotar(self, origem: str, destino: str) -> float:
+        from crawler.cambio_serpapi import get_cambio_serpapi
+
+        return get_cambio_serpapi(origem, destino)
+
+
+class FonteArquivo:
+    """Lê cotações fixas de um JSON {"USD-BRL": 5.4, ...} (sem rede)."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+
+    def cotar(self, origem: str, destino: str) -> float:
+        with open(self.caminho, encoding="utf-8") as f:
+            tabela = json.load(f)
+
+        par, inverso = f"{origem}-{destino}", f"{destino}-{origem}"
+        if par in tabela:
+            return float(tabela[par])
+        if inverso in tabela:
+            return 1.0 / float(tabela[inverso])
+        raise RuntimeError(f"Câmbio {par} não encontrado em {self.caminho}")
+
+
+# -----------------------------
+# Provedor
+# -----------------------------
+class ProvedorCambio:
+
+    def __init__(self, fonte=None, max_idade_s: float = MAX_IDADE_S, arquivo_cache: str | None = None):
+        self.fonte = fonte or FonteSerpApi()
+        self.max_idade_s = float(max_idade_s)
+        self._cache = CacheTTL("cambio", ttl_s=self.max_idade_s, max_itens=64, arquivo=arquivo_cache)
+
+        self._lock = threading.Lock()
+        self._voos = SingleFlight("cambio")
+
+        self._pares_atualizados: set[tuple[str, str]] = set()
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def taxa(self, origem: str, destino: str = MOEDA_BASE) -> float:
+        """Quantas unidades de `destino` vale 1 unidade de `origem`."""
+        origem, destino = origem.upper(), destino.upper()
+        if origem == destino:
+            return 1.0
+
+        taxa = self._cache.obter((origem, destino))
+        if taxa is not None:
+            return taxa
+        return self._cotar(origem, destino)
+
+    def converter(self, valores, origem: str, destino: str = MOEDA_BASE) -> np.ndarray:
+        """Converte um array de preços de `origem` para `destino` de uma vez."""
+        return np.asarray(valores, dtype=np.float64) * self.taxa(origem, destino)
+
+    def _cotar(self, origem: str, destino: str) -> float:
+        """Single-flight: só uma requisição por par em andamento."""
+        return self._voos.executar((origem, destino), self._consultar_fonte, origem, destino)
+
+    def _consultar_fonte(self, origem: str, destino: str) -> float:
+        taxa = float(self.fonte.cotar(origem, destino))
+        self._cache.definir((origem, destino), taxa)
+        return taxa
+
+    # -----------------------------
+    # Atualização em segundo plano
+    # -----------------------------
+    def iniciar_atualizacao(self, pares, intervalo_s: float | None = None) -> None:
+        """
+        Mantém os pares informados sempre frescos, renovando-os antes de
+        expirar. Chamadas repetidas só acrescentam pares à mesma thread.
+        """
+        with self._lock:
+            self._pares_atualizados.update((o.upper(), d.upper()) for o, d in pares)
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            intervalo = intervalo_s if intervalo_s is not None else self.max_idade_s * 0.8
+            self._parar.clear()
+            self._thread = threading.Thread(
+                target=self._laco_atualizacao, args=(intervalo,),
+                name="cambio-atualizacao", daemon=True,
+            )
+            self._thread.start()
+
+    def parar_atualizacao(self) -> None:
+        self._parar.set()
+
+    def _laco_atualizacao(self, intervalo_s: float) -> None:
+        # Cada par é renovado quando a cotação em cache chega a `intervalo_s` de
+        # idade; uma cotação ainda fresca (ex.: no SQLite, de uma execução
+        # anterior) não gasta chamada à fonte ao subir o processo
+        while not self._parar.is_set():
+            with self._lock:
+                pares = list(self._pares_atualizados)
+
+            espera = intervalo_s
+            for origem, destino in pares:
+                expira_em = self._cache.expira_em((origem, destino))
+                if expira_em is not None:
+                    vence_em = expira_em - (self.max_idade_s - intervalo_s) - time.time()
+                    if vence_em > 0:
+                        espera = min(espera, vence_em)
+                        continue
+                try:
+                    self._cotar(origem, destino)
+                except Exception as e:
+                    print(f"[ERRO] Falha ao atualizar câmbio {origem}-{destino}: {e}")
+            self._parar.wait(max(espera, 1.0))
+
+
+_provedor: ProvedorCambio | None = None
+_provedor_lock = threading.Lock()
+
+
+def obter_provedor_cambio() -> ProvedorCambio:
+    """Provedor único do processo (fonte em arquivo se OTIMIZACAO_CAMBIO_ARQUIVO estiver definido)."""
+    global _provedor
+    with _provedor_lock:
+        if _provedor is None:
+            arquivo = os.getenv("OTIMIZACAO_CAMBIO_ARQUIVO")
+            if arquivo:
+                _provedor = ProvedorCambio(fonte=FonteArquivo(arquivo))
+            else:
+                _provedor = ProvedorCambio(arquivo_cache=caminho_cache("cambio.sqlite"))
+        return _provedor
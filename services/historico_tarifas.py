@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+historico_tarifas.py
+====================
+Histórico local de tarifas (SQLite), alimentado a cada busca do
+RouteService.
+
+- `coletas`: uma linha por (origem, destino, data_partida, coletado_em),
+  com resumo (menor preço, menor tempo, quantidade) — índice composto
+  nessas quatro colunas para consultas por faixa de datas
+- `tarifas`: as alternativas de cada coleta (permite reconstruir o
+  AlternativaSet sem refazer o crawl)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from domain.models import AlternativaSet
+
+HISTORICO_DB = os.getenv(
+    "OTIMIZACAO_HISTORICO_DB",
+    os.path.join(os.getenv("OTIMIZACAO_DADOS_DIR", "dados"), "historico_tarifas.sqlite"),
+)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS coletas (
+    id INTEGER PRIMARY KEY,
+    origem TEXT NOT NULL,
+    destino TEXT NOT NULL,
+    data_partida TEXT NOT NULL,
+    coletado_em REAL NOT NULL,
+    n_alternativas INTEGER NOT NULL,
+    preco_min REAL,
+    tempo_min REAL
+);
+CREATE INDEX IF NOT EXISTS idx_coletas_rota_data
+    ON coletas (origem, destino, data_partida, coletado_em);
+
+CREATE TABLE IF NOT EXISTS tarifas (
+    coleta_id INTEGER NOT NULL REFERENCES coletas (id),
+    tempo REAL NOT NULL,
+    preco REAL NOT NULL,
+    conexoes INTEGER NOT NULL,
+    moeda INTEGER NOT NULL,
+    saida TEXT,
+    chegada TEXT,
+    tempo_total TEXT,
+    preco_str TEXT,
+    roteiro TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tarifas_coleta ON tarifas (coleta_id);
+"""
+
+# Última coleta de cada data de partida dentro da faixa
+_ULTIMAS_COLETAS = """
+SELECT c.* FROM coletas c
+JOIN (
+    SELECT data_partida, MAX(coletado_em) AS ultima
+    FROM coletas
+    WHERE origem = ? AND destino = ? AND data_partida BETWEEN ? AND ? AND coletado_em >= ?
+    GROUP BY data_partida
+) u ON c.data_partida = u.data_partida AND c.coletado_em = u.ultima
+WHERE c.origem = ? AND c.destino = ?
+ORDER BY c.data_partida
+"""
+
+
+# Migrações por versão do banco (PRAGMA user_version); cada uma roda uma única vez
+_MIGRACOES = (
+    # 1: coletas antigas gravadas com origem/destino como digitados ("gru", " Lisboa")
+    """
+    UPDATE coletas SET origem = UPPER(TRIM(origem)), destino = UPPER(TRIM(destino))
+    WHERE origem != UPPER(TRIM(origem)) OR destino != UPPER(TRIM(destino))
+    """,
+)
+
+
+def _rota(origem, destino):
+    """Mesma normalização de RouteService.chave_coleta: "gru" e "GRU" dividem o histórico."""
+    return origem.strip().upper(), destino.strip().upper()
+
+
+def _migrar(conn: sqlite3.Connection) -> None:
+    """Aplica as migrações ainda não aplicadas; a versão sobe na mesma transação."""
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    for numero, sql in enumerate(_MIGRACOES[versao:], start=versao + 1):
+        with conn:
+            conn.execute(sql)
+            conn.execute(f"PRAGMA user_version = {numero}")
+
+
+class HistoricoTarifas:
+
+    def __init__(self, caminho: str = HISTORICO_DB):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _conexao(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_ESQUEMA)
+            _migrar(conn)
+            self._conn = conn
+        return self._conn
+
+    # -----------------------------
+    # Gravação
+    # -----------------------------
+    def registrar(self, origem, destino, data_partida, alternativas: AlternativaSet, coletado_em=None) -> int:
+        """Grava uma coleta inteira; retorna o id da coleta."""
+        coletado_em = time.time() if coletado_em is None else coletado_em
+        origem, destino = _rota(origem, destino)
+        n = len(alternativas)
+
+        linhas = [
+            (
+                float(alternativas.tempo[i]), float(alternativas.preco[i]),
+                int(alternativas.conexoes[i]), int(alternativas.moeda[i]),
+                alternativas.saida[i], alternativas.chegada[i],
+                alternativas.tempo_total[i], alternativas.preco_str[i],
+                json.dumps([e["etapa"] for e in alternativas.roteiro_de(i)], ensure_ascii=False),
+            )
+            for i in range(n)
+        ]
+
+        with self._lock:
+            conn = self._conexao()
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO coletas (origem, destino, data_partida, coletado_em, n_alternativas, preco_min, tempo_min)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        origem, destino, data_partida, coletado_em, n,
+                        float(alternativas.preco.min()) if n else None,
+                        float(alternativas.tempo.min()) if n else None,
+                    ),
+                )
+                coleta_id = cur.lastrowid
+                conn.executemany(
+                    "INSERT INTO tarifas (coleta_id, tempo, preco, conexoes, moeda, saida, chegada, tempo_total, preco_str, roteiro)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(coleta_id, *linha) for linha in linhas],
+                )
+        return coleta_id
+
+    # -----------------------------
+    # Consultas
+    # -----------------------------
+    def mais_barato_por_dia(self, origem, destino, data_inicio, data_fim, max_idade_s=None):
+        """
+        Menor preço por data de partida em [data_inicio, data_fim] (ISO),
+        usando a coleta mais recente de cada dia. Ex.: próximos 30 dias
+        sem refazer o crawl.
+
+        Retorna lista de dicts {data_partida, preco_min, tempo_min, n_alternativas, coletado_em}.
+        """
+        desde = 0.0 if max_idade_s is None else time.time() - max_idade_s
+        origem, destino = _rota(origem, destino)
+        with self._lock:
+            linhas = self._conexao().execute(
+                _ULTIMAS_COLETAS,
+                (origem, destino, data_inicio, data_fim, desde, origem, destino),
+            ).fetchall()
+
+        return [
+            {
+                "data_partida": l["data_partida"],
+                "preco_min": l["preco_min"],
+                "tempo_min": l["tempo_min"],
+                "n_alternativas": l["n_alternativas"],
+                "coletado_em": l["coletado_em"],
+            }
+            for l in linhas
+            if l["preco_min"] is not None
+        ]
+
+    def serie_precos(self, origem, destino, data_partida):
+        """Série temporal (coletado_em, preco_min) de uma data de partida."""
+        origem, destino = _rota(origem, destino)
+        with self._lock:
+            linhas = self._conexao().execute(
+                "SELECT coletado_em, preco_min FROM coletas"
+                " WHERE origem = ? AND destino = ? AND data_partida = ?"
+                " ORDER BY coletado_em",
+                (origem, destino, data_partida),
+            ).fetchall()
+        return [(l["coletado_em"], l["preco_min"]) for l in linhas]
+
+    def alternativas_recentes(self, origem, destino, data_partida, max_idade_s) -> AlternativaSet | None:
+        """
+        AlternativaSet da última coleta com no máximo `max_idade_s` segundos, ou
+        None. Coletas vazias não contam: o crawler devolve vazio quando a busca
+        falha, e reaproveitar isso serviria "sem voos" durante toda a janela.
+        """
+        origem, destino = _rota(origem, destino)
+        with self._lock:
+            conn = self._conexao()
+            coleta = conn.execute(
+                "SELECT id FROM coletas"
+                " WHERE origem = ? AND destino = ? AND data_partida = ? AND coletado_em >= ?"
+                " AND n_alternativas > 0"
+                " ORDER BY coletado_em DESC LIMIT 1",
+                (origem, destino, data_partida, time.time() - max_idade_s),
+            ).fetchone()
+            if coleta is None:
+                return None
+            linhas = conn.execute(
+                "SELECT * FROM tarifas WHERE coleta_id = ? ORDER BY rowid", (coleta["id"],)
+            ).fetchall()
+
+        return AlternativaSet(
+            tempo=np.fromiter((l["tempo"] for l in linhas), dtype=np.float64, count=len(linhas)),
+            preco=np.fromiter((l["preco"] for l in linhas), dtype=np.float64, count=len(linhas)),
+            conexoes=[l["conexoes"] for l in linhas],
+            moeda=[l["moeda"] for l in linhas],
+            saida=[l["saida"] for l in linhas],
+            chegada=[l["chegada"] for l in linhas],
+            tempo_total=[l["tempo_total"] for l in linhas],
+            preco_str=[l["preco_str"] for l in linhas],
+            data_partida=[data_partida] * len(linhas),
+            roteiro=[
+                [{"etapa": etapa, "ordem": ordem} for ordem, etapa in enumerate(json.loads(l["roteiro"] or "[]"))]
+                for l in linhas
+            ],
+        )
+
+
+_historico: HistoricoTarifas | None = None
+_historico_lock = threading.Lock()
+
+
+def obter_historico() -> HistoricoTarifas:
+    """Histórico único do processo."""
+    global _historico
+    with _historico_lock:
+        if _historico is None:
+            _historico = HistoricoTarifas()
+        return _historico
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from crawler.serpapi import ERROS_HOTEIS
+from infra.singleflight import SingleFlight
+from infra.tracing import span
+from services.cambio_service import obter_provedor_cambio
+
+
+class HotelService:
+    """
+    Busca de hotéis em lote para todas as rotas.
+
+    `pre_carregar` dispara, em segundo plano, uma busca por chave distinta
+    (destino, data_partida, diarias, num_hospedes) enquanto os voos são
+    coletados e otimizados. `buscar` aguarda a busca já em andamento e
+    re-filtra localmente pela faixa de estrelas da rota. Os totais são
+    convertidos de USD para BRL pelo provedor de câmbio compartilhado.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hoteis")
+    _futuros: dict[tuple, Future] = {}
+    _lock = threading.Lock()
+
+    # Sessões diferentes pedindo a mesma busca (inclusive a faixa de estrelas) dividem a consulta
+    _voos = SingleFlight("hoteis")
+
+    @staticmethod
+    def chave(rota):
+        return (
+            rota["destino"].strip(),
+            rota["data_partida"].strftime("%Y-%m-%d"),
+            int(rota["diarias"]),
+            int(rota["num_hospedes"]),
+        )
+
+    @staticmethod
+    def pre_carregar(rotas):
+        """Agenda a busca de hotéis de todas as rotas, sem duplicar chaves."""
+        with HotelService._lock:
+            # Descarta buscas antigas já concluídas (o cache guarda os dados)
+            for chave in [c for c, f in HotelService._futuros.items() if f.done()]:
+                del HotelService._futuros[chave]
+
+            for rota in rotas:
+                if not rota["destino"].strip():
+                    continue
+
+                chave = HotelService.chave(rota)
+                if chave in HotelService._futuros:
+                    continue
+
+                HotelService._futuros[chave] = HotelService._executor.submit(
+                    HotelService._consultar_unico, rota.copy()
+                )
+
+    @staticmethod
+    def buscar(rota):
+        """
+        Retorna (hoteis, totais, estrelas, moeda) da rota; `moeda` é "BRL"
+        ou, se o câmbio falhar, "USD" (totais sem conversão). Se houver uma
+        busca em lote para a mesma chave, aguarda por ela em vez de chamar a API.
+        """
+        with HotelService._lock:
+            futuro = HotelService._futuros.get(HotelService.chave(rota))
+
+        if futuro is not None:
+            try:
+                futuro.result()
+            except Exception:
+                # A chamada síncrona abaixo tenta de novo e expõe o erro
+                ERROS_HOTEIS.inc(etapa="pre_carregamento")
+
+        return HotelService._consultar_unico(rota)
+
+    @staticmethod
+    def _consultar_unico(rota):
+        chave = (*HotelService.chave(rota), int(rota["min_estrelas"]), int(rota["max_estrelas"]))
+        return HotelService._voos.executar(chave, HotelService._consultar, rota)
+
+    @staticmethod
+    def _consultar(rota):
+        # requests e o cliente da SerpApi ficam fora da inicialização do app
+        from crawler.hotels_serpapi import get_top10_best_rated_total_stars_names
+
+        with span("hoteis.consultar", destino=rota["destino"]) as s:
+            totais, estrelas, hoteis = get_top10_best_rated_total_stars_names(
+                destino=rota["destino"],
+                data_entrada=rota["data_partida"].strftime("%Y-%m-%d"),
+                dias_estadia=rota["diarias"],
+                min_estrelas=rota["min_estrelas"],
+                max_estrelas=rota["max_estrelas"],
+                num_hospedes=rota["num_hospedes"]
+            )
+            s.definir(hoteis=len(hoteis))
+
+        # A SerpApi devolve USD; a tela exibe R$. Sem câmbio, os hotéis já
+        # buscados continuam valendo: seguem em USD e a tela avisa
+        try:
+            return hoteis, obter_provedor_cambio().converter(totais, "USD").tolist(), estrelas, "BRL"
+        except Exception as e:
+            ERROS_HOTEIS.inc(etapa="cambio")
+            print(f"[WARN] Câmbio USD-BRL indisponível, hotéis em USD: {e}")
+            return hoteis, list(totais), estrelas, "USD"
@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from domain.models import AlternativaSet, ResultadoOtimizacao
+from infra.metricas import contador, gravar_arquivo_configurado, histograma
+from infra.profiling import perfilar
+from infra.tracing import exportar_se_configurado, novo_trace_id, span
+from services.optimization_service import OptimizationService
+from services.route_service import RouteService
+
+# Rotas processadas ao mesmo tempo (pool único do processo, todas as sessões)
+MAX_JOBS_SIMULTANEOS = int(os.getenv("OTIMIZACAO_MAX_JOBS", "2"))
+
+# Jobs concluídos ficam consultáveis por este tempo
+RETENCAO_JOBS_S = 3600
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+CANCELADO = "cancelado"
+
+FINALIZADOS = (CONCLUIDO, ERRO, CANCELADO)
+
+JOBS_FINALIZADOS = contador("jobs_total", "Jobs de rota finalizados, por status", ("status",))
+DURACAO_JOB = histograma("job_segundos", "Duração de um job de rota (coleta, otimização e persistência)")
+
+
+@dataclass
+class Job:
+    """Estado de uma rota em processamento (atualizado pela thread do pool)."""
+    id: str
+    rota_idx: int
+    rota: dict
+    status: str = PENDENTE
+    progresso: float = 0.0
+    etapa: str = "Na fila"
+    alternativas: Optional[AlternativaSet] = None   # parcial: disponível antes da otimização
+    resultado: Optional[ResultadoOtimizacao] = None
+    erro: Optional[str] = None
+    criado_em: float = field(default_factory=time.time)
+    concluido_em: Optional[float] = None
+    trace_id: str = field(default_factory=novo_trace_id)   # spans da coleta à otimização
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in FINALIZADOS
+
+
+class JobService:
+    """
+    Registro de jobs compartilhado pelo processo.
+
+    Cada rota vira um Job executado no pool (coleta → otimização →
+    persistência); a tela só consulta o estado (`obter`) em reruns leves,
+    sem bloquear o script do Streamlit durante o crawl.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=MAX_JOBS_SIMULTANEOS, thread_name_prefix="jobs")
+    _jobs: dict[str, Job] = {}
+    _futuros: dict[str, Future] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def submeter(rota, rota_idx) -> str:
+        """Agenda o processamento da rota; retorna o id do job."""
+        # Cópia: o formulário continua editável enquanto o job roda
+        parametros = {k: v for k, v in rota.items() if k != "hospedagem"}
+        job = Job(id=uuid.uuid4().hex, rota_idx=rota_idx, rota=parametros)
+
+        with JobService._lock:
+            JobService._limpar_antigos()
+            JobService._jobs[job.id] = job
+            JobService._futuros[job.id] = JobService._executor.submit(JobService._executar, job)
+        return job.id
+
+    @staticmethod
+    def obter(job_id) -> Optional[Job]:
+        with JobService._lock:
+            return JobService._jobs.get(job_id)
+
+    @staticmethod
+    def cancelar(job_id) -> bool:
+        """Cancela um job ainda na fila (jobs em execução terminam normalmente)."""
+        with JobService._lock:
+            futuro = JobService._futuros.get(job_id)
+            job = JobService._jobs.get(job_id)
+            if futuro is None or job is None or not futuro.cancel():
+                return False
+            job.etapa, job.concluido_em = "Cancelado", time.time()
+            job.status = CANCELADO
+            JOBS_FINALIZADOS.inc(status=CANCELADO)
+            return True
+
+    @staticmethod
+    def _limpar_antigos():
+        limite = time.time() - RETENCAO_JOBS_S
+        for job_id in [j.id for j in JobService._jobs.values() if j.finalizado and j.concluido_em < limite]:
+            del JobService._jobs[job_id]
+            JobService._futuros.pop(job_id, None)
+
+    @staticmethod
+    def _executar(job: Job):
+        # rota["perfilar"] = "cpu", "mem" ou "cpu,mem" perfila só este job (relatórios em perfis/)
+        with DURACAO_JOB.medir(), perfilar(job.rota.get("perfilar", "")), \
+                span("job.rota", trace_id=job.trace_id, rota_idx=job.rota_idx,
+                     origem=job.rota["origem"], destino=job.rota["destino"]):
+            status = JobService._processar(job)
+        exportar_se_configurado(job.trace_id)
+        JOBS_FINALIZADOS.inc(status=status)
+        gravar_arquivo_configurado()
+
+        # O status vai por último: quem lê um job finalizado já vê o resto
+        # preenchido (inclusive o trace completo)
+        job.progresso = 1.0
+        job.concluido_em = time.time()
+        job.status = status
+
+    @staticmethod
+    def _processar(job: Job) -> str:
+        """Coleta → otimização → persistência; retorna o status final."""
+        rota = job.rota
+        data = rota["data_partida"].strftime("%Y-%m-%d")
+        try:
+            job.status, job.etapa, job.progresso = EXECUTANDO, "Coletando voos", 0.1
+
+            alternativas = RouteService.buscar_alternativas(
+                rota["origem"],
+                rota["destino"],
+                data,
+                janela_dias=rota.get("janela_dias", 0)
+            )
+            job.alternativas = alternativas
+            job.etapa, job.progresso = "Otimizando", 0.7
+
+            if not alternativas:
+                resultado = OptimizationService.resultado_sem_alternativas(
+                    rota_idx=job.rota_idx,
+                    perfil=rota["perfil"],
+                    tempo_max=rota["tempo_max"],
+                    orcamento=rota["orcamento"]
+                )
+            else:
+                # Coletas repetidas da mesma rota reaproveitam a fronteira (e o resultado)
+                resultado = OptimizationService.otimizar_rota(
+                    RouteService.chave_coleta(rota["origem"], rota["destino"], data, rota.get("janela_dias", 0)),
+                    alternativas,
+                    rota["perfil"],
+                    rota["tempo_max"],
+                    rota["orcamento"],
+                    job.rota_idx
+                )
+
+                # Histórico em Parquet para análise offline (OTIMIZACAO_PERSISTIR=1);
+                # pyarrow.dataset é importado aqui, na thread do job
+                from services.persistencia_service import PersistenciaService
+
+                if resultado and PersistenciaService.habilitado():
+                    with span("persistencia.salvar_resultado"):
+                        PersistenciaService.salvar_resultado(resultado, rota["origem"], rota["destino"], data)
+
+            job.resultado = resultado
+            status, job.etapa = CONCLUIDO, "Concluído"
+        except Exception as e:
+            print(f"[ERRO] Job da rota {job.rota_idx}: {e}")
+            job.erro = str(e)
+            status, job.etapa = ERRO, "Falhou"
+
+        return status
@@ -1,14 +1,53 @@
+import dataclasses
+import os
+import threading
+
 import numpy as np
-from optimization.nsga2_solver import executar_nsga2
-from domain.models import ResultadoOtimizacao
+from optimization.arquivo_pareto import ArquivoPareto
+from optimization.prefiltro import preprocessar
+from domain.models import AlternativaSet, ResultadoOtimizacao
+from infra.cache_ttl import CacheTTL
+from infra.profiling import perfilado
+from infra.tracing import rastrear, span
+
+# Por quanto tempo a fronteira da última coleta de cada rota fica guardada
+TTL_FRONTEIRA_S = float(os.getenv("OTIMIZACAO_FRONTEIRA_TTL_S", "3600"))
+
+
+class _FronteiraRota:
+    """ArquivoPareto de uma coleta e os resultados já calculados sobre ele."""
+
+    def __init__(self, assinatura):
+        self.assinatura = assinatura
+        self.arquivo = ArquivoPareto()
+        self.resultados = {}    # (perfil, tempo_max, orcamento) -> (versao do arquivo, resultado)
+        self.lock = threading.Lock()
+
+
+# Chave da coleta (RouteService.chave_coleta) -> _FronteiraRota; só em memória
+_FRONTEIRAS = CacheTTL("fronteiras", ttl_s=TTL_FRONTEIRA_S, max_itens=128)
+# Busca, criação e primeira inserção de uma fronteira acontecem juntas:
+# nenhum job enxerga uma fronteira nova ainda vazia
+_LOCK_FRONTEIRAS = threading.Lock()
+
 
 class OptimizationService:
 
     @staticmethod
+    @rastrear("otimizacao.otimizar")
+    @perfilado("otimizacao.otimizar")
     def otimizar(alternativas, perfil, tempo_max, orcamento, rota_idx):
 
+        # pymoo (e scipy) só carregam na primeira otimização, não na subida do app
+        from optimization.nsga2_solver import executar_nsga2
+
+        # Sem duplicatas e sem alternativas dominadas: mesma resposta, menos pontos
+        with span("otimizacao.preprocessar", entrada=len(alternativas)) as s:
+            alternativas = preprocessar(alternativas)
+            s.definir(saida=len(alternativas))
+
         res = executar_nsga2(
-            [a.__dict__ for a in alternativas],
+            alternativas,
             tempo_ideal=tempo_max,
             orcamento=orcamento,
             perfil=perfil
@@ -28,8 +67,7 @@ class OptimizationService:
             idx_sol = np.argmin(F_unique[:, 0])
 
         elif perfil == "Mais rápido":
-            tempos = [alternativas[i].tempo for i in X_unique]
-            idx_sol = np.argmin(tempos)
+            idx_sol = np.argmin(alternativas.tempo[X_unique])
 
         else:
             F_norm = (F_unique - F_unique.min(axis=0)) / (np.ptp(F_unique, axis=0) + 1e-9)
@@ -50,13 +88,89 @@ class OptimizationService:
         )
     
     
+    @staticmethod
+    def otimizar_rota(chave_coleta, alternativas, perfil, tempo_max, orcamento, rota_idx):
+        """
+        Otimiza a coleta de uma rota reaproveitando o que já foi feito para
+        ela. Enquanto as coletas repetidas da mesma chave (reuso do
+        histórico, coleta compartilhada, novo clique com outro perfil ou
+        limite) trazem as mesmas alternativas (mesma assinatura), o
+        ArquivoPareto não é refeito e o mesmo (perfil, tempo_max, orcamento)
+        devolve o resultado anterior sem rodar o NSGA-II. Uma coleta
+        diferente (preços renovados) começa um arquivo novo: tarifas antigas
+        não podem continuar na fronteira.
+        """
+        assinatura = alternativas.assinatura()
+        with _LOCK_FRONTEIRAS:
+            fronteira = _FRONTEIRAS.obter(chave_coleta)
+            if fronteira is None or fronteira.assinatura != assinatura:
+                fronteira = _FronteiraRota(assinatura)
+                fronteira.arquivo.inserir_alternativas(alternativas)
+                _FRONTEIRAS.definir(chave_coleta, fronteira)
+
+        # Jobs simultâneos da mesma rota: o segundo espera e reaproveita o primeiro
+        with fronteira.lock:
+            parametros = (perfil, float(tempo_max), float(orcamento))
+            anterior = fronteira.resultados.get(parametros)
+            if anterior is not None and anterior[0] == fronteira.arquivo.versao:
+                return dataclasses.replace(anterior[1], rota_idx=rota_idx)
+
+            resultado = OptimizationService.otimizar_incremental(
+                fronteira.arquivo, None, perfil, tempo_max, orcamento, rota_idx
+            )
+            fronteira.resultados[parametros] = (fronteira.arquivo.versao, resultado)
+            return resultado
+
+    @staticmethod
+    def otimizar_incremental(arquivo, novas, perfil, tempo_max, orcamento, rota_idx):
+        """
+        Acrescenta `novas` ao ArquivoPareto da rota e otimiza só a fronteira
+        mantida nele. Como alternativas dominadas nunca são escolhidas, o
+        resultado é o mesmo de otimizar tudo de novo; chamadas sem mudança
+        na fronteira (arquivo.versao igual) podem reaproveitar o anterior.
+        """
+        if novas is not None and len(novas):
+            arquivo.inserir_alternativas(novas)
+
+        frente = arquivo.alternativas()
+        if len(frente) == 0:
+            return OptimizationService.resultado_sem_alternativas(rota_idx, perfil, tempo_max, orcamento)
+
+        return OptimizationService.otimizar(frente, perfil, tempo_max, orcamento, rota_idx)
+
+    @staticmethod
+    @rastrear("otimizacao.itinerario")
+    def otimizar_itinerario(rotas, alternativas_por_rota, k=5):
+        """
+        Quando as rotas se encadeiam (destino de uma = origem da próxima),
+        retorna os k melhores itinerários completos respeitando os horários
+        de conexão; caso contrário, lista vazia.
+        """
+        if len(rotas) < 2 or len(alternativas_por_rota) != len(rotas):
+            return []
+
+        encadeadas = all(
+            a["destino"].strip().lower() == b["origem"].strip().lower()
+            for a, b in zip(rotas[:-1], rotas[1:])
+        )
+        if not encadeadas:
+            return []
+
+        from optimization.itinerario import k_melhores_itinerarios
+
+        return k_melhores_itinerarios(
+            alternativas_por_rota,
+            k=k,
+            datas=[r["data_partida"].strftime("%Y-%m-%d") for r in rotas]
+        )
+
     @staticmethod
     def resultado_sem_alternativas(rota_idx, perfil, tempo_max, orcamento):
         return ResultadoOtimizacao(
             rota_idx=rota_idx,
             perfil=perfil,
             alternativa_escolhida=None,
-            alternativas=[],
+            alternativas=AlternativaSet.vazio(),
             pareto=None,
             pareto_idx=None,
             tempo_max=tempo_max,
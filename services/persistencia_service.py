@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+persistencia_service.py
+=======================
+Exporta/importa alternativas coletadas e resultados de otimização em
+Parquet, particionados por rota e data (layout Hive):
+
+    {OTIMIZACAO_DADOS_DIR}/alternativas/rota=GRU-LIS/data=2026-01-15/<coleta>.parquet
+    {OTIMIZACAO_DADOS_DIR}/resultados/rota=GRU-LIS/data=2026-01-15/<coleta>.parquet
+
+Os arquivos são lidos com memory-map; as colunas numéricas viram arrays
+NumPy sem cópia, prontos para re-otimização em lote.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from urllib.parse import quote
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from domain.models import AlternativaSet, ResultadoOtimizacao
+from domain.parsers import MOEDAS
+from services.optimization_service import OptimizationService
+
+DADOS_DIR = os.getenv("OTIMIZACAO_DADOS_DIR", "dados")
+
+
+# -----------------------------
+# AlternativaSet ⇄ Arrow
+# -----------------------------
+def alternativas_para_tabela(alternativas: AlternativaSet) -> pa.Table:
+    n_etapas = len(alternativas.roteiro_ids)
+    # Só os textos que o conjunto usa (um subconjunto compartilha a tabela do original)
+    unicos, inversa = np.unique(alternativas.roteiro_ids, return_inverse=True)
+    textos = pa.array(alternativas.roteiro_textos[unicos].tolist(), type=pa.string())
+
+    # Roteiro CSR → list<dictionary<string>>: cada etapa é gravada uma vez por arquivo
+    etapas = pa.DictionaryArray.from_arrays(pa.array(inversa, type=pa.int32()), textos)
+    roteiro = pa.ListArray.from_arrays(
+        pa.array(alternativas.roteiro_offsets.astype(np.int32), type=pa.int32()),
+        etapas if n_etapas else etapas.slice(0, 0),
+    )
+
+    return pa.table(
+        {
+            "tempo": alternativas.tempo,
+            "preco": alternativas.preco,
+            "conexoes": alternativas.conexoes,
+            "moeda": alternativas.moeda,
+            "saida": pa.array(alternativas.saida.tolist(), type=pa.string()),
+            "chegada": pa.array(alternativas.chegada.tolist(), type=pa.string()),
+            "tempo_total": pa.array(alternativas.tempo_total.tolist(), type=pa.string()),
+            "preco_str": pa.array(alternativas.preco_str.tolist(), type=pa.string()),
+            "data_partida": pa.array(alternativas.data_partida.tolist(), type=pa.string()),
+            "roteiro": roteiro,
+        },
+        metadata={"moedas": ",".join(MOEDAS)},
+    )
+
+
+def tabela_para_alternativas(tabela: pa.Table) -> AlternativaSet:
+    roteiro = tabela.column("roteiro").combine_chunks()
+    offsets = roteiro.offsets.to_numpy() - roteiro.offsets[0].as_py()
+    etapas = roteiro.flatten()
+    if isinstance(etapas.type, pa.DictionaryType):
+        # O dicionário do arquivo já é a tabela de textos do conjunto
+        textos = etapas.dictionary.to_pylist()
+        ids = etapas.indices.to_numpy(zero_copy_only=False) if len(etapas) else np.zeros(0, np.int32)
+    else:
+        textos, ids = np.unique(np.asarray(etapas.to_pylist(), dtype=object), return_inverse=True)
+
+    def numerica(nome):
+        return tabela.column(nome).to_numpy()
+
+    return AlternativaSet(
+        tempo=numerica("tempo"),
+        preco=numerica("preco"),
+        conexoes=numerica("conexoes"),
+        moeda=numerica("moeda"),
+        saida=tabela.column("saida").to_pylist(),
+        chegada=tabela.column("chegada").to_pylist(),
+        tempo_total=tabela.column("tempo_total").to_pylist(),
+        preco_str=tabela.column("preco_str").to_pylist(),
+        # Arquivos anteriores à busca com datas flexíveis não têm a coluna
+        data_partida=tabela.column("data_partida").to_pylist() if "data_partida" in tabela.column_names else None,
+        roteiro_ids=ids,
+        roteiro_offsets=offsets,
+        roteiro_textos=list(textos),
+    )
+
+
+def _nome_coleta() -> str:
+    """
+    Nome do arquivo de uma gravação: instante (ordena cronologicamente) mais
+    um sufixo aleatório, para duas gravações da mesma rota e data no mesmo
+    segundo (lote, jobs simultâneos) não se sobrescreverem.
+    """
+    agora = time.time_ns()
+    segundos, nanos = divmod(agora, 10**9)
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(segundos))}_{nanos:09d}_{uuid.uuid4().hex[:6]}"
+
+
+def _particao(origem: str, destino: str, data: str) -> str:
+    rota = quote(f"{origem}-{destino}", safe="")
+    return os.path.join(f"rota={rota}", f"data={quote(data, safe='')}")
+
+
+class PersistenciaService:
+
+    @staticmethod
+    def habilitado() -> bool:
+        """A gravação automática pelo app é opt-in (OTIMIZACAO_PERSISTIR=1)."""
+        return os.getenv("OTIMIZACAO_PERSISTIR", "0") == "1"
+
+    # -----------------------------
+    # Gravação
+    # -----------------------------
+    @staticmethod
+    def salvar_alternativas(alternativas, origem, destino, data, coleta=None, base_dir=DADOS_DIR):
+        coleta = coleta or _nome_coleta()
+        pasta = os.path.join(base_dir, "alternativas", _particao(origem, destino, data))
+        os.makedirs(pasta, exist_ok=True)
+
+        caminho = os.path.join(pasta, f"{coleta}.parquet")
+        pq.write_table(alternativas_para_tabela(alternativas), caminho)
+        return caminho
+
+    @staticmethod
+    def salvar_resultado(resultado: ResultadoOtimizacao, origem, destino, data, base_dir=DADOS_DIR):
+        """Grava as alternativas do resultado e uma linha com Pareto, escolha e restrições."""
+        coleta = _nome_coleta()
+        caminho_alt = PersistenciaService.salvar_alternativas(
+            resultado.alternativas, origem, destino, data, coleta, base_dir
+        )
+
+        escolhida = resultado.alternativa_escolhida
+        tabela = pa.table({
+            "rota_idx": pa.array([resultado.rota_idx], type=pa.int32()),
+            "perfil": [resultado.perfil],
+            "tempo_max": pa.array([resultado.tempo_max], type=pa.float64()),
+            "orcamento": pa.array([resultado.orcamento], type=pa.float64()),
+            "escolhida_idx": pa.array([escolhida.indice if escolhida is not None else -1], type=pa.int32()),
+            "pareto_idx": pa.array([resultado.pareto_idx or []], type=pa.list_(pa.int32())),
+            "mensagem": pa.array([resultado.mensagem], type=pa.string()),
+            "alternativas": [os.path.relpath(caminho_alt, base_dir)],
+        })
+
+        pasta = os.path.join(base_dir, "resultados", _particao(origem, destino, data))
+        os.makedirs(pasta, exist_ok=True)
+        caminho = os.path.join(pasta, f"{coleta}.parquet")
+        pq.write_table(tabela, caminho)
+        return caminho
+
+    # -----------------------------
+    # Leitura
+    # -----------------------------
+    @staticmethod
+    def carregar_alternativas(caminho) -> AlternativaSet:
+        return tabela_para_alternativas(pq.read_table(caminho, memory_map=True))
+
+    @staticmethod
+    def carregar_resultado(caminho, base_dir=DADOS_DIR) -> ResultadoOtimizacao:
+        linha = pq.read_table(caminho, memory_map=True).to_pylist()[0]
+        alternativas = PersistenciaService.carregar_alternativas(os.path.join(base_dir, linha["alternativas"]))
+
+        return ResultadoOtimizacao(
+            rota_idx=linha["rota_idx"],
+            perfil=linha["perfil"],
+            alternativa_escolhida=alternativas[linha["escolhida_idx"]] if linha["escolhida_idx"] >= 0 else None,
+            alternativas=alternativas,
+            pareto=None,
+            pareto_idx=linha["pareto_idx"],
+            tempo_max=linha["tempo_max"],
+            orcamento=linha["orcamento"],
+            mensagem=linha["mensagem"],
+        )
+
+    @staticmethod
+    def listar(tipo="alternativas", rota=None, data_inicio=None, data_fim=None, base_dir=DADOS_DIR):
+        """
+        Arquivos de `tipo` ("alternativas" ou "resultados") filtrados pelas
+        partições; rota no formato "ORIGEM-DESTINO" e datas ISO (inclusive).
+        """
+        pasta = os.path.join(base_dir, tipo)
+        if not os.path.isdir(pasta):
+            return []
+
+        dataset = ds.dataset(pasta, format="parquet", partitioning="hive")
+        caminhos = []
+        for fragmento in dataset.get_fragments():
+            chaves = ds.get_partition_keys(fragmento.partition_expression)
+            data = str(chaves.get("data"))
+            if rota is not None and chaves.get("rota") != rota:
+                continue
+            if data_inicio is not None and data < data_inicio:
+                continue
+            if data_fim is not None and data > data_fim:
+                continue
+            caminhos.append(fragmento.path)
+        return sorted(caminhos)
+
+    @staticmethod
+    def reotimizar_lote(perfil, tempo_max, orcamento, rota=None, data_inicio=None, data_fim=None, base_dir=DADOS_DIR):
+        """Re-executa a otimização sobre todas as coletas salvas que casam com os filtros."""
+        resultados = []
+        for i, caminho in enumerate(PersistenciaService.listar("alternativas", rota, data_inicio, data_fim, base_dir)):
+            alternativas = PersistenciaService.carregar_alternativas(caminho)
+            if len(alternativas) == 0:
+                continue
+            resultado = OptimizationService.otimizar(alternativas, perfil, tempo_max, orcamento, i + 1)
+            if resultado:
+                resultados.append((caminho, resultado))
+        return resultados
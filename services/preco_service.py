@@ -0,0 +1,44 @@
+import numpy as np
+
+from domain.parsers import MOEDA_NAO_SUPORTADA, MOEDAS, detectar_moedas, parse_precos
+from services.cambio_service import MOEDA_BASE, obter_provedor_cambio
+
+
+class PrecoService:
+    """
+    Normalização de preços entre o crawler e o RouteService.
+
+    O Rome2Rio pode devolver preços em R$, US$ ou € na mesma busca; o
+    objetivo e o filtro de Pareto só fazem sentido com uma única moeda.
+    """
+
+    @staticmethod
+    def normalizar(precos_str):
+        """
+        Converte a coluna de textos de preço para BRL em um único passo.
+
+        Retorna (precos_brl float64, moedas uint8). Preços em moedas sem
+        câmbio disponível ou não suportadas (C$, A$, MX$...) ficam como NaN.
+        """
+        valores = parse_precos(precos_str)
+        moedas = detectar_moedas(precos_str)
+
+        tabela = PrecoService.tabela_cambio(np.unique(moedas))
+        return valores * tabela[moedas], moedas
+
+    @staticmethod
+    def tabela_cambio(codigos_presentes):
+        """Vetor taxa[codigo] → BRL; só consulta o câmbio das moedas presentes."""
+        provedor = obter_provedor_cambio()
+        tabela = np.full(len(MOEDAS), np.nan)
+
+        for codigo in codigos_presentes:
+            if codigo == MOEDA_NAO_SUPORTADA:
+                continue
+            moeda = MOEDAS[codigo]
+            try:
+                tabela[codigo] = provedor.taxa(moeda, MOEDA_BASE)
+            except Exception as e:
+                print(f"[ERRO] Câmbio {moeda}-{MOEDA_BASE} indisponível: {e}")
+
+        return tabela
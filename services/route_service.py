@@ -1,30 +1,132 @@
 import asyncio
-from crawler.crawler_rome2rio import buscar_rotas
-from domain.models import Alternativa
-from domain.parsers import parse_tempo, parse_preco
+import os
+import sqlite3
+from datetime import date, timedelta
+import numpy as np
+from domain.models import AlternativaSet
+from domain.parsers import parse_tempos
+from infra.singleflight import SingleFlight, SingleFlightAsync
+from infra.profiling import perfilado
+from infra.tracing import rastrear, span
+from services.historico_tarifas import obter_historico
+from services.preco_service import PrecoService
+
+# Reaproveita uma coleta do histórico com até N segundos (0 = sempre refaz o crawl).
+# Numa busca com janela de datas, só as datas sem coleta recente vão ao crawler
+REUSO_HISTORICO_S = float(os.getenv("OTIMIZACAO_REUSO_HISTORICO_S", "1800"))
+
+# Buscas idênticas em andamento (várias sessões/abas/jobs) esperam o mesmo crawl
+_COLETAS = SingleFlight("coletas")
+_COLETAS_ASYNC = SingleFlightAsync("coletas_async")
 
 class RouteService:
 
     @staticmethod
-    def buscar_alternativas(origem, destino, data):
-        rotas_raw = asyncio.run(
-            buscar_rotas(origem, destino, data)
+    @rastrear("rota.buscar_alternativas")
+    @perfilado("rota.buscar_alternativas")
+    def buscar_alternativas(origem, destino, data, janela_dias=0, max_idade_historico_s=REUSO_HISTORICO_S):
+        """
+        Alternativas de `data` (ISO) ou, com janela_dias > 0, de todas as
+        datas em data ± janela_dias, buscadas em paralelo num único
+        navegador e unidas num só conjunto (coluna data_partida).
+        """
+        return _COLETAS.executar(
+            RouteService.chave_coleta(origem, destino, data, janela_dias),
+            lambda: asyncio.run(
+                RouteService._coletar(origem, destino, data, janela_dias, max_idade_historico_s)
+            )
+        )
+
+    @staticmethod
+    @perfilado("rota.buscar_alternativas_async")
+    async def buscar_alternativas_async(origem, destino, data, janela_dias=0,
+                                        max_idade_historico_s=REUSO_HISTORICO_S, pool=None):
+        """Versão para quem já roda num event loop (API); `pool` compartilha o navegador."""
+        return await _COLETAS_ASYNC.executar(
+            RouteService.chave_coleta(origem, destino, data, janela_dias),
+            lambda: RouteService._coletar(origem, destino, data, janela_dias, max_idade_historico_s, pool)
         )
 
-        alternativas = []
-
-        for r in rotas_raw:
-            for d in r.get("detalhes", []):
-                alternativas.append(
-                    Alternativa(
-                        tempo=parse_tempo(d.get("tempo_total")),
-                        preco=parse_preco(d.get("Preco")),
-                        conexoes=int(d.get("conexoes", 0)),
-                        saida=d.get("saida"),
-                        chegada=d.get("chegada"),
-                        tempo_total=d.get("tempo_total"),
-                        roteiro=d.get("roteiro", []),
-                        preco_str=d.get("Preco")
-                    )
+    @staticmethod
+    def chave_coleta(origem, destino, data, janela_dias=0):
+        return (origem.strip().upper(), destino.strip().upper(), data, int(janela_dias))
+
+    @staticmethod
+    @rastrear("rota.coletar")
+    async def _coletar(origem, destino, data, janela_dias, max_idade_historico_s, pool=None):
+        datas = RouteService.datas_janela(data, janela_dias)
+        por_data = {}
+
+        # SQLite, parsing e câmbio (PrecoService.normalizar pode consultar a
+        # fonte via HTTP) são bloqueantes: rodam fora do event loop
+        if max_idade_historico_s > 0:
+            with span("rota.reuso_historico", datas=len(datas)):
+                por_data = await asyncio.to_thread(
+                    RouteService._reusar_historico, origem, destino, datas, max_idade_historico_s
                 )
+
+        faltantes = [d for d in datas if d not in por_data]
+        if faltantes:
+            # playwright só é importado quando há o que coletar
+            from crawler.crawler_rome2rio import buscar_rotas_janela
+
+            rotas_por_data = await buscar_rotas_janela(origem, destino, faltantes, pool)
+            for d, rotas_raw in rotas_por_data.items():
+                alternativas = await asyncio.to_thread(RouteService._montar_alternativas, rotas_raw, d)
+                # Vazio costuma ser falha do crawl (a data volta [] sem exceção):
+                # fora do histórico para não ser reaproveitado como "sem voos"
+                if alternativas:
+                    try:
+                        with span("rota.registrar_historico", data=d):
+                            await asyncio.to_thread(obter_historico().registrar, origem, destino, d, alternativas)
+                    except sqlite3.Error as e:
+                        print(f"[WARN] Histórico de tarifas indisponível: {e}")
+                por_data[d] = alternativas
+
+        return AlternativaSet.concatenar([por_data[d] for d in datas])
+
+    @staticmethod
+    def _reusar_historico(origem, destino, datas, max_idade_s):
+        """Coletas recentes do histórico por data (datas sem coleta recente ficam de fora)."""
+        por_data = {}
+        for d in datas:
+            recentes = obter_historico().alternativas_recentes(origem, destino, d, max_idade_s)
+            if recentes is not None:
+                por_data[d] = recentes
+        return por_data
+
+    @staticmethod
+    def datas_janela(data, janela_dias=0):
+        """Datas ISO em data ± janela_dias, sem datas passadas."""
+        centro = date.fromisoformat(data)
+        hoje = date.today()
+        datas = [centro + timedelta(days=k) for k in range(-janela_dias, janela_dias + 1)]
+        return [d.isoformat() for d in datas if d >= hoje or d == centro]
+
+    @staticmethod
+    @rastrear("rota.parsing")
+    def _montar_alternativas(rotas_raw, data):
+        detalhes = [d for r in rotas_raw for d in r.get("detalhes", [])]
+
+        # Todos os preços em BRL (a moeda original fica como código)
+        precos, moedas = PrecoService.normalizar([d.get("Preco") for d in detalhes])
+
+        alternativas = AlternativaSet(
+            tempo=parse_tempos([d.get("tempo_total") for d in detalhes]),
+            preco=precos,
+            moeda=moedas,
+            conexoes=[int(d.get("conexoes", 0)) for d in detalhes],
+            saida=[d.get("saida") for d in detalhes],
+            chegada=[d.get("chegada") for d in detalhes],
+            tempo_total=[d.get("tempo_total") for d in detalhes],
+            roteiro=[d.get("roteiro", []) for d in detalhes],
+            preco_str=[d.get("Preco") for d in detalhes],
+            data_partida=[data] * len(detalhes)
+        )
+
+        convertidas = ~np.isnan(alternativas.preco)
+        if not convertidas.all():
+            print(f"[INFO] {int((~convertidas).sum())} voos descartados: moeda não suportada ou sem câmbio disponível")
+            alternativas = alternativas.selecionar(convertidas)
+
         return alternativas
@@ -0,0 +1,63 @@
+import json
+
+import streamlit as st
+
+from infra.tracing import exportar_chrome, resumo_trace
+
+
+def _tabela_etapas(resumo):
+    return [
+        {
+            "Etapa": e["etapa"],
+            "Chamadas": e["chamadas"],
+            "Soma (ms)": round(e["soma_ms"], 1),
+            "Maior (ms)": round(e["max_ms"], 1),
+        }
+        for e in resumo["etapas"]
+    ]
+
+
+def render_diagnostico():
+    """
+    Painel da sidebar com o tempo por etapa de cada rota (coleta, parsing,
+    otimização, renderização) e o trace completo para o Chrome/Perfetto.
+    Só é montado com o painel aberto.
+    """
+    traces = st.session_state.get("traces") or {}
+    if not traces:
+        return
+
+    painel = st.sidebar.expander("🩺 Diagnóstico de desempenho", expanded=False,
+                                 key="exp_diagnostico", on_change="rerun")
+    if not painel.open:
+        return
+
+    tempos_render = st.session_state.get("tempos_render", {})
+    ids = list(traces.values())
+
+    with painel:
+        for idx, trace_id in sorted(traces.items()):
+            resumo = resumo_trace(trace_id)
+            if not resumo["etapas"]:
+                st.caption(f"Rota {idx}: sem dados (ainda na fila ou trace descartado)")
+                continue
+
+            st.markdown(f"**Rota {idx}** · {resumo['total_ms'] / 1000:.2f} s")
+            st.dataframe(_tabela_etapas(resumo), hide_index=True, width="stretch")
+            if idx in tempos_render:
+                st.caption(f"Renderização: {tempos_render[idx]:.1f} ms")
+
+        trace_itinerario = st.session_state.get("trace_itinerario")
+        if trace_itinerario:
+            resumo = resumo_trace(trace_itinerario)
+            if resumo["etapas"]:
+                st.caption(f"Itinerário completo: {resumo['total_ms']:.1f} ms")
+                ids.append(trace_itinerario)
+
+        st.download_button(
+            "⬇️ Baixar trace (Chrome/Perfetto)",
+            data=json.dumps(exportar_chrome(ids)),
+            file_name="trace_otimizacao.json",
+            mime="application/json",
+            key="btn_trace"
+        )
@@ -0,0 +1,106 @@
+import dataclasses
+
+import streamlit as st
+
+from domain.models import AlternativaSet
+from infra.tracing import span
+from services.job_service import CANCELADO, CONCLUIDO, ERRO, PENDENTE, JobService
+from services.optimization_service import OptimizationService
+
+# Intervalo do rerun parcial que acompanha os jobs
+INTERVALO_ATUALIZACAO_S = 1.0
+
+
+def _jobs_da_sessao():
+    return {idx: JobService.obter(job_id) for idx, job_id in st.session_state.jobs.items()}
+
+
+def rota_em_processamento(rota_idx) -> bool:
+    """True enquanto o job da rota (1-based) não terminou; só ela fica bloqueada para edição."""
+    job_id = st.session_state.jobs.get(rota_idx)
+    job = JobService.obter(job_id) if job_id else None
+    return job is not None and not job.finalizado
+
+
+def submeter_rotas(rotas):
+    st.session_state.jobs = {
+        idx + 1: JobService.submeter(rota, idx + 1)
+        for idx, rota in enumerate(rotas)
+    }
+    # O trace de cada job sobrevive ao fim do processamento (painel de diagnóstico)
+    st.session_state.traces = {
+        idx: JobService.obter(job_id).trace_id for idx, job_id in st.session_state.jobs.items()
+    }
+    st.session_state.jobs_apresentados = frozenset()
+
+
+def sincronizar_jobs() -> bool:
+    """
+    Copia para a sessão os resultados dos jobs já concluídos e, quando
+    todos terminam, monta o itinerário e encerra o processamento
+    (retorna True nesse caso).
+    """
+    jobs = _jobs_da_sessao()
+    apresentados = {r.rota_idx for r in st.session_state.resultados}
+
+    for idx, job in sorted(jobs.items()):
+        if job is None or idx in apresentados:
+            continue
+        if job.status == CONCLUIDO and job.resultado:
+            st.session_state.resultados.append(job.resultado)
+        elif job.status == ERRO:
+            vazio = OptimizationService.resultado_sem_alternativas(
+                idx, job.rota["perfil"], job.rota["tempo_max"], job.rota["orcamento"]
+            )
+            st.session_state.resultados.append(
+                dataclasses.replace(vazio, mensagem=f":warning: Falha ao processar a rota: {job.erro}")
+            )
+        elif job.status == CANCELADO:
+            vazio = OptimizationService.resultado_sem_alternativas(
+                idx, job.rota["perfil"], job.rota["tempo_max"], job.rota["orcamento"]
+            )
+            st.session_state.resultados.append(
+                dataclasses.replace(vazio, mensagem="Rota cancelada antes do processamento.")
+            )
+
+    if all(job is None or job.finalizado for job in jobs.values()):
+        ordenados = [job for _, job in sorted(jobs.items()) if job is not None]
+        with span("ui.itinerario", rotas=len(ordenados)) as s:
+            st.session_state.itinerarios = OptimizationService.otimizar_itinerario(
+                [job.rota for job in ordenados],
+                [job.alternativas if job.alternativas is not None else AlternativaSet.vazio() for job in ordenados]
+            )
+        st.session_state.trace_itinerario = s.trace_id
+        st.session_state.jobs = {}
+        st.session_state.processando = False
+        return True
+
+    return False
+
+
+@st.fragment(run_every=INTERVALO_ATUALIZACAO_S)
+def render_progresso_jobs():
+    """Painel de progresso: só este trecho roda a cada segundo; o app inteiro só quando algum job termina."""
+    jobs = _jobs_da_sessao()
+    st.info("⏳ Otimização em andamento...")
+    if not jobs:
+        return
+
+    finalizados = frozenset(idx for idx, job in jobs.items() if job is None or job.finalizado)
+    progresso = sum(1.0 if job is None else job.progresso for job in jobs.values()) / len(jobs)
+
+    st.progress(progresso, text=f"{len(finalizados)} de {len(jobs)} rotas concluídas ({int(progresso * 100)}%)")
+    for idx, job in sorted(jobs.items()):
+        if job is None:
+            continue
+        if job.status != PENDENTE:
+            st.caption(f"Rota {idx}: {job.etapa}")
+            continue
+        # Só jobs na fila podem ser cancelados; o callback roda antes do próximo rerun do fragmento
+        col_etapa, col_cancelar = st.columns([5, 1])
+        col_etapa.caption(f"Rota {idx}: {job.etapa}")
+        col_cancelar.button("Cancelar", key=f"cancelar_job_{idx}", on_click=JobService.cancelar, args=(job.id,))
+
+    if finalizados != st.session_state.jobs_apresentados:
+        st.session_state.jobs_apresentados = finalizados
+        st.rerun()
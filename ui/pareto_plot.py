@@ -0,0 +1,156 @@
+import hashlib
+
+import numpy as np
+import streamlit as st
+
+# Acima disso as alternativas comuns são agregadas em uma grade
+MAX_PONTOS_GRAFICO = 4000
+
+# Categorias por ponto (a maior prevalece: escolhida > Pareto > inviável > viável)
+VIAVEL, INVIAVEL, PARETO, ESCOLHIDA = 0, 1, 2, 3
+NOMES = np.array(["Viável", "Viola restrições", "Pareto viável (NSGA-II)", "Solução escolhida"], dtype=object)
+CORES = ["lightgray", "red", "green", "gold"]
+TAMANHOS = np.array([4, 5, 7, 10])
+SIMBOLOS = np.array(["circle", "circle", "circle", "diamond"], dtype=object)
+
+
+def impressao_digital(resultado) -> str:
+    """
+    Hash do conteúdo que define o gráfico e o resumo da rota (não depende
+    da identidade do objeto): todas as colunas das alternativas — datas,
+    horários e roteiros inclusive — mais fronteira, escolhida e limites.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(resultado.alternativas.assinatura().encode())
+    h.update(np.asarray(resultado.pareto_idx or [], dtype=np.int64).tobytes())
+    escolhida = resultado.alternativa_escolhida
+    h.update(repr((
+        escolhida.indice if escolhida is not None else -1,
+        float(resultado.tempo_max),
+        float(resultado.orcamento),
+    )).encode())
+    return h.hexdigest()
+
+
+def categorias(resultado) -> np.ndarray:
+    """Categoria (int8) de cada alternativa, sem laço em Python."""
+    a = resultado.alternativas
+    cat = np.where(
+        (a.preco <= resultado.orcamento) & (a.tempo <= resultado.tempo_max), VIAVEL, INVIAVEL
+    ).astype(np.int8)
+    if resultado.pareto_idx:
+        cat[np.asarray(resultado.pareto_idx, dtype=np.intp)] = PARETO
+    if resultado.alternativa_escolhida is not None:
+        cat[resultado.alternativa_escolhida.indice] = ESCOLHIDA
+    return cat
+
+
+def _escala_discreta():
+    # Cor numérica (categoria) + escala em degraus: o Plotly valida um array numérico
+    # de uma vez, enquanto um array de nomes de cor é validado ponto a ponto
+    passos = len(CORES)
+    return [
+        [limite, cor]
+        for k, cor in enumerate(CORES)
+        for limite in (k / passos, (k + 1) / passos)
+    ]
+
+
+def amostrar(resultado, cat, max_pontos=MAX_PONTOS_GRAFICO) -> np.ndarray:
+    """
+    Índices a desenhar. Pareto e escolhida entram sempre; as demais, se
+    passarem do limite, viram um representante por célula de uma grade
+    (preço × tempo × conexões × categoria), o que preserva a forma da nuvem.
+    """
+    n = len(cat)
+    if n <= max_pontos:
+        return np.arange(n)
+
+    a = resultado.alternativas
+    fixos = np.flatnonzero(cat >= PARETO)
+    comuns = np.flatnonzero(cat < PARETO)
+
+    # Lado da grade para que o total de células fique perto do limite
+    grupos = len(np.unique(a.conexoes[comuns])) * 2
+    bins = max(8, int(np.sqrt(max(max_pontos - len(fixos), 1) / grupos)))
+
+    def celula(valores):
+        v = valores[comuns]
+        faixa = np.ptp(v) or 1.0
+        return np.minimum(((v - v.min()) / faixa * bins).astype(np.int64), bins - 1)
+
+    chave = ((celula(a.preco) * bins + celula(a.tempo)) * 64 + np.minimum(a.conexoes[comuns], 63)) * 2 + cat[comuns]
+    _, primeiros = np.unique(chave, return_index=True)
+    return np.concatenate([fixos, comuns[primeiros]])
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def figura_pareto(impressao: str, _resultado):
+    """
+    Figura do espaço de soluções em um único trace. Cacheada pela
+    impressão digital do resultado (`_resultado` não entra no hash);
+    cache_resource devolve a mesma figura sem desserializar a cada rerun,
+    então ela não deve ser alterada por quem chama.
+    """
+    # O streamlit já carrega o plotly na subida do app: o import local não
+    # adia nada, só resolve o nome (ver bench_inicializacao)
+    import plotly.graph_objects as go
+
+    a = _resultado.alternativas
+    cat = categorias(_resultado)
+    idx = amostrar(_resultado, cat)
+    # Desenhadas por último ficam por cima
+    idx = idx[np.argsort(cat[idx], kind="stable")]
+    c = cat[idx]
+
+    tempo = a.tempo[idx]
+    horas = np.floor(tempo).astype(np.int64)
+    minutos = np.rint((tempo - horas) * 60).astype(np.int64)
+    colunas = [horas, minutos, NOMES[c]]
+    modelo = "Preço: R$ %{x:,.2f}<br>Tempo: %{customdata[0]}h %{customdata[1]} min<br>Conexões: %{z}"
+
+    datas = a.data_partida[idx]
+    if any(d is not None for d in datas):
+        colunas.append(datas)
+        modelo += "<br>Partida: %{customdata[3]}"
+    modelo += "<br>%{customdata[2]}<extra></extra>"
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter3d(
+        x=a.preco[idx],
+        y=tempo,
+        z=a.conexoes[idx],
+        mode="markers",
+        marker=dict(
+            size=TAMANHOS[c], color=c, colorscale=_escala_discreta(), cmin=-0.5, cmax=len(CORES) - 0.5,
+            symbol=SIMBOLOS[c], opacity=1.0
+        ),
+        customdata=np.column_stack(colunas),
+        hovertemplate=modelo,
+        showlegend=False,
+    ))
+
+    # Legenda: traces vazios, só com a cor de cada categoria presente
+    for k in np.unique(c):
+        fig.add_trace(go.Scatter3d(
+            x=[None], y=[None], z=[None],
+            mode="markers",
+            name=NOMES[k],
+            marker=dict(size=TAMANHOS[k], color=CORES[k], symbol=SIMBOLOS[k]),
+        ))
+
+    titulo = "Classificação"
+    if len(idx) < len(a):
+        titulo += f" ({len(idx)} de {len(a)} pontos)"
+
+    fig.update_layout(
+        height=600,
+        separators=",.",
+        scene=dict(
+            xaxis_title="Preço (R$)",
+            yaxis_title="Tempo (h)",
+            zaxis_title="Conexões"
+        ),
+        legend_title=titulo
+    )
+    return fig
@@ -1,19 +1,78 @@
 import streamlit as st
-import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
+from datetime import date
 from domain.parsers import format_preco, format_tempo_horas, format_estrelas
-from crawler.hotels_serpapi import get_top10_best_rated_total_stars_names
+from infra.tracing import span
+from services.hotel_service import HotelService
+from ui.pareto_plot import figura_pareto, impressao_digital
+
+# =========================================================
+# DADOS DERIVADOS (CACHEADOS POR RESULTADO)
+# =========================================================
+@st.cache_data(max_entries=256, show_spinner=False)
+def resumo_resultado(impressao: str, _r) -> dict:
+    """
+    Tudo o que a tela deriva de um resultado, calculado uma vez por
+    impressão digital (`_r` não entra no hash). A impressão cobre todas as
+    colunas das alternativas (data, horários e roteiro da escolhida
+    inclusive), então resultados que só diferem nelas não se misturam.
+    """
+    alternativas = _r.alternativas
+    a = _r.alternativa_escolhida
+    viavel = (alternativas.preco <= _r.orcamento) & (alternativas.tempo <= _r.tempo_max)
+
+    return {
+        "preco": format_preco(a.preco),
+        "tempo": format_tempo_horas(a.tempo),
+        "conexoes": a.conexoes,
+        "data_partida": date.fromisoformat(a.data_partida).strftime("%d/%m/%Y") if a.data_partida else None,
+        "contagem": (
+            f"{len(alternativas)} alternativas · {int(viavel.sum())} dentro das restrições · "
+            f"{len(_r.pareto_idx or [])} na fronteira de Pareto"
+        ),
+        "roteiro": [
+            f"**Etapa {i + 1}:**<br>" + etapa.get("etapa", "").replace("\n", "<br>")
+            for i, etapa in enumerate(a.roteiro)
+        ],
+    }
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def tabela_hoteis(hoteis: tuple, totais: tuple, estrelas: tuple, col_preco: str, moeda: str = "BRL"):
+    """DataFrame dos hotéis já formatado; refeito só quando a busca muda."""
+    import pandas as pd
+
+    formatar = format_preco if moeda == "BRL" else (lambda v: "US$" + format_preco(v)[2:])
+
+    df = pd.DataFrame({"Hotel": hoteis, col_preco: totais, "Estrelas": estrelas})
+
+    df.index = range(1, len(df) + 1)
+    df["Estrelas"] = df["Estrelas"].map(format_estrelas)
+
+    return df.style.format({
+        col_preco: formatar
+    })
+
 
 # =========================================================
 # APRESENTA OS RESULTADOS
 # =========================================================
+@st.fragment
 def render_resultado_rota(rota_idx: int):
     """
     Renderiza o resultado da otimização de uma rota
-    Respeita 100% os dataclasses ResultadoOtimizacao e Alternativa
+    Respeita 100% o ResultadoOtimizacao e o AlternativaSet (colunar)
+
+    Cada rota é um fragmento: abrir um painel ou carregar hotéis reexecuta
+    só esta rota. Gráfico, roteiro e hotéis só são montados com o painel aberto.
     """
+    with span("ui.render_resultado_rota", rota_idx=rota_idx) as s:
+        _render_resultado_rota(rota_idx)
+
+    # Última renderização de cada rota, para o painel de diagnóstico
+    st.session_state.setdefault("tempos_render", {})[rota_idx] = s.duracao_ms
+
 
+def _render_resultado_rota(rota_idx: int):
     resultados = [
         r for r in st.session_state.resultados
         if r.rota_idx == rota_idx
@@ -23,7 +82,7 @@ def render_resultado_rota(rota_idx: int):
         st.warning("⚠️ Nenhum resultado de otimização disponível para esta rota.")
         return
 
-    for r in resultados:
+    for j, r in enumerate(resultados):
         rota = st.session_state.rotas[rota_idx - 1]
 
         with st.expander(
@@ -49,145 +108,63 @@ def render_resultado_rota(rota_idx: int):
             # =====================================================
             # MELHOR SOLUÇÃO
             # =====================================================
-            a = r.alternativa_escolhida
+            impressao = impressao_digital(r)
+            resumo = resumo_resultado(impressao, r)
 
             st.markdown("### 🏆 Melhor Alternativa Selecionada")
 
             col1, col2, col3 = st.columns(3)
-            col1.metric("💰 Preço", format_preco(a.preco))
-            col2.metric("⏱ Tempo", format_tempo_horas(a.tempo))
-            col3.metric("🔁 Conexões", a.conexoes)
-
-            with st.expander(
-                "📈 Espaço de Soluções & Fronteira de Pareto",
-                expanded=False
-            ):
-
-                # =====================================================
-                # DADOS
-                # =====================================================
-                alternativas = r.alternativas
-                pareto_idx = r.pareto_idx
-                tempo_max = r.tempo_max
-                orcamento = r.orcamento
-                a = r.alternativa_escolhida
-
-                precos = np.array([alt.preco for alt in alternativas])
-                tempos = np.array([alt.tempo for alt in alternativas])
-                conexoes = np.array([alt.conexoes for alt in alternativas])
-
-                viavel = (precos <= orcamento) & (tempos <= tempo_max)
-
-                # =====================================================
-                # TOOLTIP
-                # =====================================================
-                tooltip = [
-                    f"Preço: {format_preco(alt.preco)}<br>"
-                    f"Tempo: {format_tempo_horas(alt.tempo)}<br>"
-                    f"Conexões: {alt.conexoes}"
-                    for alt in alternativas
-                ]
-
-                fig = go.Figure()
-
-                # =====================================================
-                # TODAS AS ALTERNATIVAS
-                # =====================================================
-                fig.add_trace(go.Scatter3d(
-                    x=precos,
-                    y=tempos,
-                    z=conexoes,
-                    mode="markers",
-                    name="Todas as alternativas",
-                    marker=dict(size=4, color="lightgray"),
-                    text=tooltip,
-                    hovertemplate="%{text}<extra></extra>"
-                ))
-
-                # =====================================================
-                # INVIÁVEIS (VIOLAM RESTRIÇÕES)
-                # =====================================================
-                if (~viavel).any():
-                    fig.add_trace(go.Scatter3d(
-                        x=precos[~viavel],
-                        y=tempos[~viavel],
-                        z=conexoes[~viavel],
-                        mode="markers",
-                        name="Violam restrições",
-                        marker=dict(size=5, color="red"),
-                        text=[tooltip[i] for i, v in enumerate(viavel) if not v],
-                        hovertemplate="%{text}<extra></extra>"
-                    ))
-
-                # =====================================================
-                # PARETO
-                # =====================================================
-                if pareto_idx:
-                    fig.add_trace(go.Scatter3d(
-                        x=[precos[i] for i in pareto_idx],
-                        y=[tempos[i] for i in pareto_idx],
-                        z=[conexoes[i] for i in pareto_idx],
-                        mode="markers",
-                        name="Pareto viável (NSGA-II)",
-                        marker=dict(size=7, color="green"),
-                        text=[tooltip[i] for i in pareto_idx],
-                        hovertemplate="%{text}<extra></extra>"
-                    ))
-
-                # =====================================================
-                # SOLUÇÃO ESCOLHIDA
-                # =====================================================
-                fig.add_trace(go.Scatter3d(
-                    x=[a.preco],
-                    y=[a.tempo],
-                    z=[a.conexoes],
-                    mode="markers",
-                    name="Solução escolhida",
-                    marker=dict(size=10, color="gold", symbol="diamond"),
-                    text=[
-                        f"Preço: {format_preco(a.preco)}<br>"
-                        f"Tempo: {format_tempo_horas(a.tempo)}<br>"
-                        f"Conexões: {a.conexoes}"
-                    ],
-                    hovertemplate="%{text}<extra></extra>"
-                ))
-
-                # =====================================================
-                # LAYOUT
-                # =====================================================
-                fig.update_layout(
-                    height=600,
-                    scene=dict(
-                        xaxis_title="Preço (R$)",
-                        yaxis_title="Tempo (h)",
-                        zaxis_title="Conexões"
-                    ),
-                    legend_title="Classificação"
-                )
+            col1.metric("💰 Preço", resumo["preco"])
+            col2.metric("⏱ Tempo", resumo["tempo"])
+            col3.metric("🔁 Conexões", resumo["conexoes"])
 
-                st.plotly_chart(fig, width='content')
+            if rota.get("janela_dias", 0) and resumo["data_partida"]:
+                st.caption(f"🧭 Melhor data de partida: {resumo['data_partida']}")
+            st.caption(resumo["contagem"])
 
+            # =====================================================
+            # ESPAÇO DE SOLUÇÕES
+            # =====================================================
+            grafico = st.expander(
+                "📈 Espaço de Soluções & Fronteira de Pareto",
+                expanded=False,
+                key=f"exp_grafico_{rota_idx}_{j}",
+                on_change="rerun"
+            )
+            if grafico.open:
+                with grafico:
+                    # Um único trace, amostrado e cacheado pela impressão digital do resultado
+                    st.plotly_chart(figura_pareto(impressao, r), width='content')
 
             # =====================================================
             # ROTEIRO DO VOO
             # =====================================================
-            with st.expander(
+            roteiro = st.expander(
                 f"### 🗺️ Roteiro Completo",
-                expanded=False
-            ):
-                if a.roteiro:
-                    for i, etapa in enumerate(a.roteiro):
-                        texto = etapa.get("etapa", "").replace("\n", "<br>")
-                        st.markdown(
-                            f"**Etapa {i + 1}:**<br>{texto}",
-                            unsafe_allow_html=True
-                        )
+                expanded=False,
+                key=f"exp_roteiro_{rota_idx}_{j}",
+                on_change="rerun"
+            )
+            if roteiro.open:
+                with roteiro:
+                    for texto in resumo["roteiro"]:
+                        st.markdown(texto, unsafe_allow_html=True)
+
             # =====================================================
             # Carga dos hotéis do destino
             # =====================================================
             temHospedagem = not rota["hospedagem"] is None
 
-            with st.expander("🏨 Ver hotéis", expanded=temHospedagem or rota["carregar_hospedagem"]):
+            hoteis = st.expander(
+                "🏨 Ver hotéis",
+                expanded=temHospedagem or rota["carregar_hospedagem"],
+                key=f"exp_hoteis_{rota_idx}_{j}",
+                on_change="rerun"
+            )
+            if not (hoteis.open or rota["carregar_hospedagem"]):
+                continue
+
+            with hoteis:
                 if rota["carregar_hospedagem"] == True:
                      CarreguHoteis(rota)
                      rota["carregar_hospedagem"] = False
@@ -195,21 +172,27 @@ def render_resultado_rota(rota_idx: int):
                     if st.button("🔄 Carregar hotéis", key=f"load_hotel_{rota_idx}"):
                         with st.spinner("Carregando dados dos hotéis..."):
                            rota["carregar_hospedagem"] = True
-                           st.rerun()
+                           st.rerun(scope="fragment")
                 else:
                     hospedagemCarregada = rota["hospedagem"]
                     if not hospedagemCarregada is None:
                         carregue_hospedagem(rota, hospedagemCarregada)
-                   
+
+
+def coluna_preco(rota, moeda="BRL"):
+    simbolo = "R$" if moeda == "BRL" else "US$"
+    return f"Preço ({simbolo}) para {rota['num_hospedes']} hóspedes"
+
 
 def CarreguHoteis(rota):
-    hoteis, totais, estrelas = buscar_dados_api(rota)
-    col_preco = f"Preço (R$) para {rota['num_hospedes']} hóspedes"
+    hoteis, totais, estrelas, moeda = buscar_dados_api(rota)
+    col_preco = coluna_preco(rota, moeda)
     
     hospedagem = {
         "Hotel": hoteis,
         col_preco: totais,
-        "Estrelas": estrelas
+        "Estrelas": estrelas,
+        "moeda": moeda
     }
     
     carregue_hospedagem(rota, hospedagem)
@@ -219,27 +202,50 @@ def CarreguHoteis(rota):
 # CHAMADA À API
 # ============================================
 def buscar_dados_api(rota):
-
-    totais, estrelas, hoteis = get_top10_best_rated_total_stars_names(
-        destino=rota["destino"],
-        data_entrada=rota["data_partida"].strftime("%Y-%m-%d"),
-        dias_estadia=rota["diarias"],
-        min_estrelas=rota["min_estrelas"],
-        max_estrelas=rota["max_estrelas"],
-        num_hospedes=rota["num_hospedes"]
-    )
-
-    return hoteis, totais, estrelas
+    # Usa a busca em lote iniciada junto com a otimização, se houver
+    return HotelService.buscar(rota)
 
 def carregue_hospedagem(rota, hospedagem):
-    col_preco = f"Preço (R$) para {rota['num_hospedes']} hóspedes"
-    df = pd.DataFrame(hospedagem)
-
-    df.index = range(1, len(df) + 1)
-    df["Estrelas"] = df["Estrelas"].apply(format_estrelas)
+    moeda = hospedagem.get("moeda", "BRL")
+    col_preco = coluna_preco(rota, moeda)
+    if moeda != "BRL":
+        st.warning("Câmbio indisponível no momento: preços dos hotéis em dólar (US$).")
+
+    df_styled = tabela_hoteis(
+        tuple(hospedagem["Hotel"]),
+        tuple(hospedagem[col_preco]),
+        tuple(hospedagem["Estrelas"]),
+        col_preco,
+        moeda
+    )
 
-    df_styled = df.style.format({
-        col_preco: format_preco
-    })
+    st.dataframe(df_styled, width="content")
+# =========================================================
+# ITINERÁRIO COMPLETO (ROTAS ENCADEADAS)
+# =========================================================
+def render_itinerarios():
+    itinerarios = st.session_state.get("itinerarios") or []
+    if not itinerarios:
+        return
 
-    st.dataframe(df_styled, width="content")
\ No newline at end of file
+    rotas = st.session_state.rotas
+    percurso = " → ".join([rotas[0]["origem"]] + [r["destino"] for r in rotas])
+
+    with st.expander(f"🧳 Melhores itinerários completos: {percurso}", expanded=True):
+        linhas = []
+        for it in itinerarios:
+            linha = {
+                "Preço total": format_preco(it.preco),
+                "Tempo total": format_tempo_horas(it.tempo),
+                "Espera nas escalas": format_tempo_horas(it.espera),
+            }
+            for t, a in enumerate(it.trechos):
+                data = date.fromisoformat(a.data_partida).strftime("%d/%m") if a.data_partida else ""
+                linha[f"Trecho {t + 1}"] = f"{data} {a.saida} → {a.chegada}".strip()
+            linhas.append(linha)
+
+        import pandas as pd
+
+        df = pd.DataFrame(linhas)
+        df.index = range(1, len(df) + 1)
+        st.dataframe(df, width="content")
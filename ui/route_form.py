@@ -1,7 +1,10 @@
 import streamlit as st
 from datetime import date
+from ui.jobs_view import rota_em_processamento
 
 def on_parametros_hospedagem_modificado(rota_idx):
+    # Estrelas apenas re-filtram os candidatos já em memória;
+    # diárias/hóspedes mudam a chave de busca e consultam a API.
     rota = st.session_state.rotas[rota_idx]
 
     if not st.session_state.resultados is None and len(st.session_state.resultados) > 0:
@@ -33,6 +36,9 @@ def render_rotas():
                 st.button("🗑️", disabled=True, key=f"rem_dis_{i}")
 
 
+        # Só a rota com job em andamento fica bloqueada; as demais seguem editáveis
+        bloqueada = rota_em_processamento(i + 1)
+
         # ================= EXPANDER =================
         with exp:
             expparam = st.expander(
@@ -40,18 +46,18 @@ def render_rotas():
                 expanded=len(st.session_state.resultados) == 0
             )
             with expparam:
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3, col_janela = st.columns([3, 3, 3, 2])
 
                 c["origem"] = col1.text_input(
                     "Origem", c["origem"],
                     key=f"origem_{i}",
-                    disabled=st.session_state.processando
+                    disabled=bloqueada
                 )
 
                 c["destino"] = col2.text_input(
                     "Destino", c["destino"],
                     key=f"destino_{i}",
-                    disabled=st.session_state.processando
+                    disabled=bloqueada
                 )
 
                 c["data_partida"] = col3.date_input(
@@ -60,7 +66,17 @@ def render_rotas():
                     min_value=date.today(),
                     format="DD/MM/YYYY",
                     key=f"data_{i}",
-                    disabled=st.session_state.processando
+                    disabled=bloqueada
+                )
+
+                c["janela_dias"] = col_janela.number_input(
+                    "Datas flexíveis (± dias)",
+                    min_value=0,
+                    max_value=7,
+                    value=c.get("janela_dias", 0),
+                    key=f"janela_{i}",
+                    disabled=bloqueada,
+                    help="Busca também os dias vizinhos em paralelo e escolhe a melhor data/voo"
                 )
 
                 col4, col5, col6 = st.columns(3)
@@ -70,7 +86,7 @@ def render_rotas():
                     ["Mais barato", "Equilibrado", "Mais rápido"],
                     index=["Mais barato", "Equilibrado", "Mais rápido"].index(c["perfil"]),
                     key=f"perfil_{i}",
-                    disabled=st.session_state.processando
+                    disabled=bloqueada
                 )
 
                 c["orcamento"] = col5.number_input(
@@ -79,7 +95,7 @@ def render_rotas():
                     value=c["orcamento"],
                     step=100,
                     key=f"orc_{i}",
-                    disabled=st.session_state.processando
+                    disabled=bloqueada
                 )
 
                 c["tempo_max"] = col6.number_input(
@@ -87,7 +103,7 @@ def render_rotas():
                     min_value=1,
                     value=int(c["tempo_max"]),
                     key=f"tempo_{i}",
-                    disabled=st.session_state.processando,
+                    disabled=bloqueada,
                     on_change=on_parametros_hospedagem_modificado,
                     args=(i,)
                 )
@@ -99,7 +115,7 @@ def render_rotas():
                     min_value=1,
                     value=c["diarias"],
                     key=f"diarias_{i}",
-                    disabled=st.session_state.processando,
+                    disabled=bloqueada,
                     on_change=on_parametros_hospedagem_modificado,
                     args=(i,)
                 )
@@ -109,7 +125,7 @@ def render_rotas():
                     min_value=1,
                     value=c["num_hospedes"],
                     key=f"hosp_{i}",
-                    disabled=st.session_state.processando,
+                    disabled=bloqueada,
                     on_change=on_parametros_hospedagem_modificado,
                     args=(i,)
                 )
@@ -119,8 +135,9 @@ def render_rotas():
                     1, 5,
                     (c["min_estrelas"], c["max_estrelas"]),
                     key=f"stars_{i}",
-                    disabled=st.session_state.processando,
+                    disabled=bloqueada,
                     on_change=on_parametros_hospedagem_modificado,
+                    args=(i,)
                 )
 
             # PLACEHOLDER PARA ADICIONAR OS RESULTADOS.
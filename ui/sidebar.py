@@ -1,5 +1,7 @@
 import streamlit as st
 from datetime import date
+from ui.diagnostico_view import render_diagnostico
+from ui.jobs_view import render_progresso_jobs
 
 # Inicializa session state
 def init_session_state():
@@ -11,6 +13,7 @@ def init_session_state():
             "origem": "",
             "destino": "",
             "data_partida": date.today(),
+            "janela_dias": 0,
             "perfil": "Mais rápido",
             "orcamento": 6000,
             "tempo_max": 30,
@@ -25,6 +28,19 @@ def init_session_state():
     if "resultados" not in st.session_state:
         st.session_state.resultados = []
 
+    if "itinerarios" not in st.session_state:
+        st.session_state.itinerarios = []
+
+    # rota_idx (1-based) -> id do job em segundo plano
+    if "jobs" not in st.session_state:
+        st.session_state.jobs = {}
+        st.session_state.jobs_apresentados = frozenset()
+
+    # rota_idx -> trace_id do último processamento (painel de diagnóstico)
+    if "traces" not in st.session_state:
+        st.session_state.traces = {}
+        st.session_state.tempos_render = {}
+
 # Sidebar
 def render_sidebar():
     st.sidebar.header("🛠️ Controles")
@@ -35,6 +51,7 @@ def render_sidebar():
                 "origem": "",
                 "destino": "",
                 "data_partida": date.today(),
+                "janela_dias": 0,
                 "perfil": "Mais rápido",
                 "orcamento": 6000,
                 "tempo_max": 30,
@@ -49,16 +66,16 @@ def render_sidebar():
 
         if st.sidebar.button("Otimizar todas as rotas", key="btn_opt"):
             st.session_state.resultados = []
+            st.session_state.itinerarios = []
             st.session_state.dados_hoteis = None
             st.session_state.indice_rota = -1
             st.session_state.processando = True
             st.rerun()
     else:
-        st.sidebar.info("⏳ Otimização em andamento...")
-        progress_text = st.sidebar.empty()
-        progress_bar = st.sidebar.progress(0.0)
-        st.session_state.progress_bar = progress_bar
-        st.session_state.progress_text = progress_text
+        with st.sidebar:
+            render_progresso_jobs()
 
     st.sidebar.markdown("---")
     st.sidebar.write("Rotas cadastradas:", len(st.session_state.rotas))
+
+    render_diagnostico()